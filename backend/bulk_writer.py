@@ -0,0 +1,99 @@
+"""Chunked set-based writes to jobs.db.
+
+The batch updaters wrote one UPDATE ... WHERE id = ? per row and committed
+every few rows, taking and releasing the database write lock hundreds of
+times while the Node scrapers waited on the same file. BulkWriter stages
+rows in a TEMP table (temp tables live outside jobs.db, so staging takes
+no lock on it) and applies each chunk with one UPDATE ... FROM in a single
+short transaction, skipping rows that already hold the staged values.
+Lock-hold time per chunk and overall rows/s are tracked for the summary.
+"""
+import time
+
+CHUNK_SIZE = 500
+
+
+class BulkWriter:
+    """Buffer (key, values) updates and apply them chunk_size at a time
+
+    Matches rows on key (jobs.id by default, or any column such as
+    location); columns are the jobs columns to set.
+    """
+
+    def __init__(self, conn, columns, key='id', table='jobs', chunk_size=CHUNK_SIZE):
+        self.conn = conn
+        self.columns = list(columns)
+        self.key = key
+        self.table = table
+        self.chunk_size = max(1, chunk_size)
+        self.staging = f"bulk_{table}_{key}_{'_'.join(self.columns)}"
+        self._pending = []
+        self.stats = {'rows': 0, 'changed': 0, 'chunks': 0, 'lock_seconds': 0.0, 'max_lock': 0.0}
+        self._started = None
+
+        staged = ', '.join(self.columns)
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {self.staging} (match_key PRIMARY KEY, {staged})")
+        self._insert_sql = (f"INSERT OR REPLACE INTO {self.staging} (match_key, {staged}) "
+                            f"VALUES (?{', ?' * len(self.columns)})")
+        assignments = ', '.join(f'{c} = s.{c}' for c in self.columns)
+        differs = ' OR '.join(f'{table}.{c} IS NOT s.{c}' for c in self.columns)
+        self._update_sql = (f"UPDATE {table} SET {assignments} FROM {self.staging} AS s "
+                            f"WHERE {table}.{key} = s.match_key AND ({differs})")
+
+    def add(self, key, *values):
+        """Queue one row: key, then a value per column"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        self._pending.append((key, *values))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(*row)
+
+    def flush(self):
+        """Apply everything queued; returns the number of rows changed"""
+        if not self._pending:
+            return 0
+        rows, self._pending = self._pending, []
+        # Staging only touches the temp database
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {self.staging}")
+            self.conn.executemany(self._insert_sql, rows)
+
+        started = time.perf_counter()
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            changed = self.conn.execute(self._update_sql).rowcount
+        held = time.perf_counter() - started
+
+        self.stats['rows'] += len(rows)
+        self.stats['changed'] += changed
+        self.stats['chunks'] += 1
+        self.stats['lock_seconds'] += held
+        self.stats['max_lock'] = max(self.stats['max_lock'], held)
+        return changed
+
+    def close(self):
+        self.flush()
+        self.conn.execute(f"DROP TABLE IF EXISTS {self.staging}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def rows_per_second(self):
+        if self._started is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._started
+        return self.stats['rows'] / elapsed if elapsed else 0.0
+
+    def summary(self):
+        s = self.stats
+        return (f"Bulk writes: {s['rows']} rows ({s['changed']} changed) in {s['chunks']} chunks, "
+                f"write lock held {s['lock_seconds'] * 1000:.0f} ms total / {s['max_lock'] * 1000:.1f} ms max, "
+                f"{self.rows_per_second():.0f} rows/s")
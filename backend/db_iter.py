@@ -0,0 +1,43 @@
+"""Bounded-memory iteration over jobs.db tables.
+
+cursor.fetchall() on the jobs table holds every row (descriptions
+included) in memory at once. These helpers page through a table with
+keyset pagination instead: each query asks for the next CHUNK_SIZE rows
+after the last key seen (WHERE id > ? ORDER BY id LIMIT ?), which is an
+index range scan that costs the same on page 1 and page 1000, holds no
+read transaction between pages (so the Node scrapers can write), and is
+safe to interleave with UPDATEs on the same connection.
+"""
+CHUNK_SIZE = 1000
+
+
+def iter_chunks(conn, columns, table='jobs', where=None, params=(), key='id', chunk_size=CHUNK_SIZE):
+    """Lists of up to chunk_size (key, *columns) rows, in key order"""
+    cols = ', '.join([key] + list(columns))
+    sql = f"SELECT {cols} FROM {table} WHERE {key} > ?"
+    if where:
+        sql += f" AND ({where})"
+    sql += f" ORDER BY {key} LIMIT ?"
+    # Keys here are TEXT ids; '' sorts before all of them
+    last = ''
+    while True:
+        rows = conn.execute(sql, (last, *params, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def iter_rows(conn, columns, table='jobs', where=None, params=(), key='id', chunk_size=CHUNK_SIZE):
+    """Rows one at a time, fetched chunk_size at a time"""
+    for rows in iter_chunks(conn, columns, table, where, params, key, chunk_size):
+        yield from rows
+
+
+def count_rows(conn, table='jobs', where=None, params=()):
+    sql = f"SELECT COUNT(*) FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    return conn.execute(sql, params).fetchone()[0]
@@ -0,0 +1,223 @@
+"""Streaming HTML -> job description text.
+
+Feeds the page through html.parser in chunks instead of running regex
+passes over the whole document. Script/style/nav/cookie-banner subtrees
+are dropped as they stream past, known description containers (Workday's
+jobPostingDescription, schema.org JobPosting JSON-LD, common ATS ids) win
+over generic body text, and parsing stops as soon as a container has
+produced enough text.
+"""
+import json
+import re
+from html.parser import HTMLParser
+
+MAX_CHARS = 3000
+# A container shorter than this is probably a teaser, keep looking
+MIN_USEFUL_CHARS = 200
+# Without a container, give up looking for one after this much markup
+MAX_SCAN_CHARS = 1_000_000
+
+# Not form or header: ASP.NET/Taleo pages wrap the whole body in <form>, and
+# ATS pages put the job title in <header>; site banners carry role=banner.
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe',
+             'nav', 'footer', 'button', 'select', 'textarea'}
+SKIP_ROLES = {'navigation', 'banner', 'contentinfo', 'dialog', 'alertdialog'}
+SKIP_MARKERS = ('cookie', 'consent', 'gdpr', 'onetrust', 'skip-link', 'breadcrumb')
+NEVER_SKIP = {'html', 'body', 'main'}
+# Never get an end tag, so they can't open a skipped subtree
+VOID_TAGS = {'img', 'input', 'br', 'hr', 'meta', 'link', 'source', 'wbr', 'area', 'col', 'embed'}
+
+# (attribute, substring) pairs that mark a job description container
+DESCRIPTION_CONTAINERS = (
+    ('data-automation-id', 'jobpostingdescription'),    # Workday
+    ('itemprop', 'description'),
+    ('id', 'job-description'),
+    ('id', 'jobdescription'),
+    ('class', 'job-description'),
+    ('class', 'jobdescription'),
+    ('class', 'icims_jobcontent'),                      # iCIMS
+    ('class', 'position-job-description'),              # Eightfold
+    ('id', 'requisitiondescriptioninterface'),          # Oracle Taleo
+    ('class', 'job-details'),
+)
+
+BLOCK_TAGS = {'p', 'div', 'br', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'section',
+              'article', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dd', 'dt'}
+
+_WS = re.compile(r'\s+')
+
+
+def _normalize(parts):
+    return _WS.sub(' ', ''.join(parts)).strip()
+
+
+class JobTextExtractor(HTMLParser):
+    """Incremental extractor; feed() chunks until .done, then call result()"""
+
+    def __init__(self, max_chars=MAX_CHARS, max_scan_chars=MAX_SCAN_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.max_scan_chars = max_scan_chars
+        self.done = False
+        self.scanned = 0
+        self._skip_tag = None
+        self._skip_depth = 0
+        self._container_tag = None
+        self._container_depth = 0
+        self._container_parts = []
+        self._container_len = 0
+        self._body_parts = []
+        self._body_len = 0
+        self._ld_json = None
+        self._ld_description = ''
+        self._meta_description = ''
+
+    def feed(self, data):
+        if self.done:
+            return
+        self.scanned += len(data)
+        super().feed(data)
+        if (not self.done and self._body_len >= self.max_chars
+                and self.scanned >= self.max_scan_chars):
+            self.done = True
+
+    def _should_skip(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            return True
+        if tag in NEVER_SKIP or tag in VOID_TAGS:
+            return False
+        if attrs.get('role') in SKIP_ROLES or attrs.get('aria-hidden') == 'true':
+            return True
+        marker = (attrs.get('id', '') + ' ' + attrs.get('class', '')).lower()
+        return any(m in marker for m in SKIP_MARKERS)
+
+    def _is_container(self, attrs):
+        for attr, needle in DESCRIPTION_CONTAINERS:
+            value = attrs.get(attr)
+            if value and needle in value.lower():
+                return True
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = {k: v or '' for k, v in attrs}
+
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        if tag == 'script' and 'ld+json' in attrs.get('type', ''):
+            self._ld_json = []
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag == 'meta' and attrs.get('name', attrs.get('property', '')).lower() in (
+                'description', 'og:description'):
+            self._meta_description = self._meta_description or attrs.get('content', '')
+            return
+
+        if not self._container_tag and self._is_container(attrs):
+            # Checked before skipping so a container is never dropped
+            self._container_tag, self._container_depth = tag, 1
+            self._add(' ')
+            return
+
+        if self._should_skip(tag, attrs):
+            # Its end tag is consumed by the skip, so it doesn't count as container depth
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag == self._container_tag:
+            self._container_depth += 1
+
+        if tag in BLOCK_TAGS:
+            self._add(' ')
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+                    if self._ld_json is not None:
+                        self._parse_ld_json(''.join(self._ld_json))
+                        self._ld_json = None
+            return
+
+        if tag in BLOCK_TAGS:
+            self._add(' ')
+
+        if self._container_tag and tag == self._container_tag:
+            self._container_depth -= 1
+            if self._container_depth == 0:
+                self._container_tag = None
+                if self._container_len >= MIN_USEFUL_CHARS:
+                    self.done = True
+                else:
+                    self._container_parts = []
+                    self._container_len = 0
+
+    def handle_data(self, data):
+        if self.done:
+            return
+        if self._skip_tag:
+            if self._ld_json is not None:
+                self._ld_json.append(data)
+            return
+        self._add(data)
+
+    def _add(self, text):
+        if self._container_tag:
+            self._container_parts.append(text)
+            self._container_len += len(text)
+            if self._container_len >= self.max_chars * 2:
+                # Raw length, whitespace not collapsed yet; plenty either way
+                self.done = True
+        if self._body_len < self.max_chars * 2:
+            self._body_parts.append(text)
+            self._body_len += len(text)
+
+    def _parse_ld_json(self, raw):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(data, dict):
+            data = data.get('@graph', [data])
+        if not isinstance(data, list):
+            return
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            types = item.get('@type')
+            if 'JobPosting' in (types if isinstance(types, list) else [types]):
+                description = extract_text(item.get('description') or '', self.max_chars)
+                if len(description) >= MIN_USEFUL_CHARS:
+                    self._ld_description = description
+                    self.done = True
+                return
+
+    def result(self):
+        """Best text found so far, capped at max_chars"""
+        for text in (self._ld_description,
+                     _normalize(self._container_parts),
+                     _normalize(self._body_parts)):
+            if len(text) >= MIN_USEFUL_CHARS:
+                return text[:self.max_chars]
+        text = _normalize(self._body_parts)
+        if self._meta_description and len(self._meta_description) > len(text):
+            text = _normalize([self._meta_description])
+        return text[:self.max_chars]
+
+
+def extract_text(html, max_chars=MAX_CHARS):
+    """Extract description text from an HTML string or an iterable of chunks"""
+    extractor = JobTextExtractor(max_chars)
+    chunks = [html] if isinstance(html, str) else html
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    return extractor.result()
@@ -1,154 +1,451 @@
-import sqlite3
+import argparse
+import json
+import os
+import sys
+import threading
 import time
-import requests
-import re
-from datetime import datetime
+
+# Shared backend modules (http_cache, http_client, ...) live one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import HttpCache
+from http_client import CHUNK_SIZE, MAX_BODY_BYTES, get_client
+from html_extract import JobTextExtractor, extract_text
+from job_store import JobStore
+from job_vectors import ensure_job_vectors, update_job_vectors
+from keyword_classifier import classify, lead_summary
+from llm_cache import LLMCache, prompt_version
+from near_dupes import NearDupIndex
+from ollama_client import ANALYSIS_SCHEMA, OllamaClient, extract_json_object, select_fields, validate
+from pipeline import EnrichmentPipeline
+from search_index import ensure_search_index
+from seen_urls import ensure_url_keys, update_url_keys
+from skills_index import ensure_skills_index, index_skills
+from windowing import TOKEN_BUDGET, WINDOWING_VERSION, estimate_tokens, select_windows
+from workday import fetch_workday_job, is_workday_job_url
 
 DB_PATH = 'jobs.db'
 OLLAMA_URL = 'http://localhost:11434/api/generate'
 MODEL = 'llama3.2'
 SLEEP_BETWEEN_JOBS = 3
+# Scraped text kept per job; the prompt only gets relevance windows of it
+DESCRIPTION_CHARS = 12000
+PROMPT_TOKENS = int(os.environ.get('ENRICH_PROMPT_TOKENS', TOKEN_BUDGET))
+# Revalidate previously fetched pages instead of downloading them again
+HTTP_CACHE_ENABLED = os.environ.get('ENRICH_HTTP_CACHE', '1') != '0'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+# Reuse analyses of identical description text (keyed by MODEL + prompt)
+LLM_CACHE_ENABLED = os.environ.get('ENRICH_LLM_CACHE', '1') != '0'
+# Copy the analysis of an already analysed repost (same company, near-identical text)
+NEAR_DUPES_ENABLED = os.environ.get('ENRICH_NEAR_DUPES', '1') != '0'
+# Decide the citizenship/visa flags from keywords and skip the LLM when possible
+KEYWORD_PRECLASSIFY = os.environ.get('ENRICH_KEYWORDS', '1') != '0'
+# Point Workday JSON calls at another host (e.g. a local stand-in server)
+WORKDAY_API_BASE = os.environ.get('WORKDAY_API_BASE')
+
+# Pipeline mode stage sizes (override with CLI flags)
+FETCH_CONCURRENCY = int(os.environ.get('ENRICH_FETCH_CONCURRENCY', 8))
+LLM_WORKERS = int(os.environ.get('ENRICH_LLM_WORKERS', os.environ.get('OLLAMA_NUM_PARALLEL', 1)))
+QUEUE_SIZE = int(os.environ.get('ENRICH_QUEUE_SIZE', 16))
+
+# Lease claims so several enrichers can share one jobs.db
+WORKER_ID = os.environ.get('ENRICH_WORKER_ID')
+LEASE_SECONDS = int(os.environ.get('ENRICH_LEASE_SECONDS', 600))
+
+# Enrichment results are committed in batches of N jobs or every T seconds
+FLUSH_EVERY = int(os.environ.get('ENRICH_FLUSH_EVERY', 20))
+FLUSH_INTERVAL = float(os.environ.get('ENRICH_FLUSH_INTERVAL', 5))
+
+# Create the jobs_fts full-text index (its triggers then keep it current)
+SEARCH_INDEX_ENABLED = os.environ.get('ENRICH_SEARCH_INDEX', '1') != '0'
+# Fold new/changed skills into the skills index, up to N jobs per pass
+SKILLS_INDEX_ENABLED = os.environ.get('ENRICH_SKILLS_INDEX', '1') != '0'
+SKILLS_INDEX_BATCH = int(os.environ.get('ENRICH_SKILLS_INDEX_BATCH', 500))
+# Re-vectorize new/changed jobs for resume matching (job_matcher), up to N per pass
+MATCH_VECTORS_ENABLED = os.environ.get('ENRICH_MATCH_VECTORS', '1') != '0'
+MATCH_VECTORS_BATCH = int(os.environ.get('ENRICH_MATCH_VECTORS_BATCH', 500))
+# Those passes run after a results flush, at most once per N seconds (and on close)
+INDEX_INTERVAL = float(os.environ.get('ENRICH_INDEX_INTERVAL', 60))
+# Key new jobs' URLs (seen_urls); merging rows that share a key is left to its CLI
+URL_KEYS_ENABLED = os.environ.get('ENRICH_URL_KEYS', '1') != '0'
+URL_KEYS_BATCH = int(os.environ.get('ENRICH_URL_KEYS_BATCH', 2000))
+
+_store = None
+
+def get_store():
+    """Shared long-lived connection (opened on first use)"""
+    global _store
+    if _store is None:
+        _store = JobStore(DB_PATH, worker_id=WORKER_ID, lease_seconds=LEASE_SECONDS,
+                          flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL)
+        if SEARCH_INDEX_ENABLED:
+            indexed = ensure_search_index(_store.conn)
+            if indexed:
+                print(f"🔎 Built search index for {indexed} jobs")
+        if SKILLS_INDEX_ENABLED:
+            ensure_skills_index(_store.conn)
+        if MATCH_VECTORS_ENABLED:
+            ensure_job_vectors(_store.conn)
+        if URL_KEYS_ENABLED:
+            ensure_url_keys(_store.conn)
+        _store.after_flush = lambda count: update_indexes()
+    return _store
+
+_last_indexed = 0.0
+
+def update_indexes(force=False):
+    """Fold flushed results into the skills index and match vectors (throttled)"""
+    global _last_indexed
+    if not force and time.monotonic() - _last_indexed < INDEX_INTERVAL:
+        return
+    _last_indexed = time.monotonic()
+    if SKILLS_INDEX_ENABLED:
+        index_skills(_store.conn, limit=SKILLS_INDEX_BATCH)
+    if MATCH_VECTORS_ENABLED:
+        update_job_vectors(_store.conn, limit=MATCH_VECTORS_BATCH)
+
+def close_store():
+    """Flush buffered results, release unfinished claims and close"""
+    global _store
+    if _store is not None:
+        _store.after_flush = None
+        _store.flush()
+        update_indexes(force=True)
+        _store.close()
+        _store = None
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """Shared response cache, or None when disabled"""
+    global _http_cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache(session=get_client())
+        return _http_cache
+
+def close_http_cache():
+    global _http_cache
+    if _http_cache is not None:
+        print(f"🗄️  {_http_cache.summary()}")
+        _http_cache.close()
+        _http_cache = None
+    for line in get_client().summary():
+        print(f"🌐 {line}")
+    if _ollama is not None and _ollama.stats['calls']:
+        print(f"🧠 {_ollama.summary()}")
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """Shared analysis cache, or None when disabled"""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(MODEL, PROMPT_VERSION)
+            if _llm_cache.purged:
+                print(f"♻️  Dropped {_llm_cache.purged} cached analyses from an older model/prompt")
+        return _llm_cache
+
+def close_llm_cache():
+    global _llm_cache
+    if _llm_cache is not None:
+        print(f"🧠 {_llm_cache.summary()}")
+        _llm_cache.close()
+        _llm_cache = None
 
-def get_pending_jobs():
-    """Get jobs that need enrichment"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, title, company, url, source 
-        FROM jobs 
-        WHERE status = 'new' 
-        LIMIT 10
-    """)
-    jobs = cursor.fetchall()
-    conn.close()
-    return jobs
+_near_dupes = None
+_near_dupes_lock = threading.Lock()
+
+def get_near_dupes():
+    """Shared near-duplicate index, or None when disabled"""
+    global _near_dupes
+    if not NEAR_DUPES_ENABLED:
+        return None
+    with _near_dupes_lock:
+        if _near_dupes is None:
+            _near_dupes = NearDupIndex(MODEL, PROMPT_VERSION)
+            if _near_dupes.purged:
+                print(f"♻️  Dropped {_near_dupes.purged} indexed postings from an older model/prompt")
+        return _near_dupes
+
+def close_near_dupes():
+    global _near_dupes
+    if _near_dupes is not None:
+        print(f"👯 {_near_dupes.summary()}")
+        _near_dupes.close()
+        _near_dupes = None
+
+_ollama = None
+
+def get_ollama():
+    """Shared Ollama client (keep-alive session, latency/token counters)"""
+    global _ollama
+    if _ollama is None:
+        _ollama = OllamaClient(MODEL, OLLAMA_URL, session=get_client())
+    return _ollama
+
+def get_pending_jobs(limit=10):
+    """Claim jobs that need enrichment (leased to this worker)"""
+    store = get_store()
+    if URL_KEYS_ENABLED:
+        update_url_keys(store.conn, limit=URL_KEYS_BATCH)
+    return store.claim_jobs(limit)
 
 def scrape_job_description(url):
     """Scrape job description from URL"""
     try:
-        response = requests.get(url, timeout=15, headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
-        if response.status_code != 200:
-            print(f"   ❌ HTTP {response.status_code} for {url}")
-            return None
-        text = response.text
-        
-        # Extract text content (simple approach)
-        text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Limit to first 3000 chars to avoid huge context
-        return text[:3000]
+        cache = get_http_cache()
+        if cache:
+            # Cached pages are revalidated, so the full body is kept for storage
+            response = cache.get(url, headers=HEADERS, timeout=15)
+            if response.status_code != 200:
+                print(f"   ❌ HTTP {response.status_code} for {url}")
+                return None
+            return extract_text(response.text, DESCRIPTION_CHARS)
+
+        with get_client().get(url, timeout=15, stream=True, headers=HEADERS) as response:
+            if response.status_code != 200:
+                print(f"   ❌ HTTP {response.status_code} for {url}")
+                return None
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+
+            # Parse as it downloads and stop once the description is found
+            # (or the page runs past the body cap)
+            extractor = JobTextExtractor(max_chars=DESCRIPTION_CHARS)
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True):
+                extractor.feed(chunk)
+                if extractor.done or extractor.scanned > MAX_BODY_BYTES:
+                    break
+            return extractor.result()
     except Exception as e:
         print(f"   ❌ Scrape error: {e}")
         return None
 
-def analyze_with_ollama(title, company, description):
+def fetch_job_details(url):
+    """Fetch a job page: Workday JSON API when possible, else scraped HTML
+
+    Returns a dict with at least 'description', or None.
+    """
+    if is_workday_job_url(url):
+        details = fetch_workday_job(url, api_base=WORKDAY_API_BASE, session=get_http_cache() or get_client(),
+                                    max_chars=DESCRIPTION_CHARS)
+        if details:
+            return details
+        print(f"   ↩️  Falling back to HTML for {url}")
+
+    description = scrape_job_description(url)
+    if not description:
+        return None
+    return {'description': description, 'source': 'html'}
+
+# field -> (question, JSON example value); order is the prompt order
+ANALYSIS_FIELDS = {
+    'is_real_job': ('Is this actually a job posting? (true/false)', 'true/false'),
+    'requires_citizenship': ('Does it require US citizenship or green card? Look for: "USC", "US Citizen", '
+                             '"Green Card", "GC", "security clearance", "must be authorized to work"', 'true/false'),
+    'no_visa_sponsorship': ('Does it mention "no visa sponsorship" or similar?', 'true/false'),
+    'location': ('Location (city, state/province, country)', '"City, State, Country"'),
+    'summary': ('Brief summary (20 words max)', '"brief summary"'),
+}
+
+def analysis_prompt(fields):
+    """Prompt template asking only for the given fields"""
+    questions = '\n'.join(f"{i}. {ANALYSIS_FIELDS[f][0]}" for i, f in enumerate(fields, 1))
+    example = ',\n'.join(f'  "{f}": {ANALYSIS_FIELDS[f][1]}' for f in fields)
+    return ("Analyze this job posting and extract key information.\n\n"
+            "Job Title: {title}\nCompany: {company}\nDescription: {description}\n\n"
+            f"Answer these questions in JSON format:\n{questions}\n\n"
+            f"Respond ONLY with valid JSON:\n{{{{\n{example}\n}}}}")
+
+ANALYSIS_PROMPT = analysis_prompt(list(ANALYSIS_FIELDS))
+
+def analysis_version(prompt_tokens):
+    """Cache version of the template plus the windowing that picks the description it gets"""
+    return prompt_version(f"{ANALYSIS_PROMPT}\nwindows:{WINDOWING_VERSION}:{prompt_tokens}")
+
+# Cached analyses are invalidated whenever the template, the prompt's
+# description windows (ENRICH_PROMPT_TOKENS) or MODEL change
+PROMPT_VERSION = analysis_version(PROMPT_TOKENS)
+
+def merge_details(analysis, details):
+    """Fill analysis with structured fields from the fetch (Workday API)"""
+    structured = {k: details.get(k) for k in ('location', 'posted_date', 'job_type') if details.get(k)}
+    if not structured:
+        return analysis
+    if not analysis:
+        return structured
+    if not analysis.get('location') or analysis.get('location') == 'Unknown':
+        analysis['location'] = structured.get('location', analysis.get('location'))
+    for key in ('posted_date', 'job_type'):
+        if structured.get(key):
+            analysis[key] = structured[key]
+    return analysis
+
+def analyze_with_ollama(title, company, description, fields=None):
     """Use Ollama to analyze job for visa requirements"""
     
-    prompt = f"""Analyze this job posting and extract key information.
-
-Job Title: {title}
-Company: {company}
-Description: {description}
-
-Answer these questions in JSON format:
-1. Is this actually a job posting? (true/false)
-2. Does it require US citizenship or green card? Look for: "USC", "US Citizen", "Green Card", "GC", "security clearance", "must be authorized to work"
-3. Does it mention "no visa sponsorship" or similar?
-4. Location (city, state/province, country)
-5. Brief summary (20 words max)
-
-Respond ONLY with valid JSON:
-{{
-  "is_real_job": true/false,
-  "requires_citizenship": true/false,
-  "no_visa_sponsorship": true/false,
-  "location": "City, State, Country",
-  "summary": "brief summary"
-}}"""
+    if fields:
+        prompt = analysis_prompt(fields).format(title=title, company=company, description=description)
+        schema = select_fields(ANALYSIS_SCHEMA, fields)
+    else:
+        prompt = ANALYSIS_PROMPT.format(title=title, company=company, description=description)
+        schema = ANALYSIS_SCHEMA
 
-    try:
-        response = requests.post(OLLAMA_URL, json={
-            'model': MODEL,
-            'prompt': prompt,
-            'stream': False,
-            'temperature': 0.1
-        }, timeout=60)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get('response', '')
-        else:
-            print(f"   ❌ Ollama error: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"   ❌ Ollama request error: {e}")
-        return None
+    # Schema-constrained, token-capped, stops reading at the closing brace
+    return get_ollama().generate_json(prompt, schema)
 
-def parse_analysis(analysis_text):
+def parse_analysis(analysis_text, fields=None):
     """Parse Ollama response to extract structured data"""
     try:
-        # Try to extract JSON from response
-        import json
-        
-        # Find JSON block
-        match = re.search(r'\{[^}]+\}', analysis_text, re.DOTALL)
-        if match:
-            data = json.loads(match.group(0))
-            return data
-        else:
+        # Find the first complete JSON object (nested values allowed)
+        block = extract_json_object(analysis_text)
+        if not block:
             print(f"   ⚠️  No JSON found in response")
             return None
+        schema = select_fields(ANALYSIS_SCHEMA, fields) if fields else ANALYSIS_SCHEMA
+        return validate(json.loads(block), schema)
     except Exception as e:
         print(f"   ⚠️  Parse error: {e}")
         return None
 
-def update_job(job_id, analysis, description=None):
-    """Update job with enrichment data"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+_analysis_stats = {'skipped': 0, 'trimmed': 0, 'full': 0, 'description_tokens': 0, 'prompt_tokens': 0}
+_analysis_lock = threading.Lock()
+
+def preclassify(description, details=None):
+    """Fields that can be filled without the LLM (keyword flags, Workday data)"""
+    if not KEYWORD_PRECLASSIFY:
+        return {}
+    flags = classify(description)
+    known = {k: flags[k] for k in ('requires_citizenship', 'no_visa_sponsorship') if flags[k] is not None}
+    if len(known) == 2 and details and details.get('source') == 'workday-api' and details.get('location'):
+        # A structured ATS posting is a real job with its own location, which
+        # leaves only the summary; the lead sentence is good enough for that
+        known.update(is_real_job=True, location=details['location'], summary=lead_summary(description))
+    return known
+
+def analyze_job(title, company, description, details=None):
+    """Cached analysis, keyword fast path, else Ollama + parse (and cache it)
+
+    Returns (analysis or None, from_cache).
+    """
+    cache = get_llm_cache()
+    if cache:
+        cached = cache.get(description)
+        if cached is not None:
+            return cached, True
+
+    known = preclassify(description, details)
+    fields = [f for f in ANALYSIS_FIELDS if f not in known]
+    with _analysis_lock:
+        _analysis_stats['skipped' if not fields else 'trimmed' if known else 'full'] += 1
+    if not fields:
+        return known, False
+
+    # Keywords above saw the whole text; the LLM only gets the relevant parts
+    window = select_windows(description, PROMPT_TOKENS)
+    with _analysis_lock:
+        _analysis_stats['description_tokens'] += estimate_tokens(description)
+        _analysis_stats['prompt_tokens'] += estimate_tokens(window)
+
+    started = time.monotonic()
+    analysis_text = analyze_with_ollama(title, company, window, fields if known else None)
+    if not analysis_text:
+        print(f"   ⚠️  Ollama analysis failed")
+        return None, False
+    analysis = parse_analysis(analysis_text, fields)
     if analysis:
-        # Always mark as enriched; let user decide validity
-        status = 'enriched'
-        
-        cursor.execute("""
-            UPDATE jobs 
-            SET status = ?,
-                location = ?,
-                description = ?,
-                summary = ?,
-                requires_citizenship = ?,
-                no_visa_sponsorship = ?,
-                enriched_at = ?
-            WHERE id = ?
-        """, (
-            status,
-            analysis.get('location', 'Unknown'),
-            description,  # full scraped text
-            analysis.get('summary', ''),  # AI summary
-            1 if analysis.get('requires_citizenship') else 0,
-            1 if analysis.get('no_visa_sponsorship') else 0,
-            datetime.now().isoformat(),
-            job_id
-        ))
+        analysis.update(known)
+        if cache:
+            cache.put(description, analysis, time.monotonic() - started)
+    return analysis, False
+
+def analysis_summary():
+    s = _analysis_stats
+    saved = 1 - s['prompt_tokens'] / s['description_tokens'] if s['description_tokens'] else 0
+    return (f"Keywords: LLM skipped for {s['skipped']} jobs, trimmed for {s['trimmed']}, "
+            f"full prompt for {s['full']}; windows cut description tokens by {saved:.0%}")
+
+def analyze_posting(job, details):
+    """Reuse a near-duplicate's analysis, else analyze_job (and index the result)
+
+    Returns (analysis merged with details, canonical job id or None, from_cache).
+    """
+    job_id, title, company = job[0], job[1], job[2]
+    description = details['description']
+    dupes = get_near_dupes()
+    if dupes:
+        found = dupes.match(job_id, company, title, description)
+        if found:
+            canonical_id, shared, _ = found
+            analysis = merge_details(shared, details)
+            # No location of its own: keep the one the job was scraped with
+            analysis.setdefault('location', None)
+            return analysis, canonical_id, False
+
+    started = time.monotonic()
+    analysis, from_cache = analyze_job(title, company, description, details)
+    if dupes and analysis:
+        dupes.add(job_id, company, title, description, analysis, time.monotonic() - started)
+    analysis = merge_details(analysis, details)
+    if from_cache and analysis:
+        # Cache hits carry no location: keep the one the job was scraped with
+        analysis.setdefault('location', None)
+    return analysis, None, from_cache
+
+def update_job(job_id, analysis, description=None, duplicate_of=None):
+    """Update job with enrichment data (buffered, written in batches)"""
+    # Always mark as enriched; let user decide validity
+    get_store().update_job(job_id, analysis, description, duplicate_of)
+
+def fetch_stage(job):
+    """Pipeline fetch stage: job row -> fetched details"""
+    return fetch_job_details(job[3])
+
+def analyze_stage(job, details):
+    """Pipeline LLM stage: job row + details -> parsed analysis"""
+    analysis, details['duplicate_of'], _ = analyze_posting(job, details)
+    return analysis
+
+def write_stage(job_id, analysis, details):
+    """Pipeline writer stage"""
+    if details:
+        update_job(job_id, analysis, details['description'], details.get('duplicate_of'))
     else:
-        # Mark as enriched but with no data
-        cursor.execute("""
-            UPDATE jobs 
-            SET status = 'enriched',
-                enriched_at = ?
-            WHERE id = ?
-        """, (datetime.now().isoformat(), job_id))
-    
-    conn.commit()
-    conn.close()
+        update_job(job_id, analysis)
 
-def main():
+def run_pipeline(fetch_concurrency, llm_workers, queue_size, once=False):
+    """Enrich pending jobs with concurrent fetch / LLM / DB writer stages"""
+    print("🧠 Job Enricher with Ollama Started (pipeline)")
+    print(f"📊 Model: {MODEL}")
+    print(f"⚙️  Fetch: {fetch_concurrency} | LLM workers: {llm_workers} | Queue: {queue_size}")
+    print(f"🪪 Worker: {get_store().worker_id}\n")
+
+    pipeline = EnrichmentPipeline(
+        fetch_stage, analyze_stage, write_stage,
+        fetch_concurrency=fetch_concurrency,
+        llm_workers=llm_workers,
+        queue_size=queue_size,
+    )
+    stats = pipeline.run(get_pending_jobs, once=once)
+
+    elapsed = stats['elapsed']
+    rate = stats['written'] / elapsed if elapsed else 0
+    print(f"\n✅ Done: {stats['written']} jobs in {elapsed:.1f}s ({rate:.2f} jobs/s)")
+    print(f"   Fetch failed: {stats['fetch_failed']} | Analysis failed: {stats['analysis_failed']}")
+    return stats
+
+def run_sequential(once=False):
+    """Enrich one job at a time (easier to follow when debugging)"""
     print("🧠 Job Enricher with Ollama Started")
     print(f"📊 Model: {MODEL}")
     print(f"⏱️  Sleep: {SLEEP_BETWEEN_JOBS}s between jobs\n")
@@ -157,6 +454,8 @@ def main():
         jobs = get_pending_jobs()
         
         if not jobs:
+            if once:
+                return
             print("😴 No pending jobs, waiting 30s...")
             time.sleep(30)
             continue
@@ -170,39 +469,67 @@ def main():
             print(f"   🏢 {company} ({source})")
             
             # Scrape job description
-            description = scrape_job_description(url)
+            details = fetch_job_details(url)
             
-            if not description:
+            if not details:
                 print(f"   ⚠️  Could not fetch description")
                 update_job(job_id, None)
                 continue
             
-            print(f"   📄 Scraped {len(description)} chars")
+            description = details['description']
+            print(f"   📄 Scraped {len(description)} chars ({details['source']})")
             
             # Analyze with Ollama
             print(f"   🧠 Analyzing with Ollama...")
-            analysis_text = analyze_with_ollama(title, company, description)
+            analysis, duplicate_of, from_cache = analyze_posting(job, details)
+            if from_cache:
+                print(f"   ♻️  Reused cached analysis")
+            elif duplicate_of:
+                print(f"   👯 Repost of {duplicate_of}, reused its analysis")
             
-            if analysis_text:
-                analysis = parse_analysis(analysis_text)
-                
-                if analysis:
-                    print(f"   ✅ Real job: {analysis.get('is_real_job')}")
-                    print(f"   🌍 Location: {analysis.get('location')}")
-                    print(f"   🛂 Citizenship req: {analysis.get('requires_citizenship')}")
-                    print(f"   ✈️  No visa: {analysis.get('no_visa_sponsorship')}")
-                    update_job(job_id, analysis, description)
-                else:
-                    print(f"   ⚠️  Could not parse analysis")
-                    update_job(job_id, None, description)
+            if analysis:
+                print(f"   ✅ Real job: {analysis.get('is_real_job')}")
+                print(f"   🌍 Location: {analysis.get('location')}")
+                print(f"   🛂 Citizenship req: {analysis.get('requires_citizenship')}")
+                print(f"   ✈️  No visa: {analysis.get('no_visa_sponsorship')}")
             else:
-                print(f"   ⚠️  Ollama analysis failed")
-                update_job(job_id, None, description)
+                print(f"   ⚠️  Could not parse analysis")
+            update_job(job_id, analysis, description, duplicate_of)
             
             print()
             time.sleep(SLEEP_BETWEEN_JOBS)
         
         print("✅ Batch complete\n")
 
+def main():
+    global WORKER_ID
+    parser = argparse.ArgumentParser(description='Enrich new jobs with scraped descriptions and Ollama analysis')
+    parser.add_argument('--sequential', action='store_true',
+                        help='process one job at a time instead of the concurrent pipeline')
+    parser.add_argument('--fetch-concurrency', type=int, default=FETCH_CONCURRENCY,
+                        help='in-flight page downloads (env ENRICH_FETCH_CONCURRENCY)')
+    parser.add_argument('--llm-workers', type=int, default=LLM_WORKERS,
+                        help='parallel Ollama requests (env ENRICH_LLM_WORKERS / OLLAMA_NUM_PARALLEL)')
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help='capacity of each inter-stage queue (env ENRICH_QUEUE_SIZE)')
+    parser.add_argument('--worker-id', default=WORKER_ID,
+                        help='lease owner name (env ENRICH_WORKER_ID, default host:pid)')
+    parser.add_argument('--once', action='store_true',
+                        help='exit once the current backlog is drained')
+    args = parser.parse_args()
+    WORKER_ID = args.worker_id
+
+    try:
+        if args.sequential:
+            run_sequential(once=args.once)
+        else:
+            run_pipeline(args.fetch_concurrency, args.llm_workers, args.queue_size, once=args.once)
+    finally:
+        close_store()
+        close_http_cache()
+        close_llm_cache()
+        close_near_dupes()
+        print(f"🔑 {analysis_summary()}")
+
 if __name__ == '__main__':
     main()
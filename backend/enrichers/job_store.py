@@ -0,0 +1,248 @@
+"""Long-lived jobs.db connection with leased job claims and batched writes.
+
+The Node scrapers write to the same file, so every transaction we hold is
+time they spend waiting. Instead of open/commit/close per job, results are
+buffered and flushed with executemany in one short transaction every
+FLUSH_EVERY jobs or FLUSH_INTERVAL seconds, whichever comes first.
+
+Jobs are claimed atomically (status 'new' -> 'processing' with our worker
+id and a lease expiry) so several enrichers can share one DB without
+sending the same job to the LLM twice. Leases left behind by crashed
+workers are put back to 'new' once they expire.
+"""
+import os
+import socket
+import sqlite3
+import time
+from datetime import datetime
+
+FLUSH_EVERY = 20
+FLUSH_INTERVAL = 5.0
+BUSY_TIMEOUT_MS = 10000
+LEASE_SECONDS = 600
+
+LEASE_COLUMNS = {
+    'worker_id': 'TEXT',
+    'lease_expires_at': 'REAL',
+}
+
+# Canonical job whose analysis a near-duplicate repost reused (see near_dupes)
+DUPLICATE_COLUMN = 'duplicate_of'
+
+CLAIM_SQL = """
+    UPDATE jobs
+    SET status = 'processing',
+        worker_id = ?,
+        lease_expires_at = ?
+    WHERE id IN (
+        SELECT id FROM jobs
+        WHERE status = 'new'
+        LIMIT ?
+    )
+    RETURNING id, title, company, url, source
+"""
+
+RECLAIM_SQL = """
+    UPDATE jobs
+    SET status = 'new',
+        worker_id = NULL,
+        lease_expires_at = NULL
+    WHERE status = 'processing' AND lease_expires_at < ?
+"""
+
+# Results only land if we still hold the lease; a job whose lease expired
+# and was claimed elsewhere is written by the new holder instead.
+UPDATE_ENRICHED_SQL = """
+    UPDATE jobs
+    SET status = 'enriched',
+        location = COALESCE(?, location),
+        description = ?,
+        summary = ?,
+        requires_citizenship = ?,
+        no_visa_sponsorship = ?,
+        posted_date = COALESCE(?, posted_date),
+        job_type = COALESCE(?, job_type),
+        duplicate_of = ?,
+        enriched_at = ?,
+        worker_id = NULL,
+        lease_expires_at = NULL
+    WHERE id = ? AND worker_id = ?
+"""
+
+UPDATE_EMPTY_SQL = """
+    UPDATE jobs
+    SET status = 'enriched',
+        enriched_at = ?,
+        worker_id = NULL,
+        lease_expires_at = NULL
+    WHERE id = ? AND worker_id = ?
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def connect(db_path, busy_timeout_ms=BUSY_TIMEOUT_MS):
+    """Open jobs.db in WAL mode with a busy timeout so writers queue instead of failing"""
+    conn = sqlite3.connect(db_path, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def ensure_lease_columns(conn):
+    """Add the lease columns and index if this DB predates them"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    with conn:
+        for name, sql_type in LEASE_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} {sql_type}')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs(status, lease_expires_at)')
+
+
+def ensure_duplicate_column(conn):
+    """Add jobs.duplicate_of and its index if this DB predates them"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    with conn:
+        if DUPLICATE_COLUMN not in existing:
+            conn.execute(f'ALTER TABLE jobs ADD COLUMN {DUPLICATE_COLUMN} TEXT')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_jobs_duplicate_of ON jobs({DUPLICATE_COLUMN})')
+
+
+class JobStore:
+    """Leased job claims and buffered enrichment writes over one connection
+
+    Not thread-safe: callers must serialize access (the pipeline runs all
+    DB work on a single thread).
+    """
+
+    def __init__(self, db_path, worker_id=None, lease_seconds=LEASE_SECONDS,
+                 flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.conn = connect(db_path)
+        ensure_lease_columns(self.conn)
+        ensure_duplicate_column(self.conn)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self._enriched = []
+        self._empty = []
+        self._buffered_ids = set()
+        self._last_flush = time.monotonic()
+        self._last_heartbeat = time.monotonic()
+        self.rows_written = 0
+        self.reclaimed = 0
+        # Called with the write count after each flush that wrote results
+        self.after_flush = None
+        self.lost = 0
+
+    def claim_jobs(self, limit=10):
+        """Atomically lease up to limit 'new' jobs to this worker"""
+        self.maybe_flush()
+        now = time.time()
+        with self.conn:
+            self.reclaimed += self.conn.execute(RECLAIM_SQL, (now,)).rowcount
+            jobs = self.conn.execute(
+                CLAIM_SQL, (self.worker_id, now + self.lease_seconds, limit)
+            ).fetchall()
+        if not jobs:
+            # Nothing left to hand out, so don't sit on finished results
+            self.flush()
+        return jobs
+
+    def reclaim_expired(self):
+        """Put jobs whose lease ran out (crashed worker) back to 'new'"""
+        with self.conn:
+            count = self.conn.execute(RECLAIM_SQL, (time.time(),)).rowcount
+        self.reclaimed += count
+        return count
+
+    def heartbeat(self):
+        """Extend the lease on every job this worker still holds"""
+        self._last_heartbeat = time.monotonic()
+        with self.conn:
+            return self.conn.execute("""
+                UPDATE jobs
+                SET lease_expires_at = ?
+                WHERE status = 'processing' AND worker_id = ?
+            """, (time.time() + self.lease_seconds, self.worker_id)).rowcount
+
+    def maybe_heartbeat(self):
+        if time.monotonic() - self._last_heartbeat >= self.lease_seconds / 3:
+            self.heartbeat()
+
+    def release(self):
+        """Hand unfinished claims back so another worker can pick them up"""
+        with self.conn:
+            return self.conn.execute("""
+                UPDATE jobs
+                SET status = 'new',
+                    worker_id = NULL,
+                    lease_expires_at = NULL
+                WHERE status = 'processing' AND worker_id = ?
+            """, (self.worker_id,)).rowcount
+
+    def update_job(self, job_id, analysis, description=None, duplicate_of=None):
+        """Buffer an enrichment result; flushed in batches
+
+        A near-duplicate's analysis has no location of its own (None keeps
+        the scraped one) and records the job it was copied from.
+        """
+        enriched_at = datetime.now().isoformat()
+        if analysis:
+            self._enriched.append((
+                analysis.get('location', 'Unknown'),
+                description,
+                analysis.get('summary', ''),
+                1 if analysis.get('requires_citizenship') else 0,
+                1 if analysis.get('no_visa_sponsorship') else 0,
+                analysis.get('posted_date'),
+                analysis.get('job_type'),
+                duplicate_of,
+                enriched_at,
+                job_id,
+                self.worker_id,
+            ))
+        else:
+            self._empty.append((enriched_at, job_id, self.worker_id))
+        self._buffered_ids.add(job_id)
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        self.maybe_heartbeat()
+        if not self._buffered_ids:
+            return
+        if (len(self._buffered_ids) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write all buffered results in a single transaction"""
+        self._last_flush = time.monotonic()
+        if not self._buffered_ids:
+            return 0
+        written = 0
+        with self.conn:
+            if self._enriched:
+                written += self.conn.executemany(UPDATE_ENRICHED_SQL, self._enriched).rowcount
+            if self._empty:
+                written += self.conn.executemany(UPDATE_EMPTY_SQL, self._empty).rowcount
+        count = len(self._buffered_ids)
+        if written < count:
+            # Lease lost (reclaimed elsewhere) or the row was deleted/merged meanwhile
+            self.lost += count - written
+            print(f"   ⚠️  {count - written} of {count} results matched no job leased to this worker; discarded")
+        self.rows_written += count
+        self._enriched = []
+        self._empty = []
+        self._buffered_ids = set()
+        if self.after_flush:
+            self.after_flush(count)
+        return count
+
+    def close(self):
+        self.flush()
+        self.release()
+        self.conn.close()
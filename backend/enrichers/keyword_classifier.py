@@ -0,0 +1,221 @@
+"""Keyword pre-classifier for the citizenship / visa sponsorship flags.
+
+The LLM prompt only asks the model to spot a handful of literal phrases
+("US Citizen", "Green Card", "security clearance", "no visa sponsorship"),
+which costs seconds of inference per job. All of those phrases are matched
+here in one pass with an Aho-Corasick automaton over normalized text
+(lowercase, punctuation and whitespace runs folded to one space, so
+"U.S. Citizen", "green-card" and "TS/SCI" all match).
+
+Each flag is decided only when the evidence is unambiguous:
+
+  * a strong phrase sets it (e.g. "will not sponsor" -> no_visa_sponsorship)
+  * no strong phrase and no related cue word at all ("visa", "citizen",
+    "clearance", ...) clears it
+  * anything else (a bare cue, or phrases pointing both ways) is left as
+    None for the LLM to decide
+
+A strong phrase in a sentence that also holds a negation outside the
+phrase itself ("US citizenship is not required", "you do not need a
+green card; we will sponsor") only counts as a cue, so the LLM decides.
+"""
+import re
+from collections import deque
+
+# (label, phrases); labels starting with 'cue:' only make a flag ambiguous
+PATTERNS = {
+    'citizenship': (
+        'us citizen', 'us citizens', 'us citizenship', 'u s citizen', 'u s citizens',
+        'u s citizenship', 'united states citizen', 'united states citizens',
+        'united states citizenship', 'american citizen', 'american citizenship',
+        'green card', 'green cards', 'green card holder', 'green card holders',
+        'security clearance', 'secret clearance', 'top secret', 'ts sci',
+        'active clearance', 'clearance required', 'dod clearance', 'public trust clearance',
+    ),
+    'no_sponsorship': (
+        'no visa sponsorship', 'no visa sponsorship available', 'no sponsorship',
+        'no sponsorship available', 'no visa sponsorship is available', 'no sponsorship is available',
+        'not sponsor', 'not sponsoring', 'not be sponsoring',
+        'not able to sponsor', 'not be able to sponsor',
+        'unable to sponsor', 'cannot sponsor', 'can not sponsor', 'won t sponsor',
+        'not offer sponsorship', 'not offer visa sponsorship', 'not provide sponsorship',
+        'not provide visa sponsorship', 'sponsorship is not available', 'sponsorship not available',
+        'sponsorship is not offered', 'sponsorship will not be', 'not eligible for sponsorship',
+        'without sponsorship', 'without visa sponsorship', 'without requiring sponsorship',
+        'without requiring visa sponsorship', 'without the need for sponsorship',
+        'without the need for visa sponsorship', 'now or in the future require sponsorship',
+        'now or in the future require visa sponsorship',
+    ),
+    'sponsorship_offered': (
+        'visa sponsorship available', 'sponsorship available', 'sponsorship is available',
+        'will sponsor', 'we sponsor', 'visa sponsorship provided', 'sponsorship provided',
+        'sponsorship offered', 'open to sponsorship', 'open to sponsoring',
+        # Longer than "green card", so these win over the citizenship phrase
+        'green card sponsorship', 'green card process', 'green card processes',
+    ),
+    'cue:citizenship': (
+        'citizen', 'citizens', 'citizenship', 'clearance', 'usc', 'gc', 'permanent resident',
+        'permanent residents', 'authorized to work', 'work authorization', 'us person',
+        'us persons', 'itar', 'export control', 'polygraph',
+    ),
+    'cue:visa': (
+        'visa', 'visas', 'sponsor', 'sponsors', 'sponsorship', 'sponsoring', 'h1b', 'h 1b',
+        'work permit', 'authorized to work', 'work authorization', 'immigration',
+    ),
+}
+
+# Words that can turn a strong phrase around within its sentence
+NEGATIONS = (
+    'not', 'no', 'never', 'nor', 'without', 'cannot', 'don t', 'doesn t', 'isn t', 'aren t',
+    'won t', 'will sponsor', 'we sponsor',
+)
+# What a strong phrase counts as when its sentence is negated
+WEAKER = {
+    'citizenship': 'cue:citizenship',
+    'no_sponsorship': 'cue:visa',
+    'sponsorship_offered': 'cue:visa',
+}
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def normalize(text):
+    """Lowercase, fold punctuation/whitespace to single spaces, pad both ends"""
+    return ' ' + _NON_WORD.sub(' ', (text or '').lower()).strip() + ' '
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every pattern"""
+
+    def __init__(self, patterns):
+        # patterns: iterable of (key, label); key is matched literally
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for key, label in patterns:
+            self._add(key, label)
+        self._link()
+
+    def _add(self, key, label):
+        node = 0
+        for ch in key:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((len(key), label))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(ch, 0)
+                if self.fail[child] == child:
+                    self.fail[child] = 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def search(self, text):
+        """Yield (start, end, label) for every occurrence in text"""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, label in out[node]:
+                yield i + 1 - length, i + 1, label
+
+
+def build_matcher(patterns):
+    """Automaton for {label: phrases}; search it with normalize()d text"""
+    # Phrases are matched as whole words by padding them like normalize() does
+    keys = {}
+    for label, phrases in patterns.items():
+        for phrase in phrases:
+            keys.setdefault(normalize(phrase), set()).add(label)
+    return AhoCorasick((key, label) for key, labels in keys.items() for label in sorted(labels))
+
+
+_matcher = build_matcher(PATTERNS)
+_negations = build_matcher({'negation': NEGATIONS})
+
+
+def _outermost(norm, matcher):
+    """(start, end, label) hits in normalized text that aren't inside a longer hit"""
+    hits = sorted(set(matcher.search(norm)), key=lambda h: (h[0], -h[1]))
+    return [(start, end, label) for start, end, label in hits
+            if not any(s <= start and end <= e and (e - s) > (end - start) for s, e, _ in hits)]
+
+
+def find_matches(text, matcher=None):
+    """Matches as (label, phrase), dropping ones inside a longer match
+
+    "no sponsorship available" then only counts as no_sponsorship, not
+    also as sponsorship_offered, and "us citizen" is not also a bare cue.
+    """
+    norm = normalize(text)
+    return [(label, norm[start:end].strip()) for start, end, label in _outermost(norm, matcher or _matcher)]
+
+
+def _sentence_labels(sentence):
+    """Labels matched in one sentence, strong ones weakened by a negation outside them"""
+    norm = normalize(sentence)
+    negations = [(start, end) for start, end, _ in _negations.search(norm)]
+    labels = set()
+    for start, end, label in _outermost(norm, _matcher):
+        if label in WEAKER and any(e <= start + 1 or s >= end - 1 for s, e in negations):
+            label = WEAKER[label]
+        labels.add(label)
+    return labels
+
+
+def classify(text):
+    """Decide the flags from keywords alone; None means "ask the LLM"
+
+    Returns {'requires_citizenship', 'no_visa_sponsorship', 'matches'}.
+    """
+    matches = find_matches(text)
+    labels = set()
+    for sentence in _SENTENCE_END.split(text or ''):
+        labels |= _sentence_labels(sentence)
+
+    if 'citizenship' in labels:
+        citizenship = True
+    elif 'cue:citizenship' in labels:
+        citizenship = None
+    else:
+        citizenship = False
+
+    no_sponsor = 'no_sponsorship' in labels
+    offered = 'sponsorship_offered' in labels
+    if no_sponsor != offered:
+        visa = no_sponsor
+    elif no_sponsor or 'cue:visa' in labels:
+        visa = None
+    else:
+        visa = False
+
+    return {
+        'requires_citizenship': citizenship,
+        'no_visa_sponsorship': visa,
+        'matches': matches,
+    }
+
+
+def lead_summary(text, max_words=20):
+    """First sentence of the description, cut to max_words"""
+    sentence = _SENTENCE_END.split((text or '').strip(), 1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return ' '.join(words[:max_words]).rstrip(',;:') + '...'
+    return ' '.join(words)
@@ -0,0 +1,111 @@
+"""Persistent cache of parsed LLM analyses, keyed by content hash.
+
+The same posting text shows up under new URLs and across Workday tenants,
+and each copy used to cost a full Ollama inference. Entries are keyed by
+sha256(model, prompt version, normalized description), so a model or
+prompt template change simply stops matching; stale rows are purged when
+the cache is opened.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(BACKEND_DIR, 'cache', 'llm_cache.db'))
+# Fields that differ between postings of the same text and are never reused
+OWN_FIELDS = ('location',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    inference_seconds REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+)
+"""
+
+_WS = re.compile(r'\s+')
+
+
+def prompt_version(template):
+    """Short hash of a prompt template; changes whenever the template does"""
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+
+def normalize_text(text):
+    return _WS.sub(' ', text or '').strip().lower()
+
+
+def content_key(model, version, description):
+    raw = '\x1f'.join((model, version, normalize_text(description)))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Thread-safe analysis cache for one model + prompt version"""
+
+    def __init__(self, model, version, path=CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.model = model
+        self.version = version
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(SCHEMA)
+        self.stats = {'hits': 0, 'misses': 0, 'seconds_saved': 0.0}
+        self.purged = self.purge_stale()
+
+    def purge_stale(self):
+        """Drop entries made with another model or prompt template"""
+        with self._lock, self.conn:
+            return self.conn.execute(
+                'DELETE FROM analyses WHERE model != ? OR prompt_version != ?',
+                (self.model, self.version),
+            ).rowcount
+
+    def get(self, description):
+        """Cached analysis dict for this description, or None
+
+        The same text is often posted for several cities, so a hit carries
+        no location; the job's own details (or its scraped location) fill it.
+        """
+        key = content_key(self.model, self.version, description)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT analysis, inference_seconds FROM analyses WHERE key = ?', (key,)
+            ).fetchone()
+            if not row:
+                self.stats['misses'] += 1
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE analyses SET hits = hits + 1 WHERE key = ?', (key,))
+            self.stats['hits'] += 1
+            self.stats['seconds_saved'] += row[1]
+        return {k: v for k, v in json.loads(row[0]).items() if k not in OWN_FIELDS}
+
+    def put(self, description, analysis, inference_seconds):
+        key = content_key(self.model, self.version, description)
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO analyses
+                    (key, model, prompt_version, analysis, inference_seconds, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, self.model, self.version, json.dumps(analysis), inference_seconds, time.time()))
+
+    def summary(self):
+        s = self.stats
+        lookups = s['hits'] + s['misses']
+        rate = s['hits'] / lookups * 100 if lookups else 0
+        return (f"LLM cache: {s['hits']} hits / {s['misses']} misses ({rate:.0f}%), "
+                f"{s['seconds_saved']:.0f}s of inference saved")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
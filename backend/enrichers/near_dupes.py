@@ -0,0 +1,244 @@
+"""MinHash/LSH index of analysed postings, to reuse analyses of reposts.
+
+Banks post the same role under many requisition URLs and cities. The
+LLM cache only catches byte-identical text; a repost that differs in the
+city, requisition number or a sentence still cost a full inference.
+
+Each analysed posting's title and description become word 3-shingles and
+a NUM_PERM-value MinHash signature. The signature is split into BANDS
+bands whose hashes are indexed, so a new posting only compares against
+postings sharing at least one band (an indexed lookup per band, not a
+scan). A candidate from the same company whose signatures agree on at
+least THRESHOLD of their values (the estimated Jaccard similarity) is a
+near-duplicate: the new job is grouped under the candidate's canonical
+job and reuses its analysis. Its own location is kept, because reposts
+differ mostly by city.
+
+Like the LLM cache, entries are tied to the model and prompt version and
+stale ones are purged when the index is opened.
+
+Usage: python near_dupes.py stats [--groups N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+
+from llm_cache import OWN_FIELDS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_PATH = os.environ.get('NEAR_DUPES_PATH', os.path.join(BACKEND_DIR, 'cache', 'near_dupes.db'))
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+# Estimated Jaccard similarity of shingle sets needed to count as a repost
+THRESHOLD = 0.8
+# Too little text to tell a repost from a template
+MIN_SHINGLES = 20
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    job_id TEXT PRIMARY KEY,
+    canonical_id TEXT NOT NULL,
+    company TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    analysis TEXT,
+    inference_seconds REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_postings_canonical ON postings(canonical_id);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    job_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bands_job ON bands(job_id);
+"""
+
+
+def shingles(title, description):
+    """Set of word 3-shingles of the title and description (case and punctuation ignored)"""
+    words = _WORD.findall(f"{title or ''} {description or ''}".lower())
+    return {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(items):
+    """NUM_PERM-value MinHash signature of a set of strings"""
+    hashes = [zlib.crc32(item.encode('utf-8')) for item in items]
+    return array('q', [min((a * h + b) % _PRIME for h in hashes) for a, b in PERMUTATIONS])
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def band_buckets(signature):
+    """One bucket key per band: a 64-bit hash of that band's ROWS values"""
+    return [int.from_bytes(hashlib.blake2b(signature[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).digest(),
+                           'big', signed=True)
+            for i in range(BANDS)]
+
+
+def totals(conn):
+    """All-time (postings, duplicates, inference seconds saved) in an index"""
+    return conn.execute("""
+        SELECT COUNT(*),
+               COALESCE(SUM(p.canonical_id != p.job_id), 0),
+               COALESCE(SUM(CASE WHEN p.canonical_id != p.job_id THEN c.inference_seconds END), 0)
+        FROM postings p
+        LEFT JOIN postings c ON c.job_id = p.canonical_id
+    """).fetchone()
+
+
+def normalize_company(company):
+    return ' '.join(_WORD.findall((company or '').lower()))
+
+
+class NearDupIndex:
+    """Thread-safe near-duplicate index for one model + prompt version"""
+
+    def __init__(self, model, version, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.model = model
+        self.version = version
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.stats = {'lookups': 0, 'duplicates': 0, 'seconds_saved': 0.0}
+        self.purged = self.purge_stale()
+
+    def purge_stale(self):
+        """Drop postings analysed with another model or prompt template"""
+        with self._lock, self.conn:
+            count = self.conn.execute(
+                'DELETE FROM postings WHERE model != ? OR prompt_version != ?', (self.model, self.version),
+            ).rowcount
+            if count:
+                self.conn.execute('DELETE FROM bands WHERE job_id NOT IN (SELECT job_id FROM postings)')
+        return count
+
+    def match(self, job_id, company, title, description):
+        """(canonical job id, its shared analysis, similarity) of an analysed near-duplicate, or None
+
+        A job that matches is indexed as a member of that group right away.
+        A representative (a job holding an analysis, e.g. one processed
+        again after its lease expired) never matches, so its analysis is
+        redone and never replaced by a member row.
+        """
+        items = shingles(title, description)
+        if len(items) < MIN_SHINGLES:
+            return None
+        signature = minhash(items)
+        buckets = band_buckets(signature)
+        company = normalize_company(company)
+        with self._lock:
+            self.stats['lookups'] += 1
+            if self.conn.execute('SELECT 1 FROM postings WHERE job_id = ? AND analysis IS NOT NULL',
+                                 (job_id,)).fetchone():
+                return None
+            candidates = {other for band, bucket in enumerate(buckets) for (other,) in self.conn.execute(
+                'SELECT job_id FROM bands WHERE band = ? AND bucket = ?', (band, bucket))}
+            candidates.discard(job_id)
+            best = None
+            for other in candidates:
+                # Only groups whose representative still has its analysis
+                row = self.conn.execute("""
+                    SELECT p.canonical_id, p.signature, c.analysis, c.inference_seconds
+                    FROM postings p JOIN postings c ON c.job_id = p.canonical_id
+                    WHERE p.job_id = ? AND p.company = ? AND p.canonical_id != ? AND c.analysis IS NOT NULL
+                """, (other, company, job_id)).fetchone()
+                if row:
+                    score = similarity(signature, array('q', row[1]))
+                    if score >= THRESHOLD and (best is None or score > best[1]):
+                        best = (row[0], score, row[2], row[3])
+            if best is None:
+                return None
+            canonical_id, score, analysis, seconds = best
+            self._index(job_id, canonical_id, company, signature, buckets, None, 0.0)
+            self.stats['duplicates'] += 1
+            self.stats['seconds_saved'] += seconds
+        shared = {k: v for k, v in json.loads(analysis).items() if k not in OWN_FIELDS}
+        return canonical_id, shared, score
+
+    def add(self, job_id, company, title, description, analysis, inference_seconds):
+        """Index an analysed posting as the representative of its own group"""
+        items = shingles(title, description)
+        if len(items) < MIN_SHINGLES:
+            return False
+        signature = minhash(items)
+        with self._lock:
+            self._index(job_id, job_id, normalize_company(company), signature, band_buckets(signature),
+                        json.dumps(analysis), inference_seconds)
+        return True
+
+    def _index(self, job_id, canonical_id, company, signature, buckets, analysis, inference_seconds):
+        with self.conn:
+            self.conn.execute('DELETE FROM bands WHERE job_id = ?', (job_id,))
+            self.conn.execute("""
+                INSERT OR REPLACE INTO postings
+                    (job_id, canonical_id, company, signature, model, prompt_version,
+                     analysis, inference_seconds, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (job_id, canonical_id, company, signature.tobytes(), self.model, self.version,
+                  analysis, inference_seconds, time.time()))
+            self.conn.executemany('INSERT INTO bands (band, bucket, job_id) VALUES (?, ?, ?)',
+                                  [(band, bucket, job_id) for band, bucket in enumerate(buckets)])
+
+    def totals(self):
+        with self._lock:
+            return totals(self.conn)
+
+    def summary(self):
+        s = self.stats
+        ratio = s['duplicates'] / s['lookups'] * 100 if s['lookups'] else 0
+        return (f"Near-duplicates: {s['duplicates']} of {s['lookups']} postings ({ratio:.0f}%) reused an analysis, "
+                f"{s['seconds_saved']:.0f}s of inference saved")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate posting index statistics')
+    parser.add_argument('command', choices=['stats'])
+    parser.add_argument('--groups', type=int, default=10, help='show the N largest duplicate groups')
+    parser.add_argument('--path', default=INDEX_PATH)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.path)
+    postings, duplicates, saved = totals(conn)
+    if not postings:
+        print("Index is empty")
+        return
+    print(f"📊 {postings} postings indexed, {duplicates} near-duplicates "
+          f"({duplicates / postings:.0%} dedup ratio), {saved:.0f}s of inference saved")
+    for canonical_id, size in conn.execute("""
+            SELECT canonical_id, COUNT(*) FROM postings
+            GROUP BY canonical_id HAVING COUNT(*) > 1 ORDER BY COUNT(*) DESC LIMIT ?
+    """, (args.groups,)):
+        print(f"   {size:4} × {canonical_id}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Schema-constrained, token-bounded Ollama generation with early stop.
+
+The enricher used to ask for a whole non-streamed completion with no
+output cap and then grep for a flat {...} block, which breaks on nested
+values and throws away the inference when it does. Here the request
+carries a JSON schema (Ollama's structured outputs) and a num_predict
+budget sized to that schema; the response is streamed and reading stops
+as soon as one complete JSON object has arrived. The result is validated
+and coerced against the same schema before anyone uses it.
+"""
+import json
+import threading
+import time
+
+import requests
+
+from windowing import estimate_tokens
+
+OLLAMA_URL = 'http://localhost:11434/api/generate'
+TIMEOUT = 60
+
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'is_real_job': {'type': 'boolean'},
+        'requires_citizenship': {'type': 'boolean'},
+        'no_visa_sponsorship': {'type': 'boolean'},
+        'location': {'type': 'string', 'maxLength': 80},
+        'summary': {'type': 'string', 'maxLength': 160},
+    },
+    'required': ['is_real_job', 'requires_citizenship', 'no_visa_sponsorship', 'location', 'summary'],
+}
+
+# Fields asked for by the extended prompt in tests/test_playwright_enrich.py
+EXTENDED_ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': dict(ANALYSIS_SCHEMA['properties'], **{
+        'salary_min': {'type': ['number', 'null']},
+        'salary_max': {'type': ['number', 'null']},
+        'currency': {'type': ['string', 'null'], 'maxLength': 3},
+        'work_type': {'type': 'string', 'enum': ['onsite', 'remote', 'hybrid', 'unknown']},
+        'job_type': {'type': 'string', 'maxLength': 20},
+        'experience_level': {'type': 'string', 'maxLength': 20},
+        'posted_date': {'type': ['string', 'null'], 'maxLength': 10},
+        'mandatory_skills': {'type': 'array', 'items': {'type': 'string', 'maxLength': 30}, 'maxItems': 10},
+        'preferred_skills': {'type': 'array', 'items': {'type': 'string', 'maxLength': 30}, 'maxItems': 10},
+    }),
+    'required': ANALYSIS_SCHEMA['required'] + ['mandatory_skills', 'preferred_skills'],
+}
+
+
+def select_fields(schema, fields):
+    """Copy of an object schema restricted to the given properties"""
+    return {
+        'type': 'object',
+        'properties': {k: v for k, v in schema['properties'].items() if k in fields},
+        'required': [k for k in schema.get('required', []) if k in fields],
+    }
+
+
+def _value_tokens(spec):
+    types = spec.get('type')
+    types = types if isinstance(types, list) else [types]
+    if 'array' in types:
+        items = spec.get('items', {})
+        return 2 + spec.get('maxItems', 10) * (_value_tokens(items) + 1)
+    if 'object' in types:
+        return token_budget(spec)
+    if 'string' in types:
+        # ~3.5 chars per token for English text, plus quotes
+        return 2 + int(spec.get('maxLength', 60) / 3.5)
+    return 3  # booleans, numbers, null
+
+
+def token_budget(schema, slack=1.25):
+    """Upper bound on output tokens for a JSON object matching schema"""
+    total = 2
+    for key, spec in schema.get('properties', {}).items():
+        total += 3 + len(key) // 4 + _value_tokens(spec)
+    return int(total * slack)
+
+
+class JsonObjectScanner:
+    """Finds the end of the first top-level JSON object in streamed text"""
+
+    def __init__(self):
+        self.parts = []
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+
+    def feed(self, chunk):
+        """Add text; returns True once a complete object has been seen"""
+        if self.complete:
+            return True
+        if not self.started:
+            start = chunk.find('{')
+            if start < 0:
+                return False
+            self.started = True
+            chunk = chunk[start:]
+        return self._scan(chunk)
+
+    def _scan(self, chunk):
+        for i, ch in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.parts.append(chunk[:i + 1])
+                    self.complete = True
+                    return True
+        self.parts.append(chunk)
+        return False
+
+    def text(self):
+        return ''.join(self.parts) if self.complete else None
+
+
+def extract_json_object(text):
+    """First balanced {...} in text (nested objects/arrays and strings aware)"""
+    scanner = JsonObjectScanner()
+    scanner.feed(text or '')
+    return scanner.text()
+
+
+def _check_type(value, types):
+    checks = {
+        'boolean': lambda v: isinstance(v, bool),
+        'string': lambda v: isinstance(v, str),
+        'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+        'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+        'array': lambda v: isinstance(v, list),
+        'object': lambda v: isinstance(v, dict),
+        'null': lambda v: v is None,
+    }
+    return any(checks[t](value) for t in types)
+
+
+def _coerce(value, types):
+    """Fix the usual small-model slips ("true" for true, "85000" for 85000)"""
+    if 'boolean' in types and isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    if 'null' in types and isinstance(value, str) and value.strip().lower() in ('', 'null', 'none', 'n/a'):
+        return None
+    if ('number' in types or 'integer' in types) and isinstance(value, str):
+        cleaned = value.replace(',', '').replace('$', '').strip()
+        try:
+            return int(cleaned) if 'integer' in types else float(cleaned)
+        except ValueError:
+            return value
+    if 'array' in types and isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return value
+
+
+def validate(data, schema):
+    """Validate and coerce data against a (small subset of) JSON schema
+
+    Returns a new dict with only the schema's properties; raises ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('expected a JSON object')
+    missing = [key for key in schema.get('required', []) if key not in data]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+
+    result = {}
+    for key, spec in schema.get('properties', {}).items():
+        if key not in data:
+            continue
+        types = spec.get('type')
+        types = types if isinstance(types, list) else [types]
+        value = _coerce(data[key], types)
+        if not _check_type(value, types):
+            raise ValueError(f"{key}: expected {'/'.join(types)}, got {type(value).__name__}")
+        if 'enum' in spec and value not in spec['enum']:
+            raise ValueError(f"{key}: {value!r} not one of {spec['enum']}")
+        if isinstance(value, list) and 'items' in spec:
+            item_types = spec['items'].get('type')
+            item_types = item_types if isinstance(item_types, list) else [item_types]
+            value = [_coerce(item, item_types) for item in value]
+            value = [item for item in value if _check_type(item, item_types)]
+        result[key] = value
+    return result
+
+
+class OllamaClient:
+    """Streams /api/generate with a schema and stops at the end of the object"""
+
+    def __init__(self, model, url=OLLAMA_URL, session=None, timeout=TIMEOUT, keep_alive=None):
+        self.model = model
+        self.url = url
+        self.session = session
+        self.timeout = timeout
+        # e.g. '30m': how long Ollama keeps the model loaded after a call
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'failures': 0, 'early_stops': 0, 'seconds': 0.0,
+                      'output_tokens': 0, 'prompt_tokens': 0}
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+
+    def generate_json(self, prompt, schema, num_predict=None, temperature=0.1):
+        """Return the first complete JSON object the model produces, as text"""
+        started = time.monotonic()
+        scanner = JsonObjectScanner()
+        tokens = prompt_tokens = 0
+        done = False
+        payload = {
+            'model': self.model,
+            'prompt': prompt,
+            'stream': True,
+            'format': schema,
+            'options': {
+                'temperature': temperature,
+                'num_predict': num_predict or token_budget(schema),
+            },
+        }
+        if self.keep_alive is not None:
+            payload['keep_alive'] = self.keep_alive
+        try:
+            response = (self.session or requests).post(self.url, json=payload, timeout=self.timeout, stream=True)
+            with response:
+                if response.status_code != 200:
+                    print(f"   ❌ Ollama error: {response.status_code}")
+                    self._count(calls=1, failures=1)
+                    return None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        tokens += 1
+                        if scanner.feed(chunk['response']):
+                            # Closing the stream makes Ollama stop generating
+                            break
+                    if chunk.get('done'):
+                        done = True
+                        prompt_tokens = chunk.get('prompt_eval_count', 0)
+                        tokens = chunk.get('eval_count', tokens)
+                        break
+        except Exception as e:
+            print(f"   ❌ Ollama request error: {e}")
+            self._count(calls=1, failures=1, seconds=time.monotonic() - started)
+            return None
+
+        text = scanner.text()
+        if not done:
+            # Stopped before the final chunk that carries prompt_eval_count
+            prompt_tokens = estimate_tokens(prompt)
+        self._count(
+            calls=1,
+            seconds=time.monotonic() - started,
+            output_tokens=tokens,
+            prompt_tokens=prompt_tokens,
+            early_stops=1 if text is not None and not done else 0,
+            failures=1 if text is None else 0,
+        )
+        return text
+
+    def summary(self):
+        s = self.stats
+        calls = s['calls'] or 1
+        return (f"Ollama: {s['calls']} calls, {s['seconds'] / calls:.2f}s avg, "
+                f"{s['prompt_tokens'] / calls:.0f} prompt + {s['output_tokens'] / calls:.0f} output tokens/job, "
+                f"{s['early_stops']} early stops, {s['failures']} failures")
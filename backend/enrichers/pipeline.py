@@ -0,0 +1,147 @@
+"""Pipelined job enrichment: fetch -> LLM -> DB writer over bounded queues.
+
+Each stage runs on its own pool so slow pages never block the LLM and a
+busy Ollama never stalls downloads. Queues are bounded, so when a later
+stage falls behind the earlier ones block instead of piling jobs in memory.
+All database calls (polling and writes) go through a single thread.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class EnrichmentPipeline:
+    """Run fetch/analyze/write callables as a concurrent pipeline
+
+    fetch(job) -> fetched page/details or None
+    analyze(job, details) -> analysis dict or None
+    write(job_id, analysis, details) -> None
+    """
+
+    def __init__(self, fetch, analyze, write, fetch_concurrency=8,
+                 llm_workers=1, queue_size=16, batch_size=10):
+        self.fetch = fetch
+        self.analyze = analyze
+        self.write = write
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.llm_workers = max(1, llm_workers)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.in_flight = set()
+        self.stats = {'fetched': 0, 'fetch_failed': 0, 'analyzed': 0,
+                      'analysis_failed': 0, 'written': 0}
+
+    def run(self, get_jobs, once=False, idle_sleep=30):
+        """Blocking entry point; returns the stats dict"""
+        return asyncio.run(self.run_async(get_jobs, once, idle_sleep))
+
+    async def run_async(self, get_jobs, once=False, idle_sleep=30):
+        fetch_q = asyncio.Queue(self.queue_size)
+        llm_q = asyncio.Queue(self.queue_size)
+        write_q = asyncio.Queue(self.queue_size)
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(self.fetch_concurrency, 'fetch') as fetch_pool, \
+                ThreadPoolExecutor(self.llm_workers, 'llm') as llm_pool, \
+                ThreadPoolExecutor(1, 'db') as db_pool:
+            fetchers = [asyncio.create_task(self._fetch_worker(fetch_q, llm_q, write_q, fetch_pool))
+                        for _ in range(self.fetch_concurrency)]
+            analyzers = [asyncio.create_task(self._llm_worker(llm_q, write_q, llm_pool))
+                         for _ in range(self.llm_workers)]
+            writer = asyncio.create_task(self._writer(write_q, db_pool))
+
+            try:
+                await self._feed(get_jobs, fetch_q, db_pool, once, idle_sleep)
+            finally:
+                # Drain stage by stage so nothing in flight is lost
+                for _ in fetchers:
+                    await fetch_q.put(_DONE)
+                await asyncio.gather(*fetchers)
+                for _ in analyzers:
+                    await llm_q.put(_DONE)
+                await asyncio.gather(*analyzers)
+                await write_q.put(_DONE)
+                await writer
+
+        self.stats['elapsed'] = time.monotonic() - started
+        return self.stats
+
+    async def _feed(self, get_jobs, fetch_q, db_pool, once, idle_sleep):
+        loop = asyncio.get_running_loop()
+        while True:
+            # get_jobs claims rows, so in-flight jobs are not handed out again;
+            # the in_flight check is only a guard against sources that don't
+            jobs = await loop.run_in_executor(db_pool, get_jobs, self.batch_size)
+            fresh = [job for job in jobs if job[0] not in self.in_flight]
+
+            if not fresh:
+                if not self.in_flight:
+                    if once:
+                        return
+                    print(f"😴 No pending jobs, waiting {idle_sleep}s...")
+                    await asyncio.sleep(idle_sleep)
+                else:
+                    await asyncio.sleep(1)
+                continue
+
+            for job in fresh:
+                self.in_flight.add(job[0])
+                await fetch_q.put(job)
+
+    async def _fetch_worker(self, fetch_q, llm_q, write_q, pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await fetch_q.get()
+            if job is _DONE:
+                return
+            try:
+                description = await loop.run_in_executor(pool, self.fetch, job)
+            except Exception as e:
+                print(f"   ❌ Fetch stage error for {job[0]}: {e}")
+                description = None
+
+            if description:
+                self.stats['fetched'] += 1
+                await llm_q.put((job, description))
+            else:
+                self.stats['fetch_failed'] += 1
+                print(f"⚠️  [{job[0][:8]}] Could not fetch description")
+                await write_q.put((job, None, None))
+
+    async def _llm_worker(self, llm_q, write_q, pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await llm_q.get()
+            if item is _DONE:
+                return
+            job, description = item
+            try:
+                analysis = await loop.run_in_executor(pool, self.analyze, job, description)
+            except Exception as e:
+                print(f"   ❌ LLM stage error for {job[0]}: {e}")
+                analysis = None
+
+            if analysis:
+                self.stats['analyzed'] += 1
+            else:
+                self.stats['analysis_failed'] += 1
+            await write_q.put((job, analysis, description))
+
+    async def _writer(self, write_q, pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await write_q.get()
+            if item is _DONE:
+                return
+            job, analysis, description = item
+            try:
+                await loop.run_in_executor(pool, self.write, job[0], analysis, description)
+                self.stats['written'] += 1
+                mark = '✅' if analysis else '⚠️ '
+                print(f"{mark} [{job[0][:8]}] {job[1][:60]}")
+            except Exception as e:
+                print(f"   ❌ DB write error for {job[0]}: {e}")
+            finally:
+                self.in_flight.discard(job[0])
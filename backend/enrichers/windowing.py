@@ -0,0 +1,119 @@
+"""Relevance windows over a job description, sized to a prompt token budget.
+
+Sending the first N characters to the LLM means the prompt is mostly
+company blurb and benefits, while the eligibility clause ("we do not
+sponsor visas") tends to sit near the end and gets cut off. Here the text
+is split into sentences, each sentence is scored for the cues the prompt
+asks about (citizenship/visa, location, salary, skills) plus a bonus for
+the opening lines, and the best sentences are kept until the budget is
+spent; sentences with no cue at all are dropped even if there is room.
+Contiguous picks form windows, gaps between windows are marked with " … "
+and the original order is kept.
+"""
+import re
+
+from keyword_classifier import PATTERNS as ELIGIBILITY_PATTERNS, build_matcher, normalize
+
+# Rough chars-per-token for English prose
+CHARS_PER_TOKEN = 4
+# Description tokens per prompt
+TOKEN_BUDGET = 700
+# Bump when window selection changes (cues, weights, splitting); cached analyses are redone
+WINDOWING_VERSION = 1
+# Run-on "sentences" (bullet lists flattened by the extractor) are cut here
+MAX_SENTENCE_CHARS = 400
+
+# label -> weight; eligibility labels come from the keyword classifier
+WEIGHTS = {
+    'citizenship': 10, 'no_sponsorship': 10, 'sponsorship_offered': 10,
+    'cue:citizenship': 6, 'cue:visa': 6,
+    'location': 4, 'salary': 4, 'skills': 2,
+}
+
+CUES = dict(ELIGIBILITY_PATTERNS, **{
+    'location': (
+        'located in', 'based in', 'location', 'remote', 'hybrid', 'on site', 'onsite', 'in office',
+        'office in', 'relocation', 'relocate', 'headquarters', 'work from home', 'ubicacion',
+        'ubicaci n', 'lugar de trabajo',
+    ),
+    'salary': (
+        'salary', 'salaries', 'compensation', 'pay range', 'base pay', 'per hour', 'per year',
+        'hourly', 'annually', 'annual base', 'usd', 'cad', 'mxn', 'eur', 'bonus', 'sueldo', 'salario',
+    ),
+    'skills': (
+        'experience with', 'experience in', 'years of experience', 'proficient', 'proficiency',
+        'knowledge of', 'skills', 'qualifications', 'requirements', 'required', 'must have',
+        'nice to have', 'preferred', 'bachelor', 'degree', 'requisitos', 'experiencia',
+        'licenciatura', 'conocimientos',
+    ),
+})
+
+_matcher = build_matcher(CUES)
+_SENTENCE_END = re.compile(r'(?<=[.!?;:])\s+|\s+(?=[•·▪●◦]\s)')
+# "U.S.", "e.g.", "Inc." and friends do not end a sentence
+_ABBREVIATION = re.compile(r'(?:\b[A-Za-z]|\b(?:e\.g|i\.e|etc|inc|ltd|sr|jr|st|no|vs|approx|dept))\.$', re.IGNORECASE)
+_MONEY = re.compile(r'[$€£]\s?\d|\d[\d,.]*\s?[kK]\b')
+
+
+def estimate_tokens(text):
+    return -(-len(text or '') // CHARS_PER_TOKEN)
+
+
+def split_sentences(text):
+    """Sentences (and bullets), with overlong runs cut at word boundaries"""
+    parts = []
+    for part in _SENTENCE_END.split((text or '').strip()):
+        if parts and _ABBREVIATION.search(parts[-1]):
+            parts[-1] += ' ' + part
+        else:
+            parts.append(part)
+
+    sentences = []
+    for part in parts:
+        while len(part) > MAX_SENTENCE_CHARS:
+            cut = part.rfind(' ', 0, MAX_SENTENCE_CHARS)
+            cut = cut if cut > 0 else MAX_SENTENCE_CHARS
+            sentences.append(part[:cut])
+            part = part[cut:].lstrip()
+        if part:
+            sentences.append(part)
+    return sentences
+
+
+def score_sentence(sentence, index):
+    labels = {label for _, _, label in _matcher.search(normalize(sentence))}
+    if _MONEY.search(sentence):
+        labels.add('salary')
+    score = sum(WEIGHTS[label] for label in labels)
+    # The opening lines usually name the role, team and location
+    if index < 2:
+        score += 5 - 2 * index
+    return score
+
+
+def select_windows(text, budget=TOKEN_BUDGET):
+    """The most relevant parts of text that fit in budget tokens"""
+    if estimate_tokens(text) <= budget:
+        return text
+    sentences = split_sentences(text)
+    scores = [score_sentence(sentence, i) for i, sentence in enumerate(sentences)]
+    ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+
+    chosen = set()
+    used = 0
+    for i in ranked:
+        if scores[i] <= 0:
+            break
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > budget:
+            continue
+        chosen.add(i)
+        used += cost
+
+    windows = []
+    for i in sorted(chosen):
+        if windows and i - 1 in chosen:
+            windows[-1].append(sentences[i])
+        else:
+            windows.append([sentences[i]])
+    return ' … '.join(' '.join(window) for window in windows)
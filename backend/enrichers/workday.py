@@ -0,0 +1,152 @@
+"""Workday job detail fast path.
+
+Workday career sites are JS apps backed by a JSON API ("cxs"). A job page
+like
+
+    https://bbva.wd3.myworkdayjobs.com/en-US/BBVA/job/<location>/<title>_<req>
+
+has its data at
+
+    https://bbva.wd3.myworkdayjobs.com/wday/cxs/bbva/BBVA/job/<location>/<title>_<req>
+
+which returns the description, location, posting date and time type in a
+few KB of JSON instead of a full page (or a headless browser).
+"""
+import re
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+import requests
+
+from html_extract import MAX_CHARS, extract_text
+
+TIMEOUT = 15
+HEADERS = {
+    'Accept': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+}
+
+_LOCALE = re.compile(r'^[a-z]{2}(-[A-Z]{2})?$')
+_LOCATION_COUNT = re.compile(r'^\d+\s+locations?$', re.IGNORECASE)
+_POSTED_DAYS = re.compile(r'(\d+)\+?\s+days?\s+ago', re.IGNORECASE)
+
+JOB_TYPES = {
+    'full time': 'full-time',
+    'full-time': 'full-time',
+    'part time': 'part-time',
+    'part-time': 'part-time',
+    'contract': 'contract',
+    'temporary': 'contract',
+    'intern': 'internship',
+    'internship': 'internship',
+}
+
+
+def parse_workday_url(url):
+    """Split a Workday job URL into host/tenant/site/job path, or None"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    segments = [s for s in parts.path.split('/') if s]
+    if segments and _LOCALE.match(segments[0]):
+        segments = segments[1:]
+
+    if host.endswith('.myworkdayjobs.com'):
+        # <tenant>.wdN.myworkdayjobs.com/<site>/job/...
+        tenant = host.split('.')[0]
+    elif host.endswith('.myworkdaysite.com') and segments[:1] == ['recruiting']:
+        # wdN.myworkdaysite.com/recruiting/<tenant>/<site>/job/...
+        segments = segments[1:]
+        if not segments:
+            return None
+        tenant, segments = segments[0], segments[1:]
+    else:
+        return None
+
+    if len(segments) < 3 or segments[1] != 'job':
+        return None
+    return {
+        'scheme': parts.scheme or 'https',
+        'host': parts.netloc,
+        'tenant': tenant,
+        'site': segments[0],
+        'job_path': '/'.join(segments[1:]),
+    }
+
+
+def is_workday_job_url(url):
+    return parse_workday_url(url) is not None
+
+
+def workday_api_url(url, api_base=None):
+    """cxs JSON endpoint for a Workday job URL (api_base overrides scheme://host)"""
+    info = parse_workday_url(url)
+    if not info:
+        return None
+    base = api_base or f"{info['scheme']}://{info['host']}"
+    return f"{base.rstrip('/')}/wday/cxs/{info['tenant']}/{info['site']}/{info['job_path']}"
+
+
+def parse_posted_date(info, today=None):
+    """ISO posting date from startDate, or from 'Posted N Days Ago'"""
+    start = info.get('startDate')
+    if start and re.match(r'^\d{4}-\d{2}-\d{2}', start):
+        return start[:10]
+
+    posted = (info.get('postedOn') or '').lower()
+    today = today or date.today()
+    if 'today' in posted:
+        return today.isoformat()
+    if 'yesterday' in posted:
+        return (today - timedelta(days=1)).isoformat()
+    match = _POSTED_DAYS.search(posted)
+    if match:
+        return (today - timedelta(days=int(match.group(1)))).isoformat()
+    return None
+
+
+def normalize_job_type(time_type):
+    if not time_type:
+        return None
+    return JOB_TYPES.get(time_type.strip().lower(), time_type.strip().lower())
+
+
+def parse_job_posting(data, max_chars=MAX_CHARS):
+    """Map a cxs job detail response to enrichment fields"""
+    info = data.get('jobPostingInfo') or {}
+    description = extract_text(info.get('jobDescription') or '', max_chars)
+    if not description:
+        return None
+
+    locations = [info.get('location')] + list(info.get('additionalLocations') or [])
+    # Multi-location postings put "3 Locations" in the primary slot
+    locations = [loc for loc in locations if loc and not _LOCATION_COUNT.match(loc)]
+    location = '; '.join(locations)
+    country = (info.get('country') or {}).get('descriptor')
+    if country and len(locations) == 1 and country not in location:
+        location = f"{location}, {country}"
+
+    return {
+        'title': info.get('title'),
+        'description': description,
+        'location': location or None,
+        'posted_date': parse_posted_date(info),
+        'job_type': normalize_job_type(info.get('timeType')),
+        'req_id': info.get('jobReqId'),
+        'source': 'workday-api',
+    }
+
+
+def fetch_workday_job(url, api_base=None, timeout=TIMEOUT, session=None, max_chars=MAX_CHARS):
+    """Fetch job details from the Workday JSON API; None if it isn't usable"""
+    api_url = workday_api_url(url, api_base)
+    if not api_url:
+        return None
+    try:
+        response = (session or requests).get(api_url, timeout=timeout, headers=HEADERS)
+        if response.status_code != 200:
+            print(f"   ⚠️  Workday API HTTP {response.status_code} for {url}")
+            return None
+        return parse_job_posting(response.json(), max_chars)
+    except Exception as e:
+        print(f"   ⚠️  Workday API error: {e}")
+        return None
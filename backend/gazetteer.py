@@ -0,0 +1,393 @@
+"""Offline gazetteer: ATS location strings -> ISO country codes, no network.
+
+Built from GeoNames-layout dumps (countryInfo.txt, admin1CodesASCII.txt
+and a cities file such as cities15000.txt) into one compact index file:
+a sorted key table plus flat uint32 arrays, memory-mapped on load, so
+opening it costs a few milliseconds and a lookup is a binary search. The
+bundled backend/data/geonames/ holds a curated subset covering the
+markets we scrape; point GAZETTEER_SRC at a directory with the full
+GeoNames files to index those instead.
+
+Usage: python gazetteer.py build | python gazetteer.py "Toronto, ON, Canada"
+"""
+import glob
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.environ.get('GAZETTEER_SRC', os.path.join(BACKEND_DIR, 'data', 'geonames'))
+INDEX_PATH = os.environ.get('GAZETTEER_INDEX', os.path.join(BACKEND_DIR, 'cache', 'gazetteer.idx'))
+
+MAGIC = b'GAZ1'
+HEADER = struct.Struct('<4s5I')
+
+# Entry kinds; CODE marks abbreviations ("CA", "ON", "USA"), which only
+# count when written in upper case as a part of their own
+COUNTRY, ADMIN1, CITY = 0, 1, 2
+CODE = 4
+
+# Weights when scoring candidate countries for one location
+COUNTRY_WEIGHT, COUNTRY_CODE_WEIGHT, ADMIN1_WEIGHT, CONSISTENT_BONUS = 4.0, 2.5, 2.0, 2.0
+# City names found inside longer text (not as their own part) need this many people
+NGRAM_MIN_POPULATION = 100_000
+MIN_SCORE = 1.0
+
+COUNTRY_ALIASES = {
+    'US': ('USA', 'U.S.', 'U.S.A.', 'United States of America', 'America', 'Estados Unidos'),
+    'GB': ('UK', 'U.K.', 'Great Britain', 'Britain'),
+    'MX': ('México', 'Mexico (MX)'),
+    'AE': ('UAE', 'U.A.E.'),
+    'KR': ('Korea', 'Republic of Korea'),
+    'CZ': ('Czech Republic',),
+    'NL': ('Holland', 'The Netherlands'),
+    'TR': ('Türkiye',),
+    'DE': ('Deutschland',),
+    'ES': ('España',),
+    'BR': ('Brasil',),
+    'CH': ('Suisse', 'Schweiz'),
+    'IN': ('Bharat',),
+    'CA': ('Canadá',),
+    'PH': ('The Philippines',),
+}
+
+# GeoNames admin1 codes are numeric outside the US; ATS strings use these
+ADMIN1_ABBREVIATIONS = {
+    'CA.01': 'AB', 'CA.02': 'BC', 'CA.03': 'MB', 'CA.04': 'NB', 'CA.05': 'NL', 'CA.07': 'NS',
+    'CA.08': 'ON', 'CA.09': 'PE', 'CA.10': 'QC', 'CA.11': 'SK', 'CA.12': 'YT', 'CA.13': 'NT',
+    'CA.14': 'NU',
+    'AU.01': 'ACT', 'AU.02': 'NSW', 'AU.03': 'NT', 'AU.04': 'QLD', 'AU.05': 'SA', 'AU.06': 'TAS',
+    'AU.07': 'VIC', 'AU.08': 'WA',
+    'MX.09': 'CDMX', 'MX.14': 'JAL', 'MX.19': 'NL', 'MX.30': 'VER',
+    'GB.ENG': 'ENG', 'GB.SCT': 'SCT',
+}
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_WORKDAY_CODES = re.compile(r'^[A-Z]{2,3}(?:-[A-Z0-9]{2,4})?-')
+_PART_SPLIT = re.compile(r'\s*,\s*|\s+-\s+|\s*[()]\s*')
+_LOCATION_SPLIT = re.compile(r'\s*(?:\n|;|\||\s/\s|\bor\b)\s*')
+_LOCATION_COUNT = re.compile(r'^\d+\s+locations?$|^multiple locations?$', re.IGNORECASE)
+
+
+def fold(text):
+    """Lowercase ASCII key: accents stripped, punctuation runs -> one space"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def _read_tsv(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            yield line.rstrip('\n').split('\t')
+
+
+def _source_files(source_dir):
+    cities = sorted(glob.glob(os.path.join(source_dir, 'cities*.txt')))
+    return (os.path.join(source_dir, 'countryInfo.txt'),
+            os.path.join(source_dir, 'admin1CodesASCII.txt'),
+            cities[-1] if cities else os.path.join(source_dir, 'cities.txt'))
+
+
+def read_entries(source_dir=SOURCE_DIR):
+    """(key, kind, country_code, name, admin1_name, population) from the dumps"""
+    country_file, admin1_file, cities_file = _source_files(source_dir)
+    entries = []
+    countries = {}
+    for row in _read_tsv(country_file):
+        code, code3, name = row[0], row[1], row[4]
+        countries[code] = name
+        entries.append((fold(name), COUNTRY, code, name, '', 0))
+        entries.append((fold(code), COUNTRY | CODE, code, name, '', 0))
+        entries.append((fold(code3), COUNTRY | CODE, code, name, '', 0))
+    for code, aliases in COUNTRY_ALIASES.items():
+        for alias in aliases:
+            kind = COUNTRY | CODE if alias.replace('.', '').isupper() else COUNTRY
+            entries.append((fold(alias), kind, code, countries.get(code, code), '', 0))
+
+    admin1 = {}
+    for row in _read_tsv(admin1_file):
+        full_code, name, ascii_name = row[0], row[1], row[2]
+        country = full_code.split('.')[0]
+        if country not in countries:
+            continue
+        admin1[full_code] = name
+        for key in {fold(name), fold(ascii_name)}:
+            entries.append((key, ADMIN1, country, name, name, 0))
+        suffix = full_code.split('.', 1)[1]
+        abbreviation = ADMIN1_ABBREVIATIONS.get(full_code, suffix if suffix.isalpha() else None)
+        if abbreviation:
+            entries.append((fold(abbreviation), ADMIN1 | CODE, country, name, name, 0))
+
+    for row in _read_tsv(cities_file):
+        name, ascii_name, alternates, country = row[1], row[2], row[3], row[8]
+        if country not in countries:
+            continue
+        admin_name = admin1.get(f"{country}.{row[10]}", '')
+        population = int(row[14] or 0)
+        keys = {fold(name), fold(ascii_name)}
+        # Full GeoNames rows carry hundreds of alternates; the short ones are what ATSs use
+        keys.update(fold(alt) for alt in alternates.split(',') if alt and len(alt) <= 40)
+        for key in keys - {''}:
+            entries.append((key, CITY, country, name, admin_name, population))
+    return entries
+
+
+def build_index(source_dir=SOURCE_DIR, index_path=INDEX_PATH):
+    """Write the memory-mappable index; returns (keys, entries)"""
+    entries = sorted(set(read_entries(source_dir)), key=lambda e: (e[0], -e[5], e[1]))
+    strings = {}
+
+    def intern(s):
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    keys, key_offsets, entry_start = bytearray(), array('I', [0]), array('I', [0])
+    kinds, codes, names, admins, populations = (array('I') for _ in range(5))
+    previous = None
+    for key, kind, code, name, admin, population in entries:
+        if key != previous:
+            if previous is not None:
+                entry_start.append(len(kinds))
+            keys += key.encode('utf-8')
+            key_offsets.append(len(keys))
+            previous = key
+        kinds.append(kind)
+        codes.append(intern(code))
+        names.append(intern(name))
+        admins.append(intern(admin))
+        populations.append(population)
+    entry_start.append(len(kinds))
+
+    blob = bytearray()
+    string_offsets = array('I', [0])
+    for s in strings:
+        blob += s.encode('utf-8')
+        string_offsets.append(len(blob))
+
+    arrays = [key_offsets, entry_start, kinds, codes, names, admins, populations, string_offsets]
+    if sys.byteorder != 'little':
+        for a in arrays:
+            a.byteswap()
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp = index_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(key_offsets) - 1, len(kinds), len(strings), len(keys), len(blob)))
+        for a in arrays[:2]:
+            f.write(a.tobytes())
+        f.write(keys)
+        for a in arrays[2:]:
+            f.write(a.tobytes())
+        f.write(blob)
+    os.replace(tmp, index_path)
+    return len(key_offsets) - 1, len(kinds)
+
+
+class Gazetteer:
+    """Read-only view over an index file"""
+
+    def __init__(self, index_path=INDEX_PATH):
+        with open(index_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_keys, n_entries, n_strings, key_bytes, string_bytes = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f'{index_path} is not a gazetteer index')
+        view = memoryview(self._mm)
+        pos = HEADER.size
+
+        def take(count, fmt='I'):
+            nonlocal pos
+            size = count * 4 if fmt == 'I' else count
+            chunk = view[pos:pos + size]
+            pos += size
+            if fmt != 'I':
+                return chunk
+            if sys.byteorder == 'little':
+                return chunk.cast('I')
+            values = array('I', chunk)
+            values.byteswap()
+            return values
+
+        self._key_offsets = take(n_keys + 1)
+        self._entry_start = take(n_keys + 1)
+        self._keys = take(key_bytes, 'B')
+        self._kinds = take(n_entries)
+        self._codes = take(n_entries)
+        self._names = take(n_entries)
+        self._admins = take(n_entries)
+        self._populations = take(n_entries)
+        self._string_offsets = take(n_strings + 1)
+        self._strings = take(string_bytes, 'B')
+        self.n_keys = n_keys
+
+    def _key(self, i):
+        return bytes(self._keys[self._key_offsets[i]:self._key_offsets[i + 1]])
+
+    def _string(self, i):
+        return bytes(self._strings[self._string_offsets[i]:self._string_offsets[i + 1]]).decode('utf-8')
+
+    def entries(self, key):
+        """Entries for a folded key as (kind, country_code, name, admin1, population)"""
+        target = key.encode('utf-8')
+        lo, hi = 0, self.n_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.n_keys or self._key(lo) != target:
+            return []
+        return [(self._kinds[j], self._string(self._codes[j]), self._string(self._names[j]),
+                 self._string(self._admins[j]), self._populations[j])
+                for j in range(self._entry_start[lo], self._entry_start[lo + 1])]
+
+    def _candidates(self, part):
+        """Entries a single comma-separated part may refer to"""
+        raw = part.strip().strip('.')
+        key = fold(raw)
+        if not key:
+            return []
+        found = [e for e in self.entries(key)
+                 if not e[0] & CODE or (raw.replace('.', '').isupper() and len(key) <= 4)]
+        if found:
+            return found
+        # Look for a place name inside longer text ("Remote - Austin area")
+        words = key.split()
+        for size in range(min(4, len(words) - 1), 0, -1):
+            for start in range(len(words) - size + 1):
+                found = [e for e in self.entries(' '.join(words[start:start + size]))
+                         if not e[0] & CODE and (e[0] != CITY or e[4] >= NGRAM_MIN_POPULATION)]
+                if found:
+                    return found
+        return []
+
+    def resolve_one(self, location):
+        """Place dict for one location ("City, ST, Country"), or None"""
+        if _WORKDAY_CODES.match(location):
+            # Workday "US-TX-Austin" / "IND-Pune"
+            parts = location.split('-')
+        else:
+            parts = [p for p in _PART_SPLIT.split(location) if p.strip()]
+        candidates = [self._candidates(part) for part in parts]
+
+        admins = {(e[1], e[2]) for found in candidates for e in found if e[0] & 3 == ADMIN1}
+        scores = {}
+        for found in candidates:
+            best = {}
+            for kind, code, name, admin, population in found:
+                base = kind & 3
+                if base == COUNTRY:
+                    weight = COUNTRY_CODE_WEIGHT if kind & CODE else COUNTRY_WEIGHT
+                elif base == ADMIN1:
+                    weight = ADMIN1_WEIGHT
+                else:
+                    weight = 1 + math.log10(max(population, 1)) / 10
+                    if (code, admin) in admins:
+                        weight += CONSISTENT_BONUS
+                best[code] = max(best.get(code, 0), weight)
+            for code, weight in best.items():
+                scores[code] = scores.get(code, 0) + weight
+        if not scores:
+            return None
+        code = max(scores, key=scores.get)
+        if scores[code] < MIN_SCORE:
+            return None
+
+        country = city = state = None
+        city_rank = -1
+        for found in candidates:
+            for kind, c, name, admin, population in found:
+                if c != code:
+                    continue
+                base = kind & 3
+                if base == COUNTRY:
+                    country = name
+                elif base == ADMIN1:
+                    state = state or name
+                else:
+                    rank = population + (10 ** 10 if (c, admin) in admins else 0)
+                    if rank > city_rank:
+                        city, city_rank, city_admin = name, rank, admin
+        if city and not state:
+            state = city_admin or None
+        return {'city': city, 'state': state, 'country': country or self.country_name(code),
+                'country_code': code}
+
+    def country_name(self, code):
+        for kind, c, name, _, _ in self.entries(fold(code)):
+            if kind & 3 == COUNTRY and c == code:
+                return name
+        return None
+
+    def resolve_all(self, text):
+        """Places for every location in a multi-location string"""
+        text = (text or '').replace('locations\n', '\n').replace('Locations\n', '\n')
+        places = []
+        for location in _LOCATION_SPLIT.split(text):
+            if not location.strip() or _LOCATION_COUNT.match(location.strip()):
+                continue
+            place = self.resolve_one(location)
+            if place:
+                places.append(place)
+        return places
+
+    def resolve(self, text):
+        """First resolvable place in text, or None"""
+        places = self.resolve_all(text)
+        return places[0] if places else None
+
+    def country_codes(self, text):
+        """Distinct ISO country codes mentioned, in order"""
+        return list(dict.fromkeys(p['country_code'] for p in self.resolve_all(text)))
+
+    def close(self):
+        for name in ('_key_offsets', '_entry_start', '_keys', '_kinds', '_codes', '_names',
+                     '_admins', '_populations', '_string_offsets', '_strings'):
+            value = getattr(self, name)
+            if isinstance(value, memoryview):
+                value.release()
+        self._mm.close()
+
+
+def _stale(index_path, source_dir):
+    if not os.path.exists(index_path):
+        return True
+    built = os.path.getmtime(index_path)
+    return any(os.path.exists(p) and os.path.getmtime(p) > built for p in _source_files(source_dir))
+
+
+_gazetteer = None
+
+
+def get_gazetteer(index_path=INDEX_PATH, source_dir=SOURCE_DIR):
+    """Shared gazetteer, (re)building the index when the dumps changed"""
+    global _gazetteer
+    if _gazetteer is None:
+        if _stale(index_path, source_dir):
+            build_index(source_dir, index_path)
+        _gazetteer = Gazetteer(index_path)
+    return _gazetteer
+
+
+def main():
+    if sys.argv[1:] == ['build']:
+        keys, entries = build_index()
+        print(f"Built {INDEX_PATH}: {keys} keys, {entries} entries, "
+              f"{os.path.getsize(INDEX_PATH) / 1024:.0f} KB")
+        return
+    gazetteer = get_gazetteer()
+    for text in sys.argv[1:]:
+        print(f"{text!r} -> {gazetteer.resolve_all(text)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""Concurrent geocoding with per-provider in-flight limits and resumable checkpoints.
+
+The update scripts resolved one location at a time and slept between
+requests, so a provider with a 2 req/s quota and 500 ms latency ran at
+well under 2 req/s, and a killed run started again from zero. Here an
+asyncio loop keeps up to IN_FLIGHT requests per provider outstanding
+(provider calls run in threads; the http_client token buckets still pace
+them to the provider's rate), every result is written to jobs and
+geocode_cache as soon as it arrives, and a geocode_checkpoint row records
+the last key below which everything is done plus per-provider counters,
+so a restarted run skips straight past the finished part. DAILY_QUOTA
+takes a provider out of the fallback order once it has used its calls
+for the day.
+"""
+import asyncio
+import json
+import time
+from datetime import date
+
+from geocoding import clean_location, distinct_locations, write_geocoded
+
+# Requests kept in flight per provider (pacing is still the token bucket's job)
+IN_FLIGHT = {
+    'locationiq': 4,
+    'nominatim': 1,
+    'photon': 2,
+    'opencage': 1,
+}
+DEFAULT_IN_FLIGHT = 2
+# Providers that never touch the network are called inline
+INLINE = {'gazetteer'}
+# Calls per day before a provider is skipped (free plans)
+DAILY_QUOTA = {
+    'locationiq': 5000,
+    'opencage': 2500,
+}
+WORKERS = 8
+
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode_checkpoint (
+    run TEXT PRIMARY KEY,
+    last_key TEXT,
+    counters TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class Checkpoint:
+    """Progress of a named run: last finished key plus provider counters"""
+
+    def __init__(self, conn, run):
+        self.conn = conn
+        self.run = run
+        conn.execute(CHECKPOINT_SCHEMA)
+
+    def load(self):
+        row = self.conn.execute('SELECT last_key, counters FROM geocode_checkpoint WHERE run = ?',
+                                (self.run,)).fetchone()
+        if not row:
+            return None, {}
+        return row[0], json.loads(row[1])
+
+    def save(self, last_key, counters):
+        """Write progress; the caller owns the transaction"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO geocode_checkpoint (run, last_key, counters, updated_at) VALUES (?, ?, ?, ?)',
+            (self.run, last_key, json.dumps(counters), time.time()),
+        )
+
+
+class AsyncGeocoder:
+    """Async front for a GeocodeResolver; DB work stays on the event loop thread"""
+
+    def __init__(self, resolver, counters=None, in_flight=IN_FLIGHT, quotas=DAILY_QUOTA):
+        self.resolver = resolver
+        self.counters = {} if counters is None else counters
+        self.in_flight = in_flight
+        self.quotas = quotas
+        self._limits = {}
+        self._pending = {}
+
+    def provider_counters(self, name):
+        today = date.today().isoformat()
+        c = self.counters.setdefault(name, {'calls': 0, 'hits': 0, 'errors': 0, 'day': today, 'day_calls': 0})
+        if c['day'] != today:
+            c['day'], c['day_calls'] = today, 0
+        return c
+
+    def over_quota(self, name):
+        quota = self.quotas.get(name)
+        return quota is not None and self.provider_counters(name)['day_calls'] >= quota
+
+    def _limit(self, name):
+        # Created lazily so they belong to the running loop
+        if name not in self._limits:
+            self._limits[name] = asyncio.Semaphore(max(1, self.in_flight.get(name, DEFAULT_IN_FLIGHT)))
+        return self._limits[name]
+
+    async def attempt(self, provider, q):
+        """(place, failed) for one provider call, within the provider's in-flight limit"""
+        place = error = None
+        try:
+            if provider.name in INLINE:
+                place = provider.geocode(q)
+            else:
+                async with self._limit(provider.name):
+                    place = await asyncio.to_thread(provider.geocode, q)
+        except Exception as e:
+            error = e
+        place, failed = self.resolver.account(provider, q, place, error)
+        c = self.provider_counters(provider.name)
+        c['calls'] += 1
+        c['day_calls'] += 1
+        c['hits'] += 1 if place else 0
+        c['errors'] += 1 if failed else 0
+        return place, failed
+
+    async def lookup(self, query):
+        failed = False
+        for provider in self.resolver.providers:
+            if self.over_quota(provider.name):
+                # Not a real miss; leave it uncached for another day
+                failed = True
+                continue
+            for q in self.resolver.queries_for(query):
+                place, error = await self.attempt(provider, q)
+                failed = failed or error
+                if place:
+                    return place, False
+        return None, failed
+
+    async def resolve(self, location):
+        """Place dict for a raw or cleaned location string, or None"""
+        query = clean_location(location)
+        if len(query) < 2:
+            return None
+        if query in self._pending:
+            # Same string already in flight from another task
+            place, _ = await asyncio.shield(self._pending[query])
+            return place
+        found, place = self.resolver.cached(query)
+        if found:
+            self.resolver.stats['cached'] += 1
+            return place
+        task = self._pending[query] = asyncio.ensure_future(self.lookup(query))
+        try:
+            place, failed = await asyncio.shield(task)
+        finally:
+            del self._pending[query]
+        self.resolver.record(query, place, failed)
+        return place
+
+    def summary(self):
+        return ', '.join(f"{name}: {c['calls']} calls ({c['hits']} hits, {c['errors']} errors, "
+                         f"{c['day_calls']} today)" for name, c in sorted(self.counters.items()))
+
+
+class Watermark:
+    """Highest key below which every key of a sorted list has finished"""
+
+    def __init__(self, keys, last_key=None):
+        self.keys = keys
+        self.done = [False] * len(keys)
+        self.next = 0
+        self.last_key = last_key
+
+    def finish(self, i):
+        self.done[i] = True
+        while self.next < len(self.keys) and self.done[self.next]:
+            self.last_key = self.keys[self.next]
+            self.next += 1
+        return self.last_key
+
+
+async def geocode_locations(conn, geocoder, locations, checkpoint=None, workers=WORKERS, on_result=None):
+    """Resolve each distinct cleaned location concurrently, updating jobs as results arrive
+
+    Returns (queries resolved this run, jobs updated).
+    """
+    by_query = {}
+    for location in locations:
+        by_query.setdefault(clean_location(location), []).append(location)
+    by_query.pop('', None)
+    queries = sorted(by_query)
+
+    last_key = None
+    if checkpoint:
+        last_key, counters = checkpoint.load()
+        geocoder.counters.update(counters)
+        if last_key is not None:
+            queries = [q for q in queries if q > last_key]
+            print(f"Resuming after {last_key.replace(chr(10), ' | ')[:50]!r}: {len(queries)} queries left")
+
+    watermark = Watermark(queries, last_key)
+    pending = iter(range(len(queries)))
+    updated = 0
+    completed = 0
+
+    async def worker():
+        nonlocal updated, completed
+        for i in pending:
+            query = queries[i]
+            place = await geocoder.resolve(query)
+            with conn:
+                updated += write_geocoded(conn, by_query[query], geocoder.resolver.version)
+                if checkpoint:
+                    checkpoint.save(watermark.finish(i), geocoder.counters)
+            completed += 1
+            label = query.replace('\n', ' | ')[:50]
+            print(f"[{completed}/{len(queries)}] {label:50} -> {place['country_code'] if place else 'NO MATCH'}")
+            if on_result:
+                on_result(query, place)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    if checkpoint:
+        # A finished run starts from the top next time (answers are in geocode_cache)
+        with conn:
+            checkpoint.save(None, geocoder.counters)
+    return len(queries), updated
+
+
+def run_geocoding(conn, resolver, run, only_missing=False, limit=None, workers=WORKERS, incremental=True):
+    """Blocking entry point for the update scripts; returns (queries, jobs updated, geocoder)"""
+    locations = distinct_locations(conn, only_missing, incremental, resolver.version)
+    if limit:
+        locations = locations[:limit]
+    geocoder = AsyncGeocoder(resolver)
+    queries, updated = asyncio.run(
+        geocode_locations(conn, geocoder, locations, Checkpoint(conn, run), workers=workers))
+    return queries, updated, geocoder
@@ -0,0 +1,420 @@
+"""One location resolver for all the update_countries* scripts.
+
+Every script used to carry its own clean_location() and geocode each job
+row one by one, although thousands of jobs share a few hundred location
+strings. Here each cleaned string is resolved once, through providers
+tried in a fallback order, and remembered in a geocode_cache table in
+jobs.db. Bulk updates read SELECT DISTINCT location and write countries
+back with one set-based UPDATE ... FROM, so network calls scale with the
+number of distinct locations instead of the number of jobs.
+
+Runs are incremental: each job row records the hash of the cleaned
+location it was resolved from and the GEOCODE_VERSION that resolved it,
+and a trigger clears that marker whenever jobs.location changes (whoever
+writes it, the Node scrapers included). A run only picks up rows without
+a current marker, so re-running on a geocoded DB is one indexed query.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+from gazetteer import get_gazetteer
+import http_client
+from http_client import get_client
+
+DB_PATH = 'jobs.db'
+# No default key: without one, make_providers() leaves LocationIQ out
+LOCATIONIQ_KEY = os.environ.get('LOCATIONIQ_KEY')
+OPENCAGE_KEY = os.environ.get('OPENCAGE_KEY', 'demo')
+TIMEOUT = 10
+# Strings no provider could resolve are retried after this long
+MISS_TTL = 30 * 24 * 3600
+# Bump when resolution changes; rows and cache entries from older versions are redone
+# (1: per-script geocoding, 2: gazetteer first)
+GEOCODE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query TEXT PRIMARY KEY,
+    city TEXT,
+    state TEXT,
+    country TEXT,
+    country_code TEXT,
+    provider TEXT,
+    resolved_at REAL NOT NULL,
+    version INTEGER
+)
+"""
+
+GEOCODE_COLUMNS = {
+    'location_hash': 'TEXT',
+    'geocode_version': 'INTEGER',
+    'geocoded_at': 'REAL',
+}
+
+# Any change to a job's location makes it pending again
+LOCATION_CHANGED_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS jobs_location_changed
+AFTER UPDATE OF location ON jobs
+WHEN OLD.location IS NOT NEW.location
+BEGIN
+    UPDATE jobs SET geocode_version = NULL WHERE id = NEW.id;
+END
+"""
+
+# raw jobs.location -> cleaned query and its hash, for the set-based UPDATEs
+LOCATION_MAP_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS location_map (
+    location TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    hash TEXT NOT NULL
+)
+"""
+
+UPDATE_COUNTRIES_SQL = """
+    UPDATE jobs
+    SET country = g.country_code
+    FROM location_map AS m
+    JOIN geocode_cache AS g ON g.query = m.query
+    WHERE jobs.location = m.location
+      AND g.country_code IS NOT NULL
+      AND jobs.country IS NOT g.country_code
+"""
+
+# Rows whose query the current resolver resolved are done, and so are rows
+# with nothing to look up. Misses stay pending: later runs answer them from
+# geocode_cache until MISS_TTL expires, then ask the providers again.
+# Transient failures have no cache row and stay pending too.
+MARK_GEOCODED_SQL = """
+    UPDATE jobs
+    SET location_hash = m.hash,
+        geocode_version = :version,
+        geocoded_at = :now
+    FROM location_map AS m
+    LEFT JOIN geocode_cache AS g ON g.query = m.query
+    WHERE jobs.location = m.location
+      AND (m.query = '' OR (g.version >= :version AND g.country_code IS NOT NULL))
+      AND (jobs.geocode_version IS NOT :version OR jobs.location_hash IS NOT m.hash)
+"""
+
+
+def clean_location(location):
+    """Remove 'locations' prefix and collapse whitespace on each line"""
+    if not location:
+        return ""
+    cleaned = location.replace("locations\n", "").replace("locations", "")
+    lines = (' '.join(line.split()) for line in cleaned.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def simplify_location(location):
+    """Last part of a complex location string (what LocationIQ retried with)"""
+    cleaned = re.sub(r'^(locations|at|in)\s+', '', location, flags=re.IGNORECASE)
+    for delimiter in [',', '|', '-']:
+        if delimiter in cleaned:
+            parts = [p.strip() for p in cleaned.split(delimiter) if p.strip()]
+            if parts:
+                return parts[-1]
+    words = cleaned.split()
+    if len(words) >= 2:
+        return words[-1]
+    return cleaned
+
+
+def location_hash(query):
+    """Short stable hash of a cleaned location"""
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]
+
+
+def ensure_geocode_cache(conn):
+    conn.execute(SCHEMA)
+    if 'version' not in {row[1] for row in conn.execute('PRAGMA table_info(geocode_cache)')}:
+        # Entries from before versioning are treated as out of date
+        conn.execute('ALTER TABLE geocode_cache ADD COLUMN version INTEGER')
+
+
+def ensure_geocode_columns(conn):
+    """Add the per-job change-tracking columns, index and trigger if missing"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    with conn:
+        for name, sql_type in GEOCODE_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} {sql_type}')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_geocode ON jobs(geocode_version, location_hash)')
+        conn.execute(LOCATION_CHANGED_TRIGGER)
+
+
+def _place(city, state, country, country_code):
+    code = (country_code or '').upper()
+    if not code:
+        return None
+    return {'city': city, 'state': state, 'country': country, 'country_code': code}
+
+
+class NominatimProvider:
+    """OpenStreetMap Nominatim (1 req/s usage policy)"""
+    name = 'nominatim'
+    url = 'https://nominatim.openstreetmap.org/search'
+
+    def missing(self):
+        """Env var that must be set before this provider may be used, if any"""
+        return None if http_client.HTTP_CONTACT else 'HTTP_CONTACT'
+
+    def params(self, query):
+        return {'q': query, 'format': 'json', 'addressdetails': 1, 'limit': 1}
+
+    def geocode(self, query):
+        resp = get_client().get(self.url, params=self.params(query), timeout=TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, list) or not data:
+            return None
+        addr = data[0].get('address', {})
+        return _place(addr.get('city') or addr.get('town') or addr.get('village'),
+                      addr.get('state'), addr.get('country'), addr.get('country_code'))
+
+
+class LocationIQProvider(NominatimProvider):
+    """LocationIQ, Nominatim-compatible responses"""
+    name = 'locationiq'
+    url = 'https://us1.locationiq.com/v1/search'
+
+    def __init__(self, key=None):
+        self.key = key or LOCATIONIQ_KEY
+
+    def missing(self):
+        return None if self.key else 'LOCATIONIQ_KEY'
+
+    def params(self, query):
+        return dict(super().params(query), key=self.key)
+
+
+class PhotonProvider:
+    """Komoot's Photon (OSM data, different server)"""
+    name = 'photon'
+    url = 'https://photon.komoot.io/api/'
+
+    def geocode(self, query):
+        resp = get_client().get(self.url, params={'q': query, 'limit': 1}, timeout=TIMEOUT)
+        resp.raise_for_status()
+        features = resp.json().get('features')
+        if not features:
+            return None
+        props = features[0].get('properties', {})
+        return _place(props.get('city') or props.get('name'), props.get('state'),
+                      props.get('country'), props.get('countrycode'))
+
+
+class OpenCageProvider:
+    name = 'opencage'
+    url = 'https://api.opencagedata.com/geocode/v1/json'
+
+    def __init__(self, key=OPENCAGE_KEY):
+        self.key = key
+
+    def geocode(self, query):
+        resp = get_client().get(self.url, params={'q': query, 'key': self.key, 'limit': 1}, timeout=TIMEOUT)
+        resp.raise_for_status()
+        results = resp.json().get('results')
+        if not results:
+            return None
+        comp = results[0].get('components', {})
+        return _place(comp.get('city') or comp.get('town') or comp.get('village'), comp.get('state'),
+                      comp.get('country'), comp.get('country_code'))
+
+
+class GazetteerProvider:
+    """Offline GeoNames index (gazetteer.py); no network, so it goes first"""
+    name = 'gazetteer'
+
+    def geocode(self, query):
+        return get_gazetteer().resolve(query)
+
+
+PROVIDERS = {
+    'gazetteer': GazetteerProvider,
+    'locationiq': LocationIQProvider,
+    'nominatim': NominatimProvider,
+    'photon': PhotonProvider,
+    'opencage': OpenCageProvider,
+}
+DEFAULT_ORDER = ('gazetteer', 'locationiq', 'nominatim', 'photon')
+
+
+def make_providers(names=DEFAULT_ORDER):
+    """Providers in fallback order, minus those that need a key or contact that isn't set"""
+    providers = []
+    for name in names:
+        provider = PROVIDERS[name]()
+        missing = provider.missing() if hasattr(provider, 'missing') else None
+        if missing:
+            print(f"⚠️  Skipping {name}: set {missing} to use it")
+            continue
+        providers.append(provider)
+    return providers
+
+
+class GeocodeResolver:
+    """Cleaned location string -> place dict, via geocode_cache then providers"""
+
+    def __init__(self, conn, providers=None, miss_ttl=MISS_TTL, simplify=True, version=GEOCODE_VERSION):
+        self.conn = conn
+        self.providers = make_providers() if providers is None else providers
+        self.miss_ttl = miss_ttl
+        self.simplify = simplify
+        self.version = version
+        ensure_geocode_cache(conn)
+        self.stats = {'cached': 0, 'resolved': 0, 'missed': 0, 'errors': 0, 'calls': 0}
+
+    def cached(self, query):
+        """(found, place) from geocode_cache; expired misses and old versions count as not found"""
+        row = self.conn.execute(
+            'SELECT city, state, country, country_code, resolved_at, version FROM geocode_cache WHERE query = ?',
+            (query,),
+        ).fetchone()
+        if not row or (row[5] or 0) < self.version:
+            return False, None
+        city, state, country, code, resolved_at, _ = row
+        if code is None:
+            return time.time() - resolved_at < self.miss_ttl, None
+        return True, {'city': city, 'state': state, 'country': country, 'country_code': code}
+
+    def queries_for(self, query):
+        """The full string, then maybe its last part"""
+        queries = [query]
+        simple = simplify_location(query) if self.simplify else None
+        if simple and simple != query:
+            queries.append(simple)
+        return queries
+
+    def attempt(self, provider, q):
+        """(place, failed) for one provider call"""
+        try:
+            place = provider.geocode(q)
+        except Exception as e:
+            return self.account(provider, q, None, e)
+        return self.account(provider, q, place)
+
+    def account(self, provider, q, place, error=None):
+        """Count one provider call and tag its place; returns (place, failed)"""
+        self.stats['calls'] += 1
+        if error is not None:
+            print(f"      {provider.name} error for '{q}': {str(error)[:60]}")
+            self.stats['errors'] += 1
+            return None, True
+        return (dict(place, provider=provider.name) if place else None), False
+
+    def lookup(self, query):
+        """Ask each provider in turn (full string, then maybe its last part)"""
+        failed = False
+        for provider in self.providers:
+            for q in self.queries_for(query):
+                place, error = self.attempt(provider, q)
+                failed = failed or error
+                if place:
+                    return place, False
+        return None, failed
+
+    def store(self, query, place):
+        place = place or {}
+        with self.conn:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO geocode_cache
+                    (query, city, state, country, country_code, provider, resolved_at, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (query, place.get('city'), place.get('state'), place.get('country'),
+                  place.get('country_code'), place.get('provider'), time.time(), self.version))
+
+    def resolve(self, location):
+        """Place dict for a raw or cleaned location string, or None"""
+        query = clean_location(location)
+        if len(query) < 2:
+            return None
+        found, place = self.cached(query)
+        if found:
+            self.stats['cached'] += 1
+            return place
+        place, failed = self.lookup(query)
+        self.record(query, place, failed)
+        return place
+
+    def record(self, query, place, failed):
+        """Count a lookup's outcome and remember it in geocode_cache"""
+        if place:
+            self.stats['resolved'] += 1
+        else:
+            self.stats['missed'] += 1
+        # Transient errors are not remembered as misses
+        if place or not failed:
+            self.store(query, place)
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['cached']} from cache, {s['resolved']} resolved, {s['missed']} unresolved, "
+                f"{s['calls']} provider calls ({s['errors']} errors)")
+
+
+def distinct_locations(conn, only_missing=False, incremental=True, version=GEOCODE_VERSION):
+    """Locations still to geocode (all of them when incremental is False)"""
+    sql = "SELECT DISTINCT location FROM jobs WHERE location IS NOT NULL AND location != ''"
+    params = ()
+    if incremental:
+        ensure_geocode_columns(conn)
+        sql += " AND (geocode_version IS NULL OR geocode_version < ?)"
+        params = (version,)
+    if only_missing:
+        sql += " AND (country IS NULL OR country = '')"
+    return [row[0] for row in conn.execute(sql, params)]
+
+
+def write_geocoded(conn, locations, version=GEOCODE_VERSION):
+    """Copy cached countries onto jobs with these locations and mark them done
+
+    Runs in the caller's transaction; returns the number of jobs whose country changed.
+    """
+    ensure_geocode_columns(conn)
+    conn.execute(LOCATION_MAP_SQL)
+    conn.execute('DELETE FROM location_map')
+    rows = []
+    for location in locations:
+        query = clean_location(location)
+        rows.append((location, query, location_hash(query)))
+    conn.executemany('INSERT OR IGNORE INTO location_map (location, query, hash) VALUES (?, ?, ?)', rows)
+    updated = conn.execute(UPDATE_COUNTRIES_SQL).rowcount
+    conn.execute(MARK_GEOCODED_SQL, {'version': version, 'now': time.time()})
+    return updated
+
+
+def apply_countries(conn, locations, version=GEOCODE_VERSION):
+    """Copy cached country codes onto every job with one of these locations"""
+    with conn:
+        return write_geocoded(conn, locations, version)
+
+
+def update_countries(conn, resolver, only_missing=False, limit=None, progress_every=25, incremental=True):
+    """Resolve each distinct location once, then update jobs in one statement
+
+    Returns (distinct locations, jobs updated).
+    """
+    locations = distinct_locations(conn, only_missing, incremental, resolver.version)
+    if limit:
+        locations = locations[:limit]
+    queries = sorted({clean_location(loc) for loc in locations} - {''})
+    print(f"{len(locations)} distinct locations -> {len(queries)} cleaned queries\n")
+
+    for i, query in enumerate(queries, 1):
+        place = resolver.resolve(query)
+        label = query.replace('\n', ' | ')[:50]
+        print(f"[{i}/{len(queries)}] {label:50} -> {place['country_code'] if place else 'NO MATCH'}")
+        if i % progress_every == 0:
+            print(f"\n--- {resolver.summary()} ---\n")
+
+    return len(locations), apply_countries(conn, locations, resolver.version)
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute('PRAGMA busy_timeout = 10000')
+    return conn
@@ -0,0 +1,190 @@
+"""On-disk HTTP response cache with ETag / Last-Modified revalidation.
+
+Job pages are re-fetched on every enrichment or re-enrichment pass. This
+keeps compressed bodies in a small SQLite file keyed by canonical URL, and
+sends If-None-Match / If-Modified-Since on the next fetch so an unchanged
+page comes back as a bodyless 304 and the stored copy is reused. The file
+is capped in size; least recently used entries are evicted first.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from http_client import MAX_BODY_BYTES, read_capped
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.environ.get('HTTP_CACHE_PATH', os.path.join(BACKEND_DIR, 'cache', 'http_cache.db'))
+MAX_BYTES = int(float(os.environ.get('HTTP_CACHE_MAX_MB', 200)) * 1024 * 1024)
+TIMEOUT = 15
+
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', 'ref', 'src'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+"""
+
+
+def canonical_url(url):
+    """Lowercase scheme/host, drop fragment and tracking params, sort the query"""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith('utm_')
+    )
+    path = parts.path or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def cache_key(url):
+    return hashlib.sha1(canonical_url(url).encode('utf-8')).hexdigest()
+
+
+class CachedResponse:
+    """The bits of a response callers use; from_cache is True when served from disk"""
+
+    def __init__(self, status_code, content, encoding=None, headers=None, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpCache:
+    """SQLite-backed response cache; safe to share between fetch threads"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, session=None, max_body_bytes=MAX_BODY_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        # Anything with a requests-style get(), e.g. http_client.HttpClient
+        self.session = session
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0,
+                      'evicted': 0, 'bytes_saved': 0, 'truncated': 0}
+
+    def lookup(self, url):
+        """Stored response for url (no network, no revalidation), or None"""
+        key = cache_key(url)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, content_type, encoding, body FROM responses WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row:
+                with self.conn:
+                    self.conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+        if not row:
+            return None
+        etag, last_modified, content_type, encoding, body = row
+        headers = {'ETag': etag, 'Last-Modified': last_modified, 'Content-Type': content_type}
+        return CachedResponse(200, zlib.decompress(body), encoding,
+                              {k: v for k, v in headers.items() if v}, from_cache=True)
+
+    def store(self, url, content, headers, encoding=None):
+        """Keep a response if it carries a validator we can revalidate with"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        body = zlib.compress(content, 6)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO responses
+                    (key, url, etag, last_modified, content_type, encoding, body, size, stored_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (cache_key(url), canonical_url(url), etag, last_modified, headers.get('Content-Type'),
+                  encoding, body, len(body), now, now))
+            self.stats['stored'] += 1
+            self._evict()
+        return True
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.executemany('DELETE FROM responses WHERE key = ?', doomed)
+        self.stats['evicted'] += len(doomed)
+
+    def get(self, url, session=None, headers=None, timeout=TIMEOUT):
+        """GET url, revalidating a stored copy; returns a CachedResponse"""
+        cached = self.lookup(url)
+        request_headers = dict(headers or {})
+        if cached:
+            if cached.headers.get('ETag'):
+                request_headers['If-None-Match'] = cached.headers['ETag']
+            if cached.headers.get('Last-Modified'):
+                request_headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        response = (session or self.session or requests).get(url, headers=request_headers, timeout=timeout,
+                                                             stream=True)
+        with response:
+            if response.status_code == 304 and cached:
+                with self._lock:
+                    self.stats['hits'] += 1
+                    self.stats['revalidated'] += 1
+                    self.stats['bytes_saved'] += len(cached.content)
+                return cached
+            content, truncated = read_capped(response, self.max_body_bytes)
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self.stats['truncated'] += 1 if truncated else 0
+        # A cut-off body is not the page; don't let it answer a later 304
+        if response.status_code == 200 and not truncated:
+            self.store(url, content, response.headers, response.encoding)
+        return CachedResponse(response.status_code, content, response.encoding,
+                              dict(response.headers))
+
+    def size(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+    def summary(self):
+        s = self.stats
+        lookups = s['hits'] + s['misses']
+        rate = s['hits'] / lookups * 100 if lookups else 0
+        return (f"HTTP cache: {s['hits']} hits / {s['misses']} misses ({rate:.0f}%), "
+                f"{s['bytes_saved'] / 1024:.0f} KB saved, {s['evicted']} evicted, {s['truncated']} truncated")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,192 @@
+"""Shared outbound HTTP client: pooled keep-alive sessions + token-bucket pacing.
+
+Every script used to call bare requests.get and throttle with a global
+time.sleep, which both reconnects on every call and slows down requests to
+hosts that have nothing to do with each other. Here each host gets its own
+pooled session, and requests are paced by a token bucket per provider
+(LocationIQ, Nominatim, ...) or per host (one per Workday tenant), so
+different hosts proceed in parallel and the same host is paced exactly.
+
+Rates can be overridden with HTTP_RATE_<NAME> env vars, e.g.
+HTTP_RATE_LOCATIONIQ=1 or HTTP_RATE_DEFAULT=2 (requests per second).
+HTTP_CONTACT (an email or URL) is sent in the User-Agent; Nominatim's
+usage policy requires one, so geocoding leaves Nominatim out without it.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = 10
+TIMEOUT = 15
+# Bodies are read in chunks and cut off past this many bytes
+MAX_BODY_BYTES = int(float(os.environ.get('HTTP_MAX_BODY_MB', 5)) * 1024 * 1024)
+CHUNK_SIZE = 65536
+HTTP_CONTACT = os.environ.get('HTTP_CONTACT')
+USER_AGENT = f'CareerAssistant/1.0 ({HTTP_CONTACT})' if HTTP_CONTACT else 'CareerAssistant/1.0'
+
+# name -> (host suffixes, requests/second); None means no limit
+PROVIDERS = {
+    'locationiq': (('locationiq.com',), 2.0),                # free plan: 2 req/s
+    'nominatim': (('nominatim.openstreetmap.org',), 1.0),    # usage policy: 1 req/s
+    'photon': (('photon.komoot.io',), 1.0),
+    'opencage': (('api.opencagedata.com',), 1.0),
+    'ollama': (('localhost:11434', '127.0.0.1:11434'), None),
+}
+
+# Politeness limits applied per host (so per Workday tenant)
+HOST_RATES = (
+    ('myworkdayjobs.com', 2.0),
+    ('myworkdaysite.com', 2.0),
+)
+DEFAULT_HOST_RATE = 4.0
+
+
+def _env_rate(name, default):
+    value = os.environ.get(f'HTTP_RATE_{name.upper()}')
+    if value is None:
+        return default
+    return float(value) if float(value) > 0 else None
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a request may go out
+
+    Callers reserve their slot under the lock and sleep outside it, so
+    concurrent callers are spaced exactly 1/rate apart instead of racing.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0.0
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.requests += 1
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def read_capped(response, max_bytes=MAX_BODY_BYTES, chunk_size=CHUNK_SIZE):
+    """Body of a stream=True response, never more than max_bytes in memory
+
+    Returns (content, truncated).
+    """
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size):
+        body += chunk
+        if len(body) > max_bytes:
+            del body[max_bytes:]
+            return bytes(body), True
+    return bytes(body), False
+
+
+class HttpClient:
+    """requests-compatible get/post with per-host pools and rate limits"""
+
+    def __init__(self, providers=None, host_rates=HOST_RATES, default_rate=DEFAULT_HOST_RATE,
+                 pool_size=POOL_SIZE, timeout=TIMEOUT, user_agent=USER_AGENT):
+        providers = PROVIDERS if providers is None else providers
+        self.providers = {name: (hosts, _env_rate(name, rate)) for name, (hosts, rate) in providers.items()}
+        self.host_rates = host_rates
+        self.default_rate = _env_rate('default', default_rate)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._sessions = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def provider_for(self, host):
+        for name, (suffixes, _) in self.providers.items():
+            if any(host == s or host.endswith('.' + s) for s in suffixes):
+                return name
+        return None
+
+    def _rate_for(self, host, provider):
+        if provider:
+            return self.providers[provider][1]
+        for suffix, rate in self.host_rates:
+            if host.endswith(suffix):
+                return rate
+        return self.default_rate
+
+    def bucket_for(self, url, provider=None):
+        """Bucket a request to url is paced by (None when unlimited)"""
+        host = urlsplit(url).netloc.lower()
+        provider = provider or self.provider_for(host)
+        key = provider or host
+        with self._lock:
+            if key not in self._buckets:
+                rate = self._rate_for(host, provider)
+                self._buckets[key] = TokenBucket(rate) if rate else None
+            return self._buckets[key]
+
+    def session_for(self, url):
+        """Keep-alive session for the url's host"""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc.lower()}"
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = self.user_agent
+                self._sessions[key] = session
+            return session
+
+    def request(self, method, url, provider=None, **kwargs):
+        bucket = self.bucket_for(url, provider)
+        if bucket:
+            bucket.acquire()
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def get(self, url, provider=None, **kwargs):
+        return self.request('GET', url, provider=provider, **kwargs)
+
+    def post(self, url, provider=None, **kwargs):
+        return self.request('POST', url, provider=provider, **kwargs)
+
+    def summary(self):
+        """One line per bucket: requests sent and time spent waiting"""
+        with self._lock:
+            buckets = [(k, b) for k, b in self._buckets.items() if b]
+        return [f"{key}: {b.requests} requests @ {b.rate:g}/s, waited {b.waited:.1f}s"
+                for key, b in sorted(buckets)]
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,223 @@
+"""Rank jobs against a resume with a TF-IDF matrix over every vectorized job.
+
+Loads job_vectors (see job_vectors.py) into one scipy CSC matrix, jobs x
+terms, holding 1 + ln tf. IDF comes from the loaded matrix's column
+counts and each job's tf-idf norm is computed once at load, so scoring a
+resume is one sparse matrix-vector product over the columns of the
+resume's terms, a division by the norms and an argpartition for the top
+k. Only the most informative MAX_QUERY_TERMS resume terms are used: the
+rest barely move the ranking but touch the longest columns.
+
+refresh() reads only vectors written since the last load or refresh
+(seq above the last seen). A changed job's old row is masked out and its
+new vector goes to a small delta matrix, which is folded into the main
+one by reloading once it passes COMPACT_RATIO of the rows. IDF and norms
+are recomputed on reload; between reloads new rows use the same IDF.
+
+Needs numpy and scipy (pip install numpy scipy); vectorizing jobs does not.
+
+Usage: python job_matcher.py update
+       python job_matcher.py match (--resume ID | --file PATH | --text TEXT) [--limit N]
+       python job_matcher.py rebuild
+"""
+import argparse
+import math
+import time
+from collections import Counter
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError as e:
+    raise ImportError(f"job_matcher needs numpy and scipy (pip install numpy scipy): {e}") from e
+
+from geocoding import DB_PATH, connect
+from job_vectors import ensure_job_vectors, reset_job_vectors, tokenize, update_job_vectors
+
+TOP_K = 50
+MAX_QUERY_TERMS = 64
+# Reload (and re-weight) once the delta holds this share of the rows
+COMPACT_RATIO = 0.1
+
+
+def rows_to_csr(rows, columns):
+    """CSR matrix from (terms blob, weights blob) rows (blobs are appended, not kept)"""
+    terms = bytearray()
+    weights = bytearray()
+    lengths = []
+    for term_blob, weight_blob in rows:
+        terms += term_blob
+        weights += weight_blob
+        lengths.append(len(term_blob) // 4)
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    return sparse.csr_matrix((np.frombuffer(weights, dtype=np.float32), np.frombuffer(terms, dtype=np.int32),
+                              indptr), shape=(len(lengths), columns))
+
+
+def row_norms(matrix, idf):
+    """||tf * idf|| of each CSR row"""
+    rows = np.repeat(np.arange(matrix.shape[0], dtype=np.int32), np.diff(matrix.indptr))
+    weighted = matrix.data * idf[matrix.indices]
+    return np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=matrix.shape[0]))
+
+
+class JobMatcher:
+    """In-memory TF-IDF matrix of jobs.db's job vectors"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        ensure_job_vectors(conn)
+        self.load()
+
+    def load(self):
+        """(Re)build the matrix from every stored vector"""
+        self.vocab = dict(self.conn.execute('SELECT term, id FROM match_terms'))
+        columns = max(self.vocab.values(), default=0) + 1
+        self.seq = 0
+        self.job_ids = []
+
+        def vectors():
+            for job_id, seq, terms, weights in self.conn.execute(
+                    'SELECT job_id, seq, terms, weights FROM job_vectors ORDER BY seq'):
+                self.job_ids.append(job_id)
+                self.seq = seq
+                yield terms, weights
+
+        matrix = rows_to_csr(vectors(), columns)
+        self.row_of = {job_id: row for row, job_id in enumerate(self.job_ids)}
+
+        df = np.bincount(matrix.indices, minlength=columns)
+        self.jobs = matrix.shape[0]
+        self.idf = (np.log((1 + self.jobs) / (1 + df)) + 1).astype(np.float32)
+        self.norms = row_norms(matrix, self.idf).astype(np.float32)
+        self.norms[self.norms == 0] = np.inf
+        self.main = matrix.tocsc()
+        self.delta = []
+        self.delta_matrix = None
+        # Rows superseded by a newer vector of the same job
+        self.replaced = []
+
+    def refresh(self):
+        """Pick up vectors written since the last load/refresh; returns how many"""
+        rows = self.conn.execute('SELECT job_id, seq, terms, weights FROM job_vectors WHERE seq > ? ORDER BY seq',
+                                 (self.seq,)).fetchall()
+        if not rows:
+            return 0
+        if len(self.delta) + len(rows) > COMPACT_RATIO * max(self.main.shape[0], 1000):
+            self.load()
+            return len(rows)
+
+        self.vocab.update(self.conn.execute('SELECT term, id FROM match_terms WHERE id >= ?',
+                                            (len(self.idf),)))
+        columns = max(self.vocab.values(), default=0) + 1
+        if columns > len(self.idf):
+            # Terms new since the load get the IDF of a term seen in one job
+            unseen = np.float32(math.log((1 + self.jobs) / 2) + 1)
+            self.idf = np.concatenate([self.idf, np.full(columns - len(self.idf), unseen, dtype=np.float32)])
+
+        for job_id, seq, terms, weights in rows:
+            if job_id in self.row_of:
+                self.replaced.append(self.row_of[job_id])
+            self.row_of[job_id] = len(self.job_ids)
+            self.job_ids.append(job_id)
+            self.delta.append((terms, weights))
+            self.seq = seq
+        self.delta_matrix = rows_to_csr(self.delta, columns)
+        delta_norms = row_norms(self.delta_matrix, self.idf).astype(np.float32)
+        delta_norms[delta_norms == 0] = np.inf
+        self.norms = np.concatenate([self.norms[:self.main.shape[0]], delta_norms])
+        self.norms[self.replaced] = np.inf
+        self.delta_matrix = self.delta_matrix.tocsc()
+        return len(rows)
+
+    def query_vector(self, text):
+        """(term ids, weights) for text: tf-idf, top MAX_QUERY_TERMS terms, unit length"""
+        counts = Counter(word for word in tokenize(text) if word in self.vocab)
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        terms = np.array([self.vocab[word] for word in counts], dtype=np.int64)
+        weights = (1 + np.log(np.array(list(counts.values()), dtype=np.float32))) * self.idf[terms]
+        if len(terms) > MAX_QUERY_TERMS:
+            keep = np.argpartition(-weights, MAX_QUERY_TERMS)[:MAX_QUERY_TERMS]
+            terms, weights = terms[keep], weights[keep]
+        return terms, weights / np.linalg.norm(weights)
+
+    def scores(self, text):
+        """Cosine similarity of text with every row (masked rows score 0)"""
+        terms, weights = self.query_vector(text)
+        # Job side is tf * idf, so the product needs the idf once more
+        weights = weights * self.idf[terms]
+        scores = np.zeros(len(self.job_ids), dtype=np.float32)
+        inside = terms < self.main.shape[1]
+        if inside.any():
+            scores[:self.main.shape[0]] = self.main[:, terms[inside]] @ weights[inside]
+        if self.delta_matrix is not None:
+            scores[self.main.shape[0]:] = self.delta_matrix[:, terms] @ weights
+        return scores / self.norms
+
+    def match(self, text, k=TOP_K):
+        """Best k (job_id, score) for a resume text, best first"""
+        scores = self.scores(text)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.job_ids[row], float(scores[row])) for row in top if scores[row] > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match a resume against every vectorized job')
+    parser.add_argument('command', choices=['update', 'rebuild', 'match'])
+    parser.add_argument('--resume', type=int, help='id in the resumes table')
+    parser.add_argument('--file', help='resume as a text file')
+    parser.add_argument('--text', help='resume text')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    ensure_job_vectors(conn)
+    if args.command == 'rebuild':
+        reset_job_vectors(conn)
+    if args.command in ('update', 'rebuild'):
+        start = time.perf_counter()
+        count = update_job_vectors(conn)
+        print(f"✅ Vectorized {count} jobs in {time.perf_counter() - start:.1f}s")
+        conn.close()
+        return
+
+    if args.resume is not None:
+        row = conn.execute('SELECT text FROM resumes WHERE id = ?', (args.resume,)).fetchone()
+        if not row:
+            parser.error(f'no resume with id {args.resume}')
+        text = row[0]
+    elif args.file:
+        with open(args.file) as f:
+            text = f.read()
+    elif args.text:
+        text = args.text
+    else:
+        parser.error('match needs --resume, --file or --text')
+
+    update_job_vectors(conn)
+    start = time.perf_counter()
+    matcher = JobMatcher(conn)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    results = matcher.match(text, args.limit)
+    took = (time.perf_counter() - start) * 1000
+    jobs = {row[0]: row[1:] for row in conn.execute(
+        f"SELECT id, title, company, status FROM jobs WHERE id IN ({', '.join('?' * len(results))})",
+        [job_id for job_id, _ in results])}
+    for job_id, score in results:
+        if job_id in jobs:
+            title, company, status = jobs[job_id]
+            print(f"{score:.3f}  {(title or '')[:50]:50}  {(company or '')[:20]:20}  {status}")
+    print(f"⏱️  Loaded {len(matcher.job_ids)} jobs in {loaded:.1f}s, matched in {took:.1f} ms")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
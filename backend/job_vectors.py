@@ -0,0 +1,257 @@
+"""Sparse term vectors of jobs, stored in jobs.db for resume matching.
+
+Each job's title, summary, description and skills are tokenized (accents
+folded, stop words dropped, skill aliases such as "JS" -> javascript
+applied) into term counts. A row of job_vectors holds the job's term ids
+and sublinear term frequencies (1 + ln tf) as packed int32/float32
+blobs; match_terms maps terms to ids and counts how many jobs use each.
+IDF weighting happens at query time in job_matcher, which loads these
+rows into one sparse matrix, so adding a job never re-weights the rest.
+
+Updates are incremental like the skills index: jobs.match_version
+records the MATCH_VERSION a job was vectorized with and a trigger clears
+it when any of the text columns change. Every write (including the empty
+vector left behind by a deleted job) gets a new seq, so a running matcher
+only has to read rows with seq above the last one it saw. A deleted
+job's terms are queued in match_deleted and taken off match_terms.df by
+the next update.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+from skills_index import ALIASES, parse_skills
+
+# Bump when tokenization changes; every job is re-vectorized
+MATCH_VERSION = 1
+BATCH_SIZE = 1000
+# Longest vectors keep their highest tf-idf terms (bounds matrix memory)
+MAX_DOC_TERMS = 200
+# Skills count this many times over a word in the description
+SKILL_BOOST = 3
+TEXT_COLUMNS = ('title', 'summary', 'description', 'mandatory_skills', 'preferred_skills')
+
+STOP_WORDS = set("""
+a about above after all also an and any are as at be been being both but by can could do does
+each etc for from had has have how if in into is it its may more most must not of on or other
+our out over per should so some such than that the their them then there these they this those
+through to under up upon us was we were what when where which while who will with within would
+you your yours able ability including new work working experience years year strong role team
+teams ensure across well using use based make help join position company job candidate
+de la el en y los las del con por para una un que se su al lo como mas o sus es ser e
+""".split())
+
+# Single-word aliases only; multi-word skill names stay as separate words
+WORD_ALIASES = {alias: name for alias, name in ALIASES.items()
+                if re.fullmatch(r'[a-z0-9+#]+', alias) and re.fullmatch(r'[a-z0-9+#]+', name)}
+
+_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS match_terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL,
+    df INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS job_vectors (
+    job_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    terms BLOB NOT NULL,
+    weights BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_vectors_seq ON job_vectors(seq);
+CREATE TABLE IF NOT EXISTS match_deleted (
+    terms BLOB NOT NULL
+);
+"""
+
+MATCH_CHANGED_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS jobs_match_changed
+AFTER UPDATE OF {', '.join(TEXT_COLUMNS)} ON jobs
+WHEN {' OR '.join(f'OLD.{c} IS NOT NEW.{c}' for c in TEXT_COLUMNS)}
+BEGIN
+    UPDATE jobs SET match_version = NULL WHERE id = NEW.id;
+END
+"""
+
+# Leave an empty vector with a new seq so loaded matrices drop the job too,
+# and queue its terms so their df goes down (triggers can't unpack the blob)
+JOB_DELETED_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS jobs_match_deleted
+AFTER DELETE ON jobs
+BEGIN
+    INSERT INTO match_deleted (terms)
+    SELECT terms FROM job_vectors WHERE job_id = OLD.id AND length(terms) > 0;
+    UPDATE job_vectors
+    SET terms = x'', weights = x'', seq = (SELECT MAX(seq) + 1 FROM job_vectors)
+    WHERE job_id = OLD.id;
+END
+"""
+
+
+@lru_cache(maxsize=1 << 18)
+def _term(word):
+    word = WORD_ALIASES.get(word, word)
+    if len(word) > 1 and word not in STOP_WORDS and not word.isdigit():
+        return word
+    return None
+
+
+def tokenize(text):
+    """Lowercase, accent-folded words of text minus stop words, with aliases applied"""
+    if not text:
+        return []
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return [term for term in map(_term, _TOKEN.findall(text)) if term]
+
+
+def job_terms(title, summary, description, mandatory, preferred):
+    """Term counts for one job"""
+    counts = Counter(tokenize(title))
+    counts.update(tokenize(summary))
+    counts.update(tokenize(description))
+    for skill in parse_skills(mandatory) + parse_skills(preferred):
+        for word in tokenize(skill):
+            counts[word] += SKILL_BOOST
+    return counts
+
+
+def ensure_job_vectors(conn):
+    """Create the vector tables, the jobs.match_version marker, its index and triggers"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    with conn:
+        for statement in SCHEMA.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        if 'match_version' not in existing:
+            conn.execute('ALTER TABLE jobs ADD COLUMN match_version INTEGER')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_match ON jobs(match_version)')
+        conn.execute(MATCH_CHANGED_TRIGGER)
+        if 'match_terms' in tables and 'match_deleted' not in tables:
+            # Its delete trigger never lowered df: replace it and recount once
+            conn.execute('DROP TRIGGER IF EXISTS jobs_match_deleted')
+            recount_df(conn)
+        conn.execute(JOB_DELETED_TRIGGER)
+
+
+def recount_df(conn):
+    """Set match_terms.df from the stored vectors; caller owns the transaction"""
+    counts = Counter()
+    for (terms,) in conn.execute('SELECT terms FROM job_vectors'):
+        counts.update(array('i', terms))
+    conn.execute('UPDATE match_terms SET df = 0')
+    conn.executemany('UPDATE match_terms SET df = ? WHERE id = ?', [(df, term_id) for term_id, df in counts.items()])
+
+
+class Vectorizer:
+    """Assigns term ids (cached), prunes long vectors and keeps match_terms.df current"""
+
+    def __init__(self, conn, version=MATCH_VERSION):
+        self.conn = conn
+        self.version = version
+        self.terms = {term: [term_id, df] for term_id, term, df in conn.execute(
+            'SELECT id, term, df FROM match_terms')}
+        self.by_id = {entry[0]: entry for entry in self.terms.values()}
+
+    def term(self, word):
+        entry = self.terms.get(word)
+        if entry is None:
+            # Another worker may have added it since this cache was loaded
+            self.conn.execute('INSERT OR IGNORE INTO match_terms (term) VALUES (?)', (word,))
+            term_id, df = self.conn.execute('SELECT id, df FROM match_terms WHERE term = ?', (word,)).fetchone()
+            entry = self.terms[word] = self.by_id[term_id] = [term_id, df]
+        return entry
+
+    def vector(self, counts, jobs):
+        """(term ids, 1 + ln tf) of a job, longest vectors pruned by tf-idf"""
+        terms = self.terms
+        entries = [(terms.get(word) or self.term(word), 1 + math.log(tf)) for word, tf in counts.items()]
+        if len(entries) > MAX_DOC_TERMS:
+            log_jobs = math.log(jobs + 1)
+            entries = heapq.nlargest(MAX_DOC_TERMS, entries,
+                                     key=lambda e: e[1] * (log_jobs - math.log(e[0][1] + 1)))
+        entries.sort(key=lambda e: e[0][0])
+        return array('i', [e[0][0] for e in entries]), array('f', [e[1] for e in entries])
+
+    def vectorize_batch(self, rows):
+        """Replace the vectors of (id, *TEXT_COLUMNS) rows; caller owns the (write) transaction"""
+        job_ids = [row[0] for row in rows]
+        seq, jobs = self.conn.execute('SELECT COALESCE(MAX(seq), 0) + 1, COUNT(*) FROM job_vectors').fetchone()
+        changes = Counter()
+        for (terms,) in self.conn.execute(
+                f"SELECT terms FROM job_vectors WHERE job_id IN ({', '.join('?' * len(rows))})", job_ids):
+            changes.subtract(array('i', terms))
+
+        vectors = []
+        for job_id, *text in rows:
+            terms, weights = self.vector(job_terms(*text), jobs)
+            changes.update(terms)
+            vectors.append((job_id, seq, terms.tobytes(), weights.tobytes()))
+        self.conn.executemany("""
+            INSERT INTO job_vectors (job_id, seq, terms, weights) VALUES (?, ?, ?, ?)
+            ON CONFLICT(job_id) DO UPDATE SET seq = excluded.seq, terms = excluded.terms, weights = excluded.weights
+        """, vectors)
+        self.conn.executemany('UPDATE jobs SET match_version = ? WHERE id = ?',
+                              [(self.version, job_id) for job_id in job_ids])
+        self._apply(changes)
+        return len(vectors)
+
+    def drop_deleted(self):
+        """Take the terms of deleted jobs off df; caller owns the (write) transaction"""
+        changes = Counter()
+        for (terms,) in self.conn.execute('SELECT terms FROM match_deleted'):
+            changes.subtract(array('i', terms))
+        if changes:
+            self.conn.execute('DELETE FROM match_deleted')
+            self._apply(changes)
+
+    def _apply(self, changes):
+        deltas = [(delta, term_id) for term_id, delta in changes.items() if delta]
+        self.conn.executemany('UPDATE match_terms SET df = df + ? WHERE id = ?', deltas)
+        for delta, term_id in deltas:
+            if term_id in self.by_id:
+                self.by_id[term_id][1] += delta
+
+
+def update_job_vectors(conn, limit=None, batch_size=BATCH_SIZE, version=MATCH_VERSION):
+    """Vectorize jobs that are new or changed; returns the number written
+
+    Call ensure_job_vectors(conn) once beforehand.
+    """
+    vectorizer = Vectorizer(conn, version)
+    written = 0
+    while limit is None or written < limit:
+        size = batch_size if limit is None else min(batch_size, limit - written)
+        with conn:
+            # Take the write lock before reading seq and old vectors, so two
+            # workers can't hand out the same seq or count a df change twice
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            vectorizer.drop_deleted()
+            rows = conn.execute(f"""
+                SELECT id, {', '.join(TEXT_COLUMNS)} FROM jobs
+                WHERE match_version IS NULL OR match_version < ?
+                LIMIT ?
+            """, (version, size)).fetchall()
+            if not rows:
+                break
+            vectorizer.vectorize_batch(rows)
+        written += len(rows)
+    return written
+
+
+def reset_job_vectors(conn):
+    """Drop every stored vector and mark all jobs for re-vectorizing"""
+    ensure_job_vectors(conn)
+    with conn:
+        conn.execute('DELETE FROM job_vectors')
+        conn.execute('DELETE FROM match_terms')
+        conn.execute('DELETE FROM match_deleted')
+        conn.execute('UPDATE jobs SET match_version = NULL WHERE match_version IS NOT NULL')
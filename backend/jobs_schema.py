@@ -0,0 +1,64 @@
+"""The jobs table as db.js creates it, for scratch databases.
+
+Tests and benchmarks build throwaway jobs.db files from this instead of
+each keeping its own copy. It includes the columns added by later
+migrations that the Python scripts rely on being there (the ensure_*
+functions add their own columns, indexes and triggers on top).
+"""
+import sqlite3
+import uuid
+
+# jobs table as created by db.js plus the columns added by later migrations
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    company TEXT NOT NULL,
+    url TEXT UNIQUE NOT NULL,
+    description TEXT,
+    source TEXT,
+    status TEXT DEFAULT 'new',
+    location TEXT,
+    work_type TEXT,
+    salary TEXT,
+    salary_min INTEGER,
+    salary_max INTEGER,
+    experience_level TEXT,
+    job_type TEXT,
+    summary TEXT,
+    mandatory_skills TEXT,
+    preferred_skills TEXT,
+    posted_date TEXT,
+    webarchive_path TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    requires_citizenship INTEGER DEFAULT 0,
+    no_visa_sponsorship INTEGER DEFAULT 0,
+    enriched_at TEXT,
+    scraped_at DATETIME DEFAULT NULL,
+    currency TEXT DEFAULT NULL,
+    applied INTEGER DEFAULT 0,
+    remote_option TEXT DEFAULT 'unknown',
+    country TEXT
+)
+"""
+
+
+def make_jobs_conn(columns=(), rows=(), path=':memory:'):
+    """Connection to a jobs table (in memory by default) holding rows of the given columns"""
+    conn = sqlite3.connect(path)
+    conn.execute(JOBS_SCHEMA)
+    if columns:
+        with conn:
+            conn.executemany(f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                             rows)
+    return conn
+
+
+def make_jobs_db(path, n, status='new'):
+    """Create a jobs.db at path with n minimal job rows; returns the ids"""
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    conn = make_jobs_conn(('id', 'title', 'company', 'url', 'source', 'status'),
+                          ((job_id, f'Job {i}', 'bank', f'https://example.com/job/{i}', 'bench', status)
+                           for i, job_id in enumerate(ids)), path)
+    conn.close()
+    return ids
@@ -0,0 +1,182 @@
+"""SQLite FTS5 full-text index over jobs.
+
+Search used to be a LIKE '%...%' scan in db.js and a lowercase-and-concat
+filter over every job in the browser. jobs_fts is an external-content
+FTS5 table over title, company, location, summary and description that
+stores only the inverted index (the text stays in jobs) and is kept in
+sync by triggers, so rows written by the Node scrapers are indexed the
+same as the enricher's updates. The UPDATE trigger only fires when an
+indexed column changes, so status and lease updates cost nothing.
+
+Queries are ranked with bm25 (title and company weigh most) and every
+term is a prefix match, backed by 2- and 3-character prefix indexes.
+"location:toronto" limits a term to one column and "quoted words" match
+as a phrase. Accents are folded ("Mexico" finds "México").
+
+The index is keyed on jobs.rowid, which VACUUM may renumber (jobs has a
+TEXT primary key): run `python search_index.py rebuild` after a VACUUM,
+and `optimize` now and then to merge index segments.
+"""
+import argparse
+import re
+import sqlite3
+import sys
+import time
+
+from geocoding import DB_PATH, connect
+
+COLUMNS = ('title', 'company', 'location', 'summary', 'description')
+# bm25 weight per column, in COLUMNS order
+WEIGHTS = (10.0, 6.0, 4.0, 2.0, 1.0)
+LIMIT = 50
+
+_cols = ', '.join(COLUMNS)
+_new = ', '.join(f'new.{c}' for c in COLUMNS)
+_old = ', '.join(f'old.{c}' for c in COLUMNS)
+
+SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    {_cols},
+    content='jobs',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+)
+"""
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts (rowid, {_cols}) VALUES (new.rowid, {_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, {_cols}) VALUES ('delete', old.rowid, {_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF {_cols} ON jobs
+    WHEN {' OR '.join(f'old.{c} IS NOT new.{c}' for c in COLUMNS)}
+    BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, {_cols}) VALUES ('delete', old.rowid, {_old});
+        INSERT INTO jobs_fts (rowid, {_cols}) VALUES (new.rowid, {_new});
+    END
+    """,
+]
+
+# Rank inside the index first so only the returned page is read from jobs
+SEARCH_SQL = f"""
+    WITH hits AS (
+        SELECT rowid, bm25(jobs_fts, {', '.join(map(str, WEIGHTS))}) AS score
+        FROM jobs_fts
+        WHERE jobs_fts MATCH ?
+        ORDER BY score
+        LIMIT ? OFFSET ?
+    )
+    SELECT jobs.id, jobs.title, jobs.company, jobs.location, jobs.summary, hits.score
+    FROM hits
+    JOIN jobs ON jobs.rowid = hits.rowid
+    ORDER BY hits.score
+"""
+
+
+def ensure_search_index(conn):
+    """Create jobs_fts and its triggers if missing; returns the number of jobs indexed on creation"""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone()
+    with conn:
+        conn.execute(SCHEMA)
+        for trigger in TRIGGERS:
+            conn.execute(trigger)
+        if exists:
+            return 0
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+    return conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+
+def fts_query(text):
+    """FTS5 MATCH expression for a search box string, or None if it has no terms
+
+    Words become prefix terms that must all match; "quoted words" are a
+    phrase; column:word limits a word or phrase to one indexed column.
+    Anything else (operators, punctuation) is treated as plain text.
+    """
+    terms = []
+    for column, phrase, word in re.findall(r'(?:(\w+):)?(?:"([^"]*)"|([^\s"]+))', text):
+        words = re.findall(r'\w+', (phrase or word).lower())
+        if not words:
+            continue
+        if phrase:
+            term = '"' + ' '.join(words) + '"'
+        else:
+            term = ' AND '.join(f'"{w}"*' for w in words)
+        if column.lower() in COLUMNS:
+            term = f'{column.lower()} : ({term})'
+        elif column:
+            term = f'"{column.lower()}"* AND {term}'
+        terms.append(term)
+    return ' AND '.join(terms) or None
+
+
+def search(conn, text, limit=LIMIT, offset=0):
+    """Best-ranked jobs for a search string: (id, title, company, location, summary, score) rows"""
+    query = fts_query(text)
+    if not query:
+        return []
+    return conn.execute(SEARCH_SQL, (query, limit, offset)).fetchall()
+
+
+def rebuild(conn):
+    """Re-index every job from scratch (after a VACUUM or a failed check)"""
+    with conn:
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+
+def optimize(conn):
+    """Merge the index's b-tree segments into one (faster queries, smaller file)"""
+    with conn:
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+
+
+def check(conn):
+    """True if the index matches the jobs table"""
+    try:
+        conn.execute("INSERT INTO jobs_fts (jobs_fts, rank) VALUES ('integrity-check', 1)")
+    except sqlite3.DatabaseError as e:
+        print(f"❌ {e}")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage and query the jobs full-text index')
+    parser.add_argument('command', choices=['rebuild', 'optimize', 'check', 'search'])
+    parser.add_argument('query', nargs='?', default='')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    created = ensure_search_index(conn)
+    if created:
+        print(f"🔎 Built search index for {created} jobs")
+
+    start = time.perf_counter()
+    if args.command == 'rebuild':
+        rebuild(conn)
+    elif args.command == 'optimize':
+        optimize(conn)
+    elif args.command == 'check':
+        ok = check(conn)
+        print("✅ Index matches jobs" if ok else "Run: python search_index.py rebuild")
+        sys.exit(0 if ok else 1)
+    else:
+        for job_id, title, company, location, _, score in search(conn, args.query, args.limit):
+            where = (location or '').replace('\n', ' | ')
+            print(f"{score:7.2f}  {title[:50]:50}  {company[:20]:20}  {where[:30]}")
+    print(f"⏱️  {args.command} took {(time.perf_counter() - start) * 1000:.1f} ms")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,433 @@
+"""Canonical job URL keys and a persistent seen-URL filter for ingestion.
+
+The scrapers de-duplicate with `SELECT id FROM jobs WHERE url = ?` after
+cutting the query string, so one Workday requisition reached through
+/en-US/ and /fr-CA/, another location slug or a tracking link is stored,
+fetched and enriched once per spelling. canonical_key() reduces a job URL
+to what identifies the posting on its ATS (the same site types as
+getSiteType in continuous_scraper.js):
+
+    workday    tenant + requisition id (locale, site and slugs ignored)
+    oracle     host + requisition id (/job/<id>, preview/<id>, requisitionId=)
+    icims      host + /jobs/<id>
+    eightfold  host + /job/<pid> or pid=
+    ultipro    tenant + opportunityId (recruiting / recruiting2 / ukg.net)
+    avature    host + JobDetail id or jobId=
+    generic    host + path + query, without scheme, www., fragment,
+               tracking and display parameters
+
+Keys are stored in jobs.url_key (indexed; a trigger clears it when the
+url changes, and update_url_keys() fills in rows written by the Node
+scrapers). SeenUrls keeps a Bloom filter of every key in backend/cache,
+so checking a candidate that was never seen costs a few bit lookups and
+no query; only possible hits go to the index. merge_duplicates() folds
+rows that share a key into one; it deletes rows, so it only runs from
+the merge command here (the enricher just keys new rows).
+
+Usage: python seen_urls.py {update|merge|rebuild|check URL...} [--dry-run]
+"""
+import argparse
+import hashlib
+import math
+import os
+import re
+import struct
+import uuid
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from geocoding import DB_PATH, connect
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BLOOM_PATH = os.environ.get('SEEN_URLS_PATH', os.path.join(BACKEND_DIR, 'cache', 'seen_urls.bloom'))
+BATCH_SIZE = 5000
+# Bloom filter sizing: at least this many keys, at this false positive rate
+MIN_CAPACITY = 100_000
+FALSE_POSITIVE_RATE = 0.01
+
+# Query parameters that never identify a posting
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'ref', 'referer', 'referrer',
+    'src', 'source', 'sourcetype', 'gh_src', 'trk', 'trackingid', 'codes', 'iis', 'iisn',
+    'keyword', 'keywords', 'q', 'query', 'search', 'locale', 'lang', 'language', 'hl',
+    'in_iframe', 'mobile', 'needsredirect', 'jan1offset', 'jun1offset',
+}
+
+# Posting content a merged row may take from the rows it replaces (never
+# bookkeeping such as index versions, leases or duplicate_of)
+MERGE_COLUMNS = (
+    'description', 'summary', 'location', 'country', 'salary', 'salary_min', 'salary_max', 'currency',
+    'experience_level', 'work_type', 'job_type', 'posted_date', 'mandatory_skills', 'preferred_skills',
+    'webarchive_path',
+)
+# Statuses the scrapers and enricher set; anything else (applied, rejected...) is the user's triage
+PIPELINE_STATUSES = ('new', 'scraped', 'processing', 'enriched')
+
+URL_KEY_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS jobs_url_key_changed
+AFTER UPDATE OF url ON jobs
+WHEN OLD.url IS NOT NEW.url
+BEGIN
+    UPDATE jobs SET url_key = NULL WHERE id = NEW.id;
+END
+"""
+
+_LOCALE = re.compile(r'^[a-z]{2}([-_][a-z]{2})?$', re.IGNORECASE)
+_WORKDAY_REQ = re.compile(r'_([a-z]*[-_]?\d[\w-]*)$', re.IGNORECASE)
+_ORACLE_ID = re.compile(r'/(?:job|preview)/(\d+)(?:/|$)')
+_ICIMS_ID = re.compile(r'/jobs/(\d+)(?:/|$)')
+_EIGHTFOLD_ID = re.compile(r'/job/(\d+)(?:/|$)')
+_AVATURE_ID = re.compile(r'/JobDetail/(?:[^/]+/)?(\d+)(?:/|$)', re.IGNORECASE)
+
+_MAGIC = b'SEENURL1'
+_HEADER = struct.Struct('<8sQIQq')
+
+
+def site_type(url):
+    """ATS family of a URL, as getSiteType in continuous_scraper.js"""
+    if 'oraclecloud.com' in url or 'fa.ocs' in url:
+        return 'oracle'
+    if 'myworkdayjobs.com' in url or 'myworkdaysite.com' in url:
+        return 'workday'
+    if 'eightfold.ai' in url:
+        return 'eightfold'
+    if 'icims.com' in url:
+        return 'icims'
+    if 'ultipro' in url or 'ukg.net' in url:
+        return 'ultipro'
+    if 'avature.net' in url:
+        return 'avature'
+    return 'generic'
+
+
+def _params(query):
+    """{lowercased name: value} of a query string"""
+    return {name.lower(): value for name, value in parse_qsl(query, keep_blank_values=True)}
+
+
+def _search(pattern, path):
+    found = pattern.search(path)
+    return found.group(1) if found else None
+
+
+def _workday_key(host, segments):
+    # /<locale>/<site>/job/... or /<locale>/recruiting/...; a two-letter site ("TD") is no locale
+    if (len(segments) > 2 and _LOCALE.match(segments[0])
+            and (segments[2] in ('job', 'details') or segments[1] == 'recruiting')):
+        segments = segments[1:]
+    if host.endswith('.myworkdaysite.com') and segments[:1] == ['recruiting'] and len(segments) > 1:
+        # wdN.myworkdaysite.com/recruiting/<tenant>/<site>/job/...
+        tenant, segments = segments[1], segments[2:]
+    else:
+        # <tenant>.wdN.myworkdayjobs.com/<site>/job/...
+        tenant = host.split('.')[0]
+    if len(segments) < 3 or segments[1] not in ('job', 'details'):
+        return None
+    req = _WORKDAY_REQ.search(segments[-1])
+    return f'workday:{tenant}:{req.group(1)}'.lower() if req else None
+
+
+def _ultipro_key(segments, params):
+    # <host>/<tenant>/JobBoard/<board>/OpportunityDetail?opportunityId=<guid>
+    opportunity = params.get('opportunityid')
+    if not segments or not opportunity:
+        return None
+    return f'ultipro:{segments[0]}:{opportunity}'.lower()
+
+
+def canonical_key(url):
+    """Key that is equal for every spelling of one posting's URL"""
+    parts = urlsplit(url.strip())
+    host = parts.hostname or ''
+    host = host[4:] if host.startswith('www.') else host
+    segments = [s for s in parts.path.split('/') if s]
+    path = '/' + '/'.join(segments)
+    params = _params(parts.query)
+
+    kind = site_type(url)
+    found = None
+    if kind == 'workday':
+        key = _workday_key(host, segments)
+        if key:
+            return key
+    elif kind == 'ultipro':
+        key = _ultipro_key(segments, params)
+        if key:
+            return key
+    elif kind == 'oracle':
+        found = params.get('requisitionid') or _search(_ORACLE_ID, path)
+    elif kind == 'icims':
+        found = _search(_ICIMS_ID, path)
+    elif kind == 'eightfold':
+        found = params.get('pid') or _search(_EIGHTFOLD_ID, path)
+    elif kind == 'avature':
+        found = params.get('jobid') or _search(_AVATURE_ID, path)
+    if found:
+        return f'{kind}:{host}:{found}'
+
+    kept = sorted((name, value) for name, value in params.items()
+                  if name not in TRACKING_PARAMS and not name.startswith('utm_'))
+    return f"{host}{path.rstrip('/') or '/'}" + (f'?{urlencode(kept)}' if kept else '')
+
+
+def clean_url(url):
+    """URL to store: without fragment and tracking parameters"""
+    parts = urlsplit(url.strip())
+    kept = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if name.lower() not in TRACKING_PARAMS and not name.lower().startswith('utm_')]
+    return parts._replace(query=urlencode(kept), fragment='').geturl()
+
+
+def ensure_url_keys(conn):
+    """Add jobs.url_key, its index and the trigger that clears it when url changes"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    with conn:
+        if 'url_key' not in existing:
+            conn.execute('ALTER TABLE jobs ADD COLUMN url_key TEXT')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_url_key ON jobs(url_key)')
+        conn.execute(URL_KEY_TRIGGER)
+
+
+def update_url_keys(conn, limit=None, batch_size=BATCH_SIZE):
+    """Key jobs whose url_key is missing; returns the keys written
+
+    Call ensure_url_keys(conn) once beforehand.
+    """
+    keys = []
+    while limit is None or len(keys) < limit:
+        size = batch_size if limit is None else min(batch_size, limit - len(keys))
+        with conn:
+            rows = conn.execute('SELECT id, url FROM jobs WHERE url_key IS NULL LIMIT ?', (size,)).fetchall()
+            if not rows:
+                break
+            batch = [(canonical_key(url or job_id), job_id) for job_id, url in rows]
+            conn.executemany('UPDATE jobs SET url_key = ? WHERE id = ?', batch)
+        keys.extend(key for key, _ in batch)
+    return keys
+
+
+def merge_duplicates(conn, keys=None, dry_run=False):
+    """Fold jobs sharing a url_key into one row; returns (groups, rows removed, groups skipped)
+
+    keys limits the pass to those keys (default: every duplicated key).
+    The row kept is the one the user triaged (a status outside
+    PIPELINE_STATUSES, or applied), then enriched, then oldest. Its empty
+    content columns (MERGE_COLUMNS) are filled from the rows removed, and
+    jobs.duplicate_of links to removed rows are pointed at it. Groups with
+    a row an enricher is still processing are skipped, so its result is
+    not written to a deleted row; run the merge again later.
+    """
+    if keys is None:
+        keys = [row[0] for row in conn.execute(
+            'SELECT url_key FROM jobs WHERE url_key IS NOT NULL GROUP BY url_key HAVING COUNT(*) > 1')]
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+    fill = [c for c in MERGE_COLUMNS if c in columns]
+    order = "status = 'enriched' DESC, rowid"
+    if 'applied' in columns:
+        order = f'COALESCE(applied, 0) DESC, {order}'
+    order = f"status NOT IN ({', '.join('?' * len(PIPELINE_STATUSES))}) DESC, {order}"
+    groups = removed = skipped = 0
+    for key in dict.fromkeys(keys):
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM jobs WHERE url_key = ? ORDER BY {order}",
+                            (key, *PIPELINE_STATUSES)).fetchall()
+        if len(rows) < 2:
+            continue
+        keep, *others = [dict(zip(columns, row)) for row in rows]
+        if any(row['status'] == 'processing' for row in (keep, *others)):
+            skipped += 1
+            continue
+        groups += 1
+        removed += len(others)
+        if dry_run:
+            continue
+        merged = {c: next((r[c] for r in others if r[c] is not None), None)
+                  for c in fill if keep[c] is None}
+        merged = {c: v for c, v in merged.items() if v is not None}
+        other_ids = [r['id'] for r in others]
+        marks = ', '.join('?' * len(other_ids))
+        with conn:
+            conn.execute(f'DELETE FROM jobs WHERE id IN ({marks})', other_ids)
+            if merged:
+                conn.execute(f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in merged)} WHERE id = ?",
+                             [*merged.values(), keep['id']])
+            if 'duplicate_of' in columns:
+                conn.execute(f'UPDATE jobs SET duplicate_of = ? WHERE duplicate_of IN ({marks})',
+                             [keep['id'], *other_ids])
+    return groups, removed, skipped
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (blake2b double hashing)"""
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        self.capacity = max(1, capacity)
+        self.bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenUrls:
+    """Seen-URL checks and inserts for the ingestion path (one jobs.db connection)
+
+    The Bloom filter is saved to path with the highest jobs rowid it has
+    seen; opening it adds only rows past that mark (and keys new scraper
+    rows). It is rebuilt from jobs.url_key when missing, outgrown, or
+    ahead of the database (a replaced or vacuumed jobs.db).
+    """
+
+    def __init__(self, conn, path=BLOOM_PATH):
+        self.conn = conn
+        self.path = path
+        self.stats = {'checks': 0, 'filtered': 0, 'found': 0, 'false_positives': 0, 'added': 0}
+        ensure_url_keys(conn)
+        self.bloom, self.synced = self._load()
+        self.sync()
+
+    def _load(self):
+        max_rowid = self.conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM jobs').fetchone()[0]
+        try:
+            with open(self.path, 'rb') as f:
+                magic, capacity, hashes, count, synced = _HEADER.unpack(f.read(_HEADER.size))
+                bloom = BloomFilter(capacity)
+                f.readinto(bloom.array)
+            if magic == _MAGIC and hashes == bloom.hashes and synced <= max_rowid:
+                bloom.count = count
+                return bloom, synced
+        except (OSError, struct.error):
+            pass
+        return self.rebuild(), max_rowid
+
+    def rebuild(self):
+        """New filter sized for the current keys plus headroom, filled from jobs.url_key"""
+        update_url_keys(self.conn)
+        count = self.conn.execute('SELECT COUNT(*) FROM jobs WHERE url_key IS NOT NULL').fetchone()[0]
+        bloom = BloomFilter(max(MIN_CAPACITY, count * 2))
+        for (key,) in self.conn.execute('SELECT url_key FROM jobs WHERE url_key IS NOT NULL'):
+            bloom.add(key)
+        self.bloom = bloom
+        return bloom
+
+    def sync(self):
+        """Key and add rows written since the last sync; returns how many keys were added"""
+        # Rows from the Node scrapers, or whose url changed, have no key yet
+        keyed = update_url_keys(self.conn)
+        rows = self.conn.execute('SELECT rowid, url_key FROM jobs WHERE rowid > ? AND url_key IS NOT NULL',
+                                 (self.synced,)).fetchall()
+        fresh = {key for _, key in rows}
+        added = [key for key in keyed if key not in fresh] + list(fresh)
+        for key in added:
+            self.bloom.add(key)
+        if rows:
+            self.synced = max(rowid for rowid, _ in rows)
+        if self.bloom.count > self.bloom.capacity:
+            self.rebuild()
+        return len(added)
+
+    def seen(self, url):
+        """id of the job already stored under this URL's key, or None"""
+        return self._lookup(canonical_key(url))
+
+    def _lookup(self, key):
+        self.stats['checks'] += 1
+        if key not in self.bloom:
+            self.stats['filtered'] += 1
+            return None
+        row = self.conn.execute('SELECT id FROM jobs WHERE url_key = ? LIMIT 1', (key,)).fetchone()
+        self.stats['found' if row else 'false_positives'] += 1
+        return row[0] if row else None
+
+    def add(self, title, company, url, source, status='new'):
+        """Insert a job unless its URL was seen; returns the new id or None"""
+        key = canonical_key(url)
+        if self._lookup(key):
+            return None
+        job_id = str(uuid.uuid4())
+        with self.conn:
+            cursor = self.conn.execute("""
+                INSERT OR IGNORE INTO jobs (id, title, company, url, source, status, url_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (job_id, title, company, clean_url(url), source, status, key))
+        self.bloom.add(key)
+        if not cursor.rowcount:
+            return None
+        self.synced = max(self.synced, cursor.lastrowid)
+        self.stats['added'] += 1
+        return job_id
+
+    def ingest(self, jobs, source):
+        """Add {title, company, url} dicts; returns (added, duplicates) like processJobBatch"""
+        added = sum(self.add(job['title'], job['company'], job['url'], source) is not None for job in jobs)
+        return added, len(jobs) - added
+
+    def save(self):
+        """Write the filter next to the other caches (atomically)"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.bloom.capacity, self.bloom.hashes, self.bloom.count, self.synced))
+            f.write(self.bloom.array)
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        s = self.stats
+        return (f"Seen URLs: {s['checks']} checks, {s['filtered']} answered by the Bloom filter, "
+                f"{s['found']} already stored, {s['false_positives']} false positives, {s['added']} added")
+
+    def close(self):
+        self.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Canonical URL keys, duplicate merging and seen-URL checks')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('update', help='key jobs that have no url_key yet')
+    merge = sub.add_parser('merge', help='fold existing rows that share a url_key into one')
+    merge.add_argument('--dry-run', action='store_true', help='only count the duplicates')
+    sub.add_parser('rebuild', help='re-key every job and rebuild the Bloom filter')
+    check = sub.add_parser('check', help='show the key of each URL and whether it is stored')
+    check.add_argument('urls', nargs='+')
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    ensure_url_keys(conn)
+    if args.command == 'rebuild':
+        with conn:
+            conn.execute('UPDATE jobs SET url_key = NULL')
+        if os.path.exists(BLOOM_PATH):
+            os.remove(BLOOM_PATH)
+    if args.command in ('update', 'rebuild'):
+        seen = SeenUrls(conn)
+        print(f"✅ {seen.bloom.count} keys in the filter ({len(seen.bloom.array) / 1e6:.1f} MB)")
+        seen.close()
+    elif args.command == 'merge':
+        update_url_keys(conn)
+        groups, removed, skipped = merge_duplicates(conn, dry_run=args.dry_run)
+        verb = 'Would remove' if args.dry_run else 'Removed'
+        print(f"🧹 {verb} {removed} duplicate rows from {groups} postings")
+        if skipped:
+            print(f"⏳ Skipped {skipped} postings an enricher is processing; merge again once it is done")
+    else:
+        seen = SeenUrls(conn)
+        for url in args.urls:
+            job_id = seen.seen(url)
+            print(f"{'✅' if job_id else '🆕'} {canonical_key(url)}  {job_id or ''}")
+        seen.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
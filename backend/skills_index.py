@@ -0,0 +1,314 @@
+"""Normalized skills index over jobs.mandatory_skills / preferred_skills.
+
+Skills are stored per job as JSON text, so "jobs requiring Python and
+SQL" meant JSON.parse on every row. Here each skill string is normalized
+(case, punctuation, version suffixes, aliases like "JS" -> javascript)
+into one row of a `skills` dictionary, and a `job_skills` posting table
+lists the jobs for each skill, clustered by skill (WITHOUT ROWID), so a
+query reads only the postings of the skills it names. AND queries
+INTERSECT those lists (rarest skill first), OR queries UNION them.
+
+Indexing is incremental in the same way as geocoding: each job records
+the SKILLS_VERSION it was indexed with, and a trigger clears that marker
+whenever either skills column changes (whoever writes it). index_skills()
+picks up only unmarked rows; deleted jobs drop their postings by trigger.
+"""
+import argparse
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+
+from geocoding import DB_PATH, connect
+
+# Bump when normalization changes; every job is re-indexed
+# (2: aliases before versions, product numbers and qualifiers kept)
+SKILLS_VERSION = 2
+BATCH_SIZE = 2000
+MAX_SKILL_CHARS = 40
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS skills (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    label TEXT NOT NULL,
+    job_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS job_skills (
+    skill_id INTEGER NOT NULL,
+    job_id TEXT NOT NULL,
+    required INTEGER NOT NULL,
+    PRIMARY KEY (skill_id, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_job_skills_job ON job_skills(job_id);
+"""
+
+SKILLS_CHANGED_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS jobs_skills_changed
+AFTER UPDATE OF mandatory_skills, preferred_skills ON jobs
+WHEN OLD.mandatory_skills IS NOT NEW.mandatory_skills OR OLD.preferred_skills IS NOT NEW.preferred_skills
+BEGIN
+    UPDATE jobs SET skills_version = NULL WHERE id = NEW.id;
+END
+"""
+
+JOB_DELETED_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS jobs_skills_deleted
+AFTER DELETE ON jobs
+BEGIN
+    UPDATE skills SET job_count = job_count - 1
+    WHERE id IN (SELECT skill_id FROM job_skills WHERE job_id = OLD.id);
+    DELETE FROM job_skills WHERE job_id = OLD.id;
+END
+"""
+
+# normalized spelling -> canonical name
+ALIASES = {
+    'js': 'javascript', 'ecmascript': 'javascript', 'es6': 'javascript', 'java script': 'javascript',
+    'ts': 'typescript',
+    'node': 'node.js', 'nodejs': 'node.js', 'node js': 'node.js',
+    'react.js': 'react', 'reactjs': 'react', 'react js': 'react',
+    'vue.js': 'vue', 'vuejs': 'vue',
+    'angularjs': 'angular', 'angular.js': 'angular',
+    'py': 'python', 'python3': 'python',
+    'golang': 'go',
+    'csharp': 'c#', 'c sharp': 'c#',
+    'cpp': 'c++',
+    'postgres': 'postgresql', 'postgre sql': 'postgresql', 'psql': 'postgresql',
+    'mssql': 'sql server', 'ms sql': 'sql server', 'microsoft sql server': 'sql server',
+    'structured query language': 'sql',
+    'ms excel': 'excel', 'microsoft excel': 'excel', 'advanced excel': 'excel',
+    'powerbi': 'power bi', 'microsoft power bi': 'power bi',
+    'k8s': 'kubernetes',
+    'amazon web services': 'aws',
+    'google cloud': 'gcp', 'google cloud platform': 'gcp',
+    'microsoft azure': 'azure',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'scrum': 'agile', 'agile methodologies': 'agile', 'agile methodology': 'agile',
+    'ms office': 'microsoft office', 'office 365': 'microsoft office',
+    'english language': 'english', 'inglés': 'english', 'ingles': 'english',
+    'español': 'spanish', 'espanol': 'spanish',
+}
+
+# Names whose number is part of the product, not a version ("Windows 10", "Web 2.0")
+NUMBERED_NAMES = {'windows', 'web', 'oauth', 'industry', 'dynamics', 'microsoft'}
+
+# Trailing versions: "Python 3.11", "Java 8+", "Angular v12", "Excel (2016)"
+# (a version needs a space before it, so S3, EC2 and C++ stay intact)
+_VERSION = re.compile(r'\s*\(\s*v?\d[\w.+ ]*\)$|\s+v?\d+(\.(\d+|x))*\+?$')
+# Proficiency notes in parentheses; other qualifiers ("SQL (PostgreSQL)") are kept
+_LEVEL = re.compile(r'\s*\(\s*(advanced|intermediate|basic|beginner|expert|proficient|fluent|native|strong|'
+                    r'preferred|required|mandatory|desired|optional|nice to have|a plus|plus|or similar|'
+                    r'or equivalent|good to have)\s*\)', re.IGNORECASE)
+_SPACES = re.compile(r'[\s_]+')
+
+
+@lru_cache(maxsize=65536)
+def normalize_skill(text):
+    """(canonical name, display label) for a raw skill string, or None"""
+    if not isinstance(text, str):
+        return None
+    # Leading ".", "#" and "+" belong to the name (.NET)
+    label = _SPACES.sub(' ', text).strip().lstrip(',;:-*• ').rstrip(' .,;:-*•')
+    if label.lower() in ALIASES:
+        name = ALIASES[label.lower()]
+        return name, name
+    unversioned = _VERSION.sub('', label).strip()
+    if unversioned.lower() not in NUMBERED_NAMES:
+        label = unversioned
+    label = _LEVEL.sub('', label).rstrip(' .,;:-')
+    name = label.lower()
+    if not name or len(name) > MAX_SKILL_CHARS:
+        return None
+    name = ALIASES.get(name, name)
+    return name, label if name == label.lower() else name
+
+
+def parse_skills(value):
+    """Skill strings from a jobs column (JSON array, or comma-separated text)"""
+    if not value:
+        return []
+    try:
+        items = json.loads(value)
+    except ValueError:
+        items = value.split(',')
+    if isinstance(items, str):
+        items = items.split(',')
+    return [item for item in items if isinstance(item, str)] if isinstance(items, list) else []
+
+
+def ensure_skills_index(conn):
+    """Create the skills tables, the jobs.skills_version marker, its index and triggers"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    with conn:
+        for statement in SCHEMA.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        if 'skills_version' not in existing:
+            conn.execute('ALTER TABLE jobs ADD COLUMN skills_version INTEGER')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_skills ON jobs(skills_version)')
+        conn.execute(SKILLS_CHANGED_TRIGGER)
+        conn.execute(JOB_DELETED_TRIGGER)
+
+
+class SkillsIndexer:
+    """Resolves names to skills.id (cached) and rewrites jobs' postings"""
+
+    def __init__(self, conn, version=SKILLS_VERSION):
+        self.conn = conn
+        self.version = version
+        self.ids = dict(conn.execute('SELECT name, id FROM skills'))
+
+    def skill_id(self, name, label):
+        if name not in self.ids:
+            # Another worker may have added it since this cache was loaded
+            self.conn.execute('INSERT OR IGNORE INTO skills (name, label) VALUES (?, ?)', (name, label))
+            self.ids[name] = self.conn.execute('SELECT id FROM skills WHERE name = ?', (name,)).fetchone()[0]
+        return self.ids[name]
+
+    def postings(self, job_id, mandatory, preferred):
+        found = {}
+        for required, raw in ((0, preferred), (1, mandatory)):
+            for text in parse_skills(raw):
+                normalized = normalize_skill(text)
+                if normalized:
+                    found[self.skill_id(*normalized)] = required
+        return [(skill_id, job_id, required) for skill_id, required in found.items()]
+
+    def index_batch(self, rows):
+        """Replace the postings of (id, mandatory, preferred) rows; caller owns the (write) transaction"""
+        job_ids = [row[0] for row in rows]
+        counts = Counter()
+        for skill_id, count in self.conn.execute(
+                f"SELECT skill_id, COUNT(*) FROM job_skills WHERE job_id IN ({', '.join('?' * len(rows))}) "
+                "GROUP BY skill_id", job_ids):
+            counts[skill_id] -= count
+        self.conn.executemany('DELETE FROM job_skills WHERE job_id = ?', [(job_id,) for job_id in job_ids])
+        postings = sorted(p for row in rows for p in self.postings(*row))
+        self.conn.executemany('INSERT INTO job_skills (skill_id, job_id, required) VALUES (?, ?, ?)', postings)
+        self.conn.executemany('UPDATE jobs SET skills_version = ? WHERE id = ?',
+                              [(self.version, job_id) for job_id in job_ids])
+        counts.update(p[0] for p in postings)
+        self.conn.executemany('UPDATE skills SET job_count = job_count + ? WHERE id = ?',
+                              [(delta, skill_id) for skill_id, delta in counts.items() if delta])
+        return len(postings)
+
+
+def index_skills(conn, limit=None, batch_size=BATCH_SIZE, version=SKILLS_VERSION):
+    """Index jobs whose skills are new or changed; returns (jobs, postings) written
+
+    Call ensure_skills_index(conn) once beforehand.
+    """
+    indexer = SkillsIndexer(conn, version)
+    jobs = postings = 0
+    while limit is None or jobs < limit:
+        size = batch_size if limit is None else min(batch_size, limit - jobs)
+        with conn:
+            # Write lock first: the job_count deltas are computed from the old postings
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute("""
+                SELECT id, mandatory_skills, preferred_skills FROM jobs
+                WHERE skills_version IS NULL OR skills_version < ?
+                LIMIT ?
+            """, (version, size)).fetchall()
+            if not rows:
+                break
+            postings += indexer.index_batch(rows)
+        jobs += len(rows)
+    return jobs, postings
+
+
+def reset_skills_index(conn):
+    """Mark every job for re-indexing (the next index_skills redoes them all)"""
+    ensure_skills_index(conn)
+    with conn:
+        conn.execute('UPDATE jobs SET skills_version = NULL WHERE skills_version IS NOT NULL')
+
+
+def skill_ids(conn, names):
+    """{raw name: (skill id, job_count) or None}"""
+    found = {}
+    for raw in names:
+        normalized = normalize_skill(raw)
+        row = conn.execute('SELECT id, job_count FROM skills WHERE name = ?',
+                           (normalized[0],)).fetchone() if normalized else None
+        found[raw] = row
+    return found
+
+
+def find_jobs(conn, all_of=(), any_of=(), required=False, limit=None):
+    """ids of jobs with every skill in all_of and at least one in any_of
+
+    required=True only counts mandatory skills. Works on the posting lists
+    alone: one index range per skill, intersected rarest first.
+    """
+    if not all_of and not any_of:
+        return []
+    flag = ' AND required = 1' if required else ''
+    selects, params = [], []
+
+    wanted = skill_ids(conn, all_of)
+    if any(row is None for row in wanted.values()):
+        return []
+    for skill_id, _ in sorted(set(wanted.values()), key=lambda row: row[1]):
+        selects.append(f'SELECT job_id FROM job_skills WHERE skill_id = ?{flag}')
+        params.append(skill_id)
+
+    if any_of:
+        either = [row[0] for row in skill_ids(conn, any_of).values() if row]
+        if not either:
+            return []
+        selects.append(f"SELECT job_id FROM job_skills WHERE skill_id IN ({', '.join('?' * len(either))}){flag}")
+        params.extend(either)
+
+    sql = ' INTERSECT '.join(selects)
+    if limit:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    return [row[0] for row in conn.execute(sql, params)]
+
+
+def top_skills(conn, limit=30):
+    return conn.execute('SELECT label, job_count FROM skills ORDER BY job_count DESC, name LIMIT ?',
+                        (limit,)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the normalized skills index')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('update', help='index new or changed jobs')
+    sub.add_parser('rebuild', help='re-index every job')
+    top = sub.add_parser('top', help='most common skills')
+    top.add_argument('--limit', type=int, default=30)
+    find = sub.add_parser('find', help='jobs having ALL of the given skills')
+    find.add_argument('skills', nargs='*')
+    find.add_argument('--any', default='', help='comma-separated: at least one of these too')
+    find.add_argument('--required', action='store_true', help='mandatory skills only')
+    find.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    ensure_skills_index(conn)
+    if args.command == 'rebuild':
+        reset_skills_index(conn)
+    if args.command in ('update', 'rebuild'):
+        jobs, postings = index_skills(conn)
+        print(f"✅ Indexed {jobs} jobs ({postings} skill postings)")
+    elif args.command == 'top':
+        for label, count in top_skills(conn, args.limit):
+            print(f"{count:8}  {label}")
+    else:
+        any_of = [s for s in args.any.split(',') if s.strip()]
+        ids = find_jobs(conn, args.skills, any_of, args.required, args.limit)
+        for job_id, title, company in conn.execute(
+                f"SELECT id, title, company FROM jobs WHERE id IN ({', '.join('?' * len(ids))})", ids):
+            print(f"{job_id[:8]}  {title[:60]:60}  {company}")
+        print(f"🔎 {len(ids)} jobs")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
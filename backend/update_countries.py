@@ -1,79 +1,43 @@
-import sqlite3
-import requests
-import time
-import json
-
-DB_PATH = "jobs.db"
-USER_AGENT = "CareerAssistant/1.0 (contact@example.com)"
-
-def clean_location(location):
-    """Remove 'locations' prefix and clean up"""
-    if not location:
-        return ""
-    cleaned = location.replace("locations\n", "").replace("locations", "").strip()
-    return cleaned
-
-def get_country(location):
-    if not location or len(location.strip()) < 2:
-        return None, "Empty"
-    
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": location.strip(),
-        "format": "json",
-        "addressdetails": 1,
-        "limit": 1
-    }
-    headers = {"User-Agent": USER_AGENT}
-    
-    try:
-        # Add verify=False to bypass SSL if needed
-        resp = requests.get(url, params=params, headers=headers, timeout=15, verify=True)
-        resp.raise_for_status()
-        data = resp.json()
-        
-        if data and len(data) > 0:
-            address = data[0].get("address", {})
-            country_code = address.get("country_code", "").upper()
-            if country_code:
-                return country_code, None
-        return None, "No match"
-        
-    except Exception as e:
-        return None, f"Error: {str(e)}"
-
-# Test connectivity first
-print("Testing API connectivity...")
-test_country, test_error = get_country("London")
-if test_country:
-    print(f"✓ API working: London -> {test_country}\n")
-else:
-    print(f"✗ API ERROR: {test_error}")
-    print("\nTrying without SSL verification...")
-    # Retry with SSL disabled
-    try:
-        resp = requests.get("https://nominatim.openstreetmap.org/search?q=London&format=json&limit=1", 
-                          headers={"User-Agent": USER_AGENT}, verify=False, timeout=15)
-        print(f"SSL bypass result: {resp.status_code}")
-    except Exception as e:
-        print(f"Still failing: {e}")
-    exit(1)
-
-# Process records
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-cursor.execute("SELECT id, location FROM jobs LIMIT 10")
-records = cursor.fetchall()
-
-print("\n=== PROCESSING 10 RECORDS ===\n")
-for i, (job_id, location) in enumerate(records, 1):
-    cleaned = clean_location(location)
-    country, error = get_country(cleaned)
-    if country:
-        print(f"[{i}] ✓ {cleaned[:40]:40} -> {country}")
+import argparse
+
+from geocode_runner import WORKERS, run_geocoding
+from geocoding import (DB_PATH, DEFAULT_ORDER, PROVIDERS, GeocodeResolver, connect, make_providers,
+                       update_countries)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill jobs.country by geocoding each distinct location once')
+    parser.add_argument('--providers', default=','.join(DEFAULT_ORDER),
+                        help=f"fallback order, any of: {', '.join(PROVIDERS)}")
+    parser.add_argument('--missing-only', action='store_true',
+                        help='only locations of jobs without a country yet')
+    parser.add_argument('--all', action='store_true',
+                        help='redo every location, not only new or changed ones')
+    parser.add_argument('--limit', type=int, help='stop after N distinct locations (for testing)')
+    parser.add_argument('--concurrent', action='store_true',
+                        help='keep several requests in flight per provider and resume interrupted runs')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    resolver = GeocodeResolver(conn, make_providers(args.providers.split(',')))
+
+    print("=" * 70)
+    print(f"Geocoding with: {args.providers}")
+    print("=" * 70)
+    if args.concurrent:
+        distinct, updated, _ = run_geocoding(conn, resolver, run=f"update_countries:{args.providers}",
+                                             only_missing=args.missing_only, limit=args.limit,
+                                             workers=args.workers, incremental=not args.all)
     else:
-        print(f"[{i}] ✗ {cleaned[:40]:40} -> {error}")
-    time.sleep(1.5)
+        distinct, updated = update_countries(conn, resolver, only_missing=args.missing_only, limit=args.limit,
+                                             incremental=not args.all)
+    conn.close()
+
+    print("\n" + "=" * 70)
+    print(f"DONE: {distinct} distinct locations, {updated} jobs updated")
+    print(f"  {resolver.summary()}")
+    print("=" * 70)
 
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,7 @@ import sqlite3
 from geopy.geocoders import Nominatim
 import time
 
-DB_PATH = "jobs.db"
-
-def clean_location(loc):
-    return loc.replace("locations\n", "").replace("locations", "").strip() if loc else ""
+from geocoding import DB_PATH, clean_location
 
 geolocator = Nominatim(user_agent="CareerAssistant/1.0")
 
@@ -2,39 +2,13 @@ import sqlite3
 from playwright.sync_api import sync_playwright
 import time
 
-DB_PATH = "jobs.db"
-
-def clean_location(loc):
-    return loc.replace("locations\n", "").replace("locations", "").strip() if loc else ""
-
-COUNTRY_NAMES = {
-    "India": "IN",
-    "Tamil Nadu": "IN",
-    "Maharashtra": "IN",
-    "Uttar Pradesh": "IN",
-    "United Kingdom": "GB",
-    "UK": "GB",
-    "England": "GB",
-    "Scotland": "GB",
-    "United States": "US",
-    "USA": "US",
-    "Canada": "CA",
-    "Mexico": "MX",
-    "Singapore": "SG",
-    "Japan": "JP",
-    "Indonesia": "ID",
-    "Philippines": "PH",
-    "Hong Kong": "HK",
-    "Luxembourg": "LU",
-    "Switzerland": "CH",
-}
+from bulk_writer import BulkWriter
+from gazetteer import get_gazetteer
+from geocoding import DB_PATH, clean_location
 
 def map_country_name_to_code(name):
-    name = name.strip()
-    for country, code in COUNTRY_NAMES.items():
-        if country.lower() == name.lower():
-            return code
-    return None
+    place = get_gazetteer().resolve(name.strip())
+    return place['country_code'] if place else None
 
 def get_country_from_gmaps(page, location):
     try:
@@ -68,14 +42,6 @@ def get_country_from_gmaps(page, location):
             except:
                 pass
 
-        # Fallback: city-name heuristics
-        if not country_name:
-            lowered = location.lower()
-            if "chennai" in lowered or "pune" in lowered or "noida" in lowered:
-                return "IN"
-            if "glasgow" in lowered or "knutsford" in lowered or "london" in lowered:
-                return "GB"
-
         if not country_name:
             return None
 
@@ -98,6 +64,7 @@ records = cursor.fetchall()
 
 updated = 0
 failed = 0
+writer = BulkWriter(conn, ["country"])
 
 with sync_playwright() as p:
     browser = p.chromium.launch(headless=False)  # set True for silent
@@ -109,10 +76,14 @@ with sync_playwright() as p:
             continue
 
         print(f"[{i}/{len(records)}] Processing: {cleaned[:50]}")
-        country = get_country_from_gmaps(page, cleaned)
+        # Offline index first; only open Maps for what it can't place
+        country = map_country_name_to_code(cleaned)
+        searched = not country
+        if searched:
+            country = get_country_from_gmaps(page, cleaned)
 
         if country:
-            cursor.execute("UPDATE jobs SET country = ? WHERE id = ?", (country, job_id))
+            writer.add(job_id, country)
             updated += 1
             print(f"          ✓ {country}")
         else:
@@ -120,14 +91,16 @@ with sync_playwright() as p:
             print(f"          ✗ NO MATCH")
 
         if i % 5 == 0:
-            conn.commit()
+            writer.flush()
             print(f"\n--- Saved progress: {updated} updated ---\n")
 
-        time.sleep(2)
+        if searched:
+            time.sleep(2)
 
     browser.close()
 
-conn.commit()
+writer.close()
+print(writer.summary())
 conn.close()
 
 print(f"\n{'='*60}")
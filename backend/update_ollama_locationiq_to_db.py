@@ -1,47 +1,105 @@
-import sqlite3
-import subprocess
-import requests
-import time
+import argparse
+import asyncio
 import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enrichers'))
 
-DB_PATH = "jobs.db"
-LOCATIONIQ_KEY = "pk.bfc262eefb0672ba1f6daf84bbf3b08b"
-API_URL = "https://us1.locationiq.com/v1/search"
+from bulk_writer import CHUNK_SIZE, BulkWriter
+from db_iter import iter_rows
+from geocode_runner import AsyncGeocoder, Checkpoint
+from geocoding import DB_PATH, LOCATIONIQ_KEY, GeocodeResolver, LocationIQProvider, clean_location, connect
+from http_client import get_client
+from ollama_client import OLLAMA_URL, OllamaClient, validate
 
-def clean_location(loc):
-    if not loc:
-        return ""
-    return loc.replace("locations\n", "").replace("locations", "").strip()
+MODEL = "llama3.2:3b"
+# Distinct location strings per prompt; one JSON array comes back per batch
+BATCH_SIZE = 20
+KEEP_ALIVE = "30m"
 
-def ask_ollama_extract_location(raw_location):
-    prompt = f"""Extract city, state/province, and country from this job location string.
+LOCATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'index': {'type': 'integer'},
+        'city': {'type': 'string', 'maxLength': 40},
+        'state': {'type': 'string', 'maxLength': 40},
+        'country': {'type': 'string', 'maxLength': 40},
+    },
+    'required': ['index', 'city', 'state', 'country'],
+}
 
-Location: "{raw_location}"
+BATCH_PROMPT = """Extract city, state/province, and country from each numbered job location string.
 
-Output ONLY valid JSON in this exact format (no markdown, no explanation):
-{{"city": "CityName", "state": "StateName", "country": "CountryName"}}
+Locations:
+{locations}
+
+Output ONLY valid JSON in this exact format (no markdown, no explanation), one entry per location:
+{{"locations": [{{"index": 0, "city": "CityName", "state": "StateName", "country": "CountryName"}}]}}
 
 If any field is unknown, use empty string.
 """
+
+_ollama = None
+
+
+def get_ollama(url=OLLAMA_URL):
+    """Shared client on the pooled session; keep_alive keeps the model loaded between batches"""
+    global _ollama
+    if _ollama is None:
+        _ollama = OllamaClient(MODEL, url=url, session=get_client(), timeout=120, keep_alive=KEEP_ALIVE)
+    return _ollama
+
+
+def batch_schema(size):
+    return {
+        'type': 'object',
+        'properties': {
+            'locations': {'type': 'array', 'items': LOCATION_SCHEMA, 'maxItems': size},
+        },
+        'required': ['locations'],
+    }
+
+
+def parse_batch(text, size):
+    """{index: {city, state, country}} from the model's answer; bad items are dropped"""
+    if not text:
+        return {}
     try:
-        result = subprocess.run(
-            ["ollama", "run", "llama3.2:3b"],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            timeout=40,
-        )
-        text = result.stdout.strip()
-        if "{" in text and "}" in text:
-            s = text.index("{")
-            e = text.rindex("}") + 1
-            return json.loads(text[s:e])
-        return None
-    except Exception as e:
-        print("    Ollama error:", e)
-        return None
-
-def query_locationiq(city, state, country):
+        items = validate(json.loads(text), batch_schema(size))['locations']
+    except ValueError as e:
+        print(f"    Ollama returned unusable JSON: {e}")
+        return {}
+    found = {}
+    for item in items:
+        try:
+            item = validate(item, LOCATION_SCHEMA)
+        except ValueError:
+            continue
+        if 0 <= item['index'] < size and item['index'] not in found:
+            found[item['index']] = {k: item[k].strip() for k in ('city', 'state', 'country')}
+    return found
+
+
+def extract_locations(client, locations):
+    """One prompt for a batch of location strings -> list of dicts (None where missing)"""
+    if not locations:
+        return []
+    numbered = '\n'.join(f"{i}. {loc.replace(chr(10), ' | ')}" for i, loc in enumerate(locations))
+    text = client.generate_json(BATCH_PROMPT.format(locations=numbered), batch_schema(len(locations)))
+    found = parse_batch(text, len(locations))
+    results = [found.get(i) for i in range(len(locations))]
+    # Small models sometimes skip an entry in a long list; ask again for just those
+    # (a batch where nothing came back is a failed call, not worth N retries)
+    if len(locations) > 1 and found:
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = extract_locations(client, [locations[i]])[0]
+    return results
+
+
+async def query_locationiq(geocoder, city, state, country):
     queries = []
     if city and state and country:
         queries.append(f"{city}, {state}, {country}")
@@ -51,106 +109,119 @@ def query_locationiq(city, state, country):
         queries.append(city)
 
     for q in queries:
-        try:
-            params = {
-                "key": LOCATIONIQ_KEY,
-                "q": q,
-                "format": "json",
-                "addressdetails": 1,
-                "limit": 1
-            }
-            resp = requests.get(API_URL, params=params, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
-                if isinstance(data, list) and len(data) > 0:
-                    addr = data[0].get("address", {})
-                    return {
-                        "query_used": q,
-                        "city": addr.get("city") or addr.get("town") or addr.get("village"),
-                        "state": addr.get("state"),
-                        "country": addr.get("country"),
-                        "country_code": (addr.get("country_code") or "").upper()
-                    }
-            time.sleep(1)
-        except Exception as e:
-            print(f"      LocationIQ error for '{q}': {e}")
+        # Answers are kept in geocode_cache, so repeated cities cost nothing
+        place = await geocoder.resolve(q)
+        if place:
+            return dict(place, query_used=q)
     return None
 
 def format_location(city, state, country):
     parts = [p for p in [city, state, country] if p]
     return ", ".join(parts) if parts else ""
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+async def resolve_location(geocoder, cleaned, extracted):
+    """(country_code, new location, log line) for one cleaned string and the model's fields"""
+    city = extracted.get("city", "")
+    state = extracted.get("state", "")
+    country_name = extracted.get("country", "")
+    log = f"    Ollama -> City: {city or 'EMPTY'}, State: {state or 'EMPTY'}, Country: {country_name or 'EMPTY'}\n"
+
+    liq = await query_locationiq(geocoder, city, state, country_name) if city else None
+    if liq:
+        country_code = liq["country_code"]
+        city = liq["city"] or city
+        state = liq["state"] or state
+        country_name = liq["country"] or country_name
+        log += f"    LocationIQ -> {city}, {state}, {country_name} ({country_code})"
+    else:
+        country_code = ""
+        log += "    LocationIQ -> no match, using Ollama values only"
+    return country_code, format_location(city, state, country_name) or cleaned, log
+
+async def process(conn, client, geocoder, checkpoint, writer, by_location, distinct, batch_size):
+    """Extract a batch, geocode its locations concurrently, save it with the checkpoint"""
+    updated = failed = 0
+    for start in range(0, len(distinct), batch_size):
+        batch = distinct[start:start + batch_size]
+        print(f"\n[{start + len(batch)}/{len(distinct)}] Extracting {len(batch)} locations in one prompt...")
+        extracted = await asyncio.to_thread(extract_locations, client, batch)
+        resolved = await asyncio.gather(*(resolve_location(geocoder, cleaned, fields)
+                                          for cleaned, fields in zip(batch, extracted) if fields))
+        resolved = iter(resolved)
+
+        for cleaned, fields in zip(batch, extracted):
+            raw_locations = by_location[cleaned]
+            jobs = sum(raw_locations.values())
+            print(f"  {cleaned.replace(chr(10), ' | ')[:60]} ({jobs} jobs)")
+            if not fields:
+                print("    ✗ Ollama failed, skipping")
+                failed += jobs
+                continue
+            country_code, new_location, log = next(resolved)
+            print(log)
+            for raw in raw_locations:
+                writer.add(raw, country_code, new_location)
+            updated += jobs
+            print(f"    ✓ UPDATED -> country: {country_code or 'EMPTY'}, location: {new_location}")
+
+        # The checkpoint only moves past rows that are on disk
+        writer.flush()
+        with conn:
+            checkpoint.save(batch[-1], geocoder.counters)
+        print(f"\n--- Progress saved ({updated} updates so far) ---")
+
+    with conn:
+        checkpoint.save(None, geocoder.counters)
+    return updated, failed
 
-    cursor.execute("""
-        SELECT id, location
-        FROM jobs
-        WHERE location IS NOT NULL AND location != ''
-    """)
-    jobs = cursor.fetchall()
-    total = len(jobs)
+def main():
+    parser = argparse.ArgumentParser(description='Normalize jobs.location with Ollama, then geocode with LocationIQ')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows per write transaction')
+    parser.add_argument('--url', default=OLLAMA_URL)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+    if not LOCATIONIQ_KEY:
+        raise SystemExit("❌ Set LOCATIONIQ_KEY to your LocationIQ API key")
+
+    conn = connect(args.db)
+    resolver = GeocodeResolver(conn, [LocationIQProvider()], simplify=False)
+    client = get_ollama(args.url)
+    checkpoint = Checkpoint(conn, "ollama_locationiq")
+    last_key, counters = checkpoint.load()
+    geocoder = AsyncGeocoder(resolver, counters)
+
+    # Thousands of rows share a few hundred strings; extract each one once.
+    # Rows are paged through by id, so memory grows with distinct strings, not jobs.
+    by_location = {}
+    total = 0
+    for _, raw_loc in iter_rows(conn, ["location"], where="location IS NOT NULL AND location != ''"):
+        raw_locations = by_location.setdefault(clean_location(raw_loc), {})
+        raw_locations[raw_loc] = raw_locations.get(raw_loc, 0) + 1
+        total += 1
+    by_location.pop("", None)
+    distinct = sorted(by_location)
+    if last_key is not None:
+        distinct = [loc for loc in distinct if loc > last_key]
+        print(f"Resuming an interrupted run: {len(distinct)} locations left")
 
     print("=" * 80)
-    print(f"UPDATING {total} JOBS WITH OLLAMA + LOCATIONIQ")
+    print(f"UPDATING {total} JOBS ({len(distinct)} distinct locations) WITH OLLAMA + LOCATIONIQ")
     print("=" * 80)
 
-    updated = 0
-    failed = 0
-
-    for idx, (job_id, raw_loc) in enumerate(jobs, 1):
-        cleaned = clean_location(raw_loc)
-        print(f"\n[{idx}/{total}] Job {job_id[:8]}...")
-        print("  Original:", raw_loc)
-        print("  Cleaned :", cleaned)
-
-        extracted = ask_ollama_extract_location(cleaned)
-        if not extracted:
-            print("    ✗ Ollama failed, skipping")
-            failed += 1
-            continue
-
-        city = (extracted.get("city") or "").strip()
-        state = (extracted.get("state") or "").strip()
-        country_name = (extracted.get("country") or "").strip()
-
-        print(f"    Ollama -> City: {city or 'EMPTY'}, State: {state or 'EMPTY'}, Country: {country_name or 'EMPTY'}")
-
-        liq = query_locationiq(city, state, country_name) if city else None
-        if liq:
-            country_code = liq["country_code"]
-            final_city = liq["city"] or city
-            final_state = liq["state"] or state
-            final_country = liq["country"] or country_name
-            print(f"    LocationIQ -> {final_city}, {final_state}, {final_country} ({country_code})")
-        else:
-            country_code = ""
-            final_city = city
-            final_state = state
-            final_country = country_name
-            print("    LocationIQ -> no match, using Ollama values only")
-
-        new_location = format_location(final_city, final_state, final_country)
-
-        cursor.execute(
-            "UPDATE jobs SET country = ?, location = ? WHERE id = ?",
-            (country_code, new_location or cleaned, job_id),
-        )
-        updated += 1
-        print(f"    ✓ UPDATED -> country: {country_code or 'EMPTY'}, location: {new_location or cleaned}")
-
-        if idx % 10 == 0:
-            conn.commit()
-            print(f"\n--- Progress saved ({updated} updates so far) ---")
-
-        time.sleep(2)  # gentle on LocationIQ
-
-    conn.commit()
+    started = time.monotonic()
+    with BulkWriter(conn, ["country", "location"], key="location", chunk_size=args.chunk_size) as writer:
+        updated, failed = asyncio.run(
+            process(conn, client, geocoder, checkpoint, writer, by_location, distinct, args.batch_size))
+    elapsed = time.monotonic() - started
     conn.close()
 
     print("\n" + "=" * 80)
     print(f"DONE. Updated rows: {updated}, Failed: {failed}")
+    print(f"  {updated / elapsed if elapsed else 0:.1f} rows/s ({elapsed:.1f}s)")
+    print(f"  {client.summary()}")
+    print(f"  {writer.summary()}")
+    print(f"  LocationIQ: {resolver.summary()}; {geocoder.summary()}")
     print("=" * 80)
 
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+"""Row-by-row UPDATE + commit every N vs BulkWriter, with a competing writer
+
+Updates --rows jobs in a WAL jobs.db while a second connection (standing
+in for the Node scrapers) inserts a row every few milliseconds. Each row
+costs --work-ms of "geocoding" first; in the old scripts that happens
+while the implicit transaction from the previous UPDATE is still open,
+so the write lock is held across it. Reports updater throughput, total
+write-lock hold time, and how long the scraper's inserts had to wait.
+
+Usage: python benchmarks/bench_bulk_write.py [--rows N] [--work-ms MS] [--commit-every N] [--chunks 100,500]
+"""
+import argparse
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from bench_utils import make_jobs_db
+from bulk_writer import BulkWriter
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+SCRAPED = itertools.count()
+
+
+class Scraper(threading.Thread):
+    """Inserts a job every interval and records how long each insert took"""
+
+    def __init__(self, path, interval=0.005):
+        super().__init__(daemon=True)
+        self.conn = connect(path)
+        self.interval = interval
+        self.waits = []
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            i = next(SCRAPED)
+            start = time.perf_counter()
+            with self.conn:
+                self.conn.execute("INSERT INTO jobs (id, title, company, url) VALUES (?, 'New', 'bank', ?)",
+                                  (f'scraped-{i}', f'https://example.com/scraped/{i}'))
+            self.waits.append(time.perf_counter() - start)
+            time.sleep(self.interval)
+
+    def report(self):
+        waits = sorted(self.waits)
+        p = lambda q: waits[min(len(waits) - 1, int(q * len(waits)))] * 1000
+        return f"scraper inserts p50 {p(0.5):.1f} ms, p99 {p(0.99):.1f} ms, max {waits[-1] * 1000:.1f} ms"
+
+
+def row_by_row(conn, ids, commit_every, work):
+    """What the update scripts did: UPDATE per row, commit every few rows"""
+    lock = 0.0
+    locked_at = None
+    cursor = conn.cursor()
+    for i, job_id in enumerate(ids, 1):
+        time.sleep(work)
+        cursor.execute('UPDATE jobs SET country = ?, location = ? WHERE id = ?', ('CA', 'Toronto, ON', job_id))
+        locked_at = locked_at or time.perf_counter()
+        if i % commit_every == 0:
+            conn.commit()
+            lock += time.perf_counter() - locked_at
+            locked_at = None
+    conn.commit()
+    if locked_at:
+        lock += time.perf_counter() - locked_at
+    return lock
+
+
+def run(label, path, ids, update):
+    scraper = Scraper(path)
+    scraper.start()
+    start = time.perf_counter()
+    lock = update()
+    elapsed = time.perf_counter() - start
+    scraper.stop.set()
+    scraper.join()
+    print(f"{label:22} {len(ids) / elapsed:9.0f} rows/s  lock held ~{lock * 1000:7.0f} ms  {scraper.report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--work-ms', type=float, default=1.0, help='per-row work before its UPDATE')
+    parser.add_argument('--commit-every', type=int, default=10)
+    parser.add_argument('--chunks', default='100,500')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.db')
+        ids = make_jobs_db(path, args.rows)
+        connect(path).close()
+
+        conn = connect(path)
+        run(f'row-by-row (commit/{args.commit_every})', path, ids,
+            lambda: row_by_row(conn, ids, args.commit_every, args.work_ms / 1000))
+
+        for chunk in map(int, args.chunks.split(',')):
+            conn.execute("UPDATE jobs SET country = NULL")
+            conn.commit()
+
+            def bulk():
+                with BulkWriter(conn, ['country', 'location'], chunk_size=chunk) as writer:
+                    for job_id in ids:
+                        time.sleep(args.work_ms / 1000)
+                        writer.add(job_id, 'CA', 'Toronto, ON')
+                return writer.stats['lock_seconds']
+
+            run(f'BulkWriter ({chunk}/chunk)', path, ids, bulk)
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
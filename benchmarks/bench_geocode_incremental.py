@@ -0,0 +1,84 @@
+"""Incremental geocoding: full run vs no-op run vs a few changed rows
+
+Builds a jobs.db with --jobs rows sharing --distinct location strings,
+geocodes it once with an offline stand-in provider, then times a second
+run with nothing to do and a third after --changed rows got a new
+location. The old scripts redid every row on every run.
+
+Usage: python benchmarks/bench_geocode_incremental.py [--jobs N] [--distinct N] [--changed N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from bench_utils import JOBS_SCHEMA
+from geocoding import GeocodeResolver, update_countries
+
+
+class StandInProvider:
+    """Answers every query without the network"""
+    name = 'stand-in'
+
+    def __init__(self):
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        return {'city': query, 'state': None, 'country': 'Canada', 'country_code': 'CA'}
+
+
+def build_db(path, jobs, distinct):
+    conn = sqlite3.connect(path)
+    conn.execute(JOBS_SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, title, company, url, location) VALUES (?, 'Analyst', 'bank', ?, ?)",
+            ((str(uuid.uuid4()), f'https://example.com/{i}', f'City {i % distinct}, ON') for i in range(jobs)),
+        )
+    return conn
+
+
+def timed_run(conn, provider):
+    provider.calls = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        distinct, updated = update_countries(conn, GeocodeResolver(conn, [provider], simplify=False))
+    return time.perf_counter() - start, distinct, updated, provider.calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=50000)
+    parser.add_argument('--distinct', type=int, default=2000)
+    parser.add_argument('--changed', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(os.path.join(tmp, 'jobs.db'), args.jobs, args.distinct)
+        provider = StandInProvider()
+
+        print(f"{args.jobs} jobs, {args.distinct} distinct locations\n")
+        for label in ('first run', 'no-op run'):
+            seconds, distinct, updated, calls = timed_run(conn, provider)
+            print(f"{label:12} {seconds * 1000:8.1f} ms  {distinct:6} locations  {updated:6} jobs updated  "
+                  f"{calls:5} provider calls")
+
+        ids = [row[0] for row in conn.execute('SELECT id FROM jobs')]
+        with conn:
+            conn.executemany('UPDATE jobs SET location = ? WHERE id = ?',
+                             ((f'New City {i}, ON', job_id)
+                              for i, job_id in enumerate(random.sample(ids, args.changed))))
+        seconds, distinct, updated, calls = timed_run(conn, provider)
+        print(f"{args.changed} changed  {seconds * 1000:8.1f} ms  {distinct:6} locations  {updated:6} jobs updated  "
+              f"{calls:5} provider calls")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
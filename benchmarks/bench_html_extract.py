@@ -0,0 +1,117 @@
+"""Throughput and text quality: old regex chain vs streaming extractor
+
+Runs over the saved pages in webarchives/*.html (written by
+playwright_fetch_job.js). When none are present, synthetic ATS-like pages
+with multi-megabyte inline scripts are used instead.
+
+Usage: python benchmarks/bench_html_extract.py [webarchives_dir]
+"""
+import glob
+import os
+import re
+import sys
+import time
+
+from bench_utils import ROOT
+from html_extract import MAX_CHARS, extract_text
+
+REPEAT = 3
+CHUNK = 65536
+
+BOILERPLATE = ('cookie', 'privacy policy', 'sign in', 'skip to main content',
+               'javascript', 'accept all', 'terms of use', 'follow us')
+
+DESCRIPTION = (
+    "As a Business Analyst you will partner with product owners to gather requirements. "
+    "You will document processes for retail banking platforms and support UAT. "
+    "Applicants must be authorized to work in the United States; we do not offer visa sponsorship. "
+    "Required skills include SQL, Excel, Jira and stakeholder management. "
+    "This role is hybrid in Toronto, ON, Canada with a salary range of 80,000 to 95,000 CAD. "
+) * 4
+
+
+def legacy_extract(html):
+    """The regex chain scrape_job_description used before"""
+    text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL)
+    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:MAX_CHARS]
+
+
+def synthetic_page(script_kb):
+    script = 'var x = "' + ('a<b>' * 256) + '";\n'
+    scripts = ''.join(f'<script>{script * (script_kb // 4)}</script>' for _ in range(4))
+    nav = ''.join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(200))
+    return f"""<html><head><title>Job</title><style>body {{ color: red; }}</style>{scripts}</head>
+<body>
+<div id="onetrust-banner">We use cookies to improve your experience. Accept all cookies. Privacy policy.</div>
+<a class="skip-link" href="#main">Skip to main content</a>
+<nav><ul>{nav}</ul></nav>
+<div class="hero"><h1>Sign in to see personalised jobs. Follow us on social media.</h1></div>
+<main><div data-automation-id="jobPostingDescription"><p>{DESCRIPTION}</p></div></main>
+<footer>Terms of use. Privacy policy. Cookie settings.</footer>
+{scripts}
+</body></html>"""
+
+
+def load_pages(archive_dir):
+    paths = sorted(glob.glob(os.path.join(archive_dir, '*.html')))
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((os.path.basename(path), f.read(), None))
+        return pages
+    print(f"No saved pages in {archive_dir}, using synthetic pages\n")
+    return [(f'synthetic_{kb}kb_scripts', synthetic_page(kb), DESCRIPTION) for kb in (64, 512, 2048)]
+
+
+def chunks(html):
+    return (html[i:i + CHUNK] for i in range(0, len(html), CHUNK))
+
+
+def timed(fn, html):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        text = fn(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return text, best
+
+
+def quality(text, reference):
+    lowered = text.lower()
+    hits = sum(lowered.count(marker) for marker in BOILERPLATE)
+    if reference is None:
+        return f"boilerplate={hits}"
+    sentences = [s.strip() for s in reference.split('. ') if s.strip()]
+    found = sum(1 for s in set(sentences) if s[:60] in text)
+    return f"boilerplate={hits} recall={found}/{len(set(sentences))}"
+
+
+def main():
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'webarchives')
+    pages = load_pages(archive_dir)
+
+    total_bytes = 0
+    total = {'regex': 0.0, 'stream': 0.0}
+    for name, html, reference in pages:
+        size = len(html.encode('utf-8'))
+        total_bytes += size
+        old_text, old_time = timed(legacy_extract, html)
+        new_text, new_time = timed(lambda h: extract_text(chunks(h)), html)
+        total['regex'] += old_time
+        total['stream'] += new_time
+        print(f"{name[:50]}  ({size / 1e6:.2f} MB)")
+        print(f"   regex : {old_time * 1000:8.1f} ms  {len(old_text):5} chars  {quality(old_text, reference)}")
+        print(f"   stream: {new_time * 1000:8.1f} ms  {len(new_text):5} chars  {quality(new_text, reference)}")
+
+    print()
+    for label, seconds in total.items():
+        print(f"{label:7} {total_bytes / 1e6 / seconds:8.1f} MB/s over {len(pages)} pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Rows/sec of per-row connect+commit (old update_job) vs batched JobStore writes
+
+Usage: python benchmarks/bench_job_store.py [rows]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from bench_utils import make_jobs_db
+from job_store import JobStore
+
+ANALYSIS = {
+    'location': 'Toronto, ON, Canada',
+    'summary': 'Business analyst supporting retail banking change programs',
+    'requires_citizenship': False,
+    'no_visa_sponsorship': True,
+}
+DESCRIPTION = 'Lorem ipsum dolor sit amet ' * 100
+
+LEGACY_UPDATE_SQL = """
+    UPDATE jobs
+    SET status = 'enriched', location = ?, description = ?, summary = ?,
+        requires_citizenship = ?, no_visa_sponsorship = ?, enriched_at = ?
+    WHERE id = ?
+"""
+
+
+def per_row_update(db_path, job_id):
+    """What update_job used to do: connect, update, commit, close"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEGACY_UPDATE_SQL, (
+        ANALYSIS['location'], DESCRIPTION, ANALYSIS['summary'], 0, 1,
+        datetime.now().isoformat(), job_id,
+    ))
+    conn.commit()
+    conn.close()
+
+
+def bench_per_row(db_path, ids):
+    start = time.perf_counter()
+    for job_id in ids:
+        per_row_update(db_path, job_id)
+    return time.perf_counter() - start
+
+
+def bench_batched(db_path, ids, flush_every):
+    store = JobStore(db_path, flush_every=flush_every, flush_interval=3600)
+    store.claim_jobs(len(ids))
+    start = time.perf_counter()
+    for job_id in ids:
+        store.update_job(job_id, ANALYSIS, DESCRIPTION)
+    store.close()
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Updating {rows} rows\n")
+
+        # Old path against the WAL-mode DB the Node side uses
+        path = os.path.join(tmp, 'per_row.db')
+        ids = make_jobs_db(path, rows)
+        sqlite3.connect(path).execute('PRAGMA journal_mode=WAL').close()
+        elapsed = bench_per_row(path, ids)
+        baseline = rows / elapsed
+        print(f"{'per-row commit':24} {elapsed:8.3f}s {baseline:10.0f} rows/s")
+
+        for flush_every in (1, 20, 100):
+            path = os.path.join(tmp, f'batched_{flush_every}.db')
+            ids = make_jobs_db(path, rows)
+            elapsed = bench_batched(path, ids, flush_every)
+            rate = rows / elapsed
+            label = f'batched (N={flush_every})'
+            print(f"{label:24} {elapsed:8.3f}s {rate:10.0f} rows/s  x{rate / baseline:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Keyword pre-classifier vs LLM labels: coverage, accuracy and time per job
+
+Labels come from enriched rows in backend/jobs.db (the flags the LLM
+wrote). With fewer than --min-rows of those, the hand-labeled sample in
+benchmarks/data/keyword_labels.jsonl is used instead (null = genuinely
+ambiguous, excluded from accuracy).
+
+Usage: python benchmarks/bench_keywords.py [--db PATH] [--limit N] [--llm-seconds S]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from bench_utils import BACKEND_DIR, ROOT
+from keyword_classifier import classify
+
+FIELDS = ('requires_citizenship', 'no_visa_sponsorship')
+LABELS_PATH = os.path.join(ROOT, 'benchmarks', 'data', 'keyword_labels.jsonl')
+
+SAMPLE_SQL = """
+    SELECT title, description, requires_citizenship, no_visa_sponsorship
+    FROM jobs
+    WHERE status = 'enriched' AND description IS NOT NULL
+      AND requires_citizenship IS NOT NULL AND no_visa_sponsorship IS NOT NULL
+    ORDER BY RANDOM()
+    LIMIT ?
+"""
+
+
+def load_db_sample(db_path, limit):
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(SAMPLE_SQL, (limit,)).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    conn.close()
+    return [{'title': t, 'description': d, 'requires_citizenship': bool(c), 'no_visa_sponsorship': bool(v)}
+            for t, d, c, v in rows]
+
+
+def load_labeled_sample():
+    with open(LABELS_PATH, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', default=os.path.join(BACKEND_DIR, 'jobs.db'))
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--min-rows', type=int, default=50)
+    parser.add_argument('--llm-seconds', type=float, default=4.0,
+                        help='assumed Ollama seconds per job for the savings estimate')
+    args = parser.parse_args()
+
+    rows = load_db_sample(args.db, args.limit)
+    if len(rows) >= args.min_rows:
+        print(f"{len(rows)} enriched jobs from {args.db} (labels = LLM output)\n")
+    else:
+        rows = load_labeled_sample()
+        print(f"Only a few enriched jobs in the DB, using {len(rows)} hand-labeled samples\n")
+
+    start = time.perf_counter()
+    results = [classify(row['description']) for row in rows]
+    elapsed = time.perf_counter() - start
+
+    for field in FIELDS:
+        decided = correct = labeled = 0
+        wrong = []
+        for row, result in zip(rows, results):
+            if row[field] is None:
+                continue
+            labeled += 1
+            if result[field] is None:
+                continue
+            decided += 1
+            if result[field] == row[field]:
+                correct += 1
+            else:
+                wrong.append(row['title'])
+        coverage = decided / labeled * 100 if labeled else 0
+        accuracy = correct / decided * 100 if decided else 0
+        print(f"{field:22} decided {decided}/{labeled} ({coverage:.0f}%), accuracy {accuracy:.1f}%")
+        for title in wrong:
+            print(f"   ✗ {title}")
+
+    both = sum(1 for r in results if all(r[f] is not None for f in FIELDS))
+    per_job = elapsed / len(rows) * 1e6
+    print(f"\nclassify: {per_job:.0f} µs/job; both flags decided for {both}/{len(rows)} jobs")
+    print(f"Those jobs get a trimmed prompt, or skip Ollama entirely when the Workday API gave "
+          f"the location (up to ~{both * args.llm_seconds:.0f}s of inference at {args.llm_seconds:g}s/job)")
+
+
+if __name__ == '__main__':
+    main()
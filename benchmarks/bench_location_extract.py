@@ -0,0 +1,147 @@
+"""Rows/sec for location extraction: `ollama run` per row vs batched HTTP
+
+The legacy path spawns a fake `ollama` executable per job row that pays a
+process start plus model handshake (--load seconds) and then "generates"
+its answer at --rate tokens/s. The batched path sends BATCH_SIZE
+distinct strings per prompt to a fake /api/generate over one pooled
+session, streaming at the same rate with the model already warm.
+
+Usage: python benchmarks/bench_location_extract.py [--rows N] [--distinct N] [--load S] [--rate TOKENS_PER_S]
+"""
+import argparse
+import json
+import os
+import re
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from bench_utils import ROOT  # noqa: F401  (sets up sys.path)
+from ollama_client import OllamaClient
+from update_ollama_locationiq_to_db import BATCH_SIZE, MODEL, extract_locations
+
+CITIES = [('Toronto', 'Ontario', 'Canada'), ('Austin', 'Texas', 'United States'),
+          ('Pune', 'Maharashtra', 'India'), ('Glasgow', 'Scotland', 'United Kingdom'),
+          ('Monterrey', 'Nuevo Leon', 'Mexico'), ('Charlotte', 'North Carolina', 'United States')]
+
+FAKE_OLLAMA_CLI = """#!{python}
+import json, sys, time
+prompt = sys.stdin.read()
+time.sleep({load})
+answer = json.dumps({{"city": "Toronto", "state": "Ontario", "country": "Canada"}})
+time.sleep(len(answer) / 4 / {rate})
+print(answer)
+"""
+
+LEGACY_PROMPT = """Extract city, state/province, and country from this job location string.
+
+Location: "{location}"
+
+Output ONLY valid JSON in this exact format (no markdown, no explanation):
+{{"city": "CityName", "state": "StateName", "country": "CountryName"}}
+
+If any field is unknown, use empty string.
+"""
+
+
+def legacy_extract(ollama_bin, location):
+    """What update_ollama_locationiq_to_db did per row before"""
+    result = subprocess.run([ollama_bin, 'run', MODEL], input=LEGACY_PROMPT.format(location=location),
+                            capture_output=True, text=True, timeout=40)
+    text = result.stdout.strip()
+    return json.loads(text[text.index('{'):text.rindex('}') + 1])
+
+
+def make_handler(rate):
+    class FakeOllama(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def handle(self):
+            try:
+                super().handle()
+            except ConnectionResetError:
+                pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            count = len(re.findall(r'^\d+\. ', body['prompt'], re.MULTILINE))
+            answer = json.dumps({'locations': [
+                dict(zip(('index', 'city', 'state', 'country'), (i,) + CITIES[i % len(CITIES)]))
+                for i in range(count)]})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for i in range(0, len(answer), 4):
+                    time.sleep(1 / rate)
+                    self._chunk(json.dumps({'response': answer[i:i + 4], 'done': False}).encode() + b'\n')
+                self._chunk(json.dumps({'response': '', 'done': True}).encode() + b'\n')
+                self._chunk(b'')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _chunk(self, payload):
+            self.wfile.write(f'{len(payload):x}\r\n'.encode() + payload + b'\r\n')
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return FakeOllama
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=60, help='job rows')
+    parser.add_argument('--distinct', type=int, default=20, help='distinct location strings among them')
+    parser.add_argument('--load', type=float, default=0.3, help='per-process start + model handshake, s')
+    parser.add_argument('--rate', type=float, default=400, help='stand-in tokens per second')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    rows = [f"{CITIES[i % args.distinct % len(CITIES)][0]} office {i % args.distinct}" for i in range(args.rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ollama_bin = os.path.join(tmp, 'ollama')
+        with open(ollama_bin, 'w') as f:
+            f.write(FAKE_OLLAMA_CLI.format(python=sys.executable, load=args.load, rate=args.rate))
+        os.chmod(ollama_bin, os.stat(ollama_bin).st_mode | stat.S_IEXEC)
+
+        start = time.perf_counter()
+        legacy = [legacy_extract(ollama_bin, row) for row in rows]
+        legacy_s = time.perf_counter() - start
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    session = requests.Session()
+    client = OllamaClient(MODEL, f'http://127.0.0.1:{server.server_port}/api/generate',
+                          session=session, timeout=120, keep_alive='30m')
+
+    start = time.perf_counter()
+    distinct = list(dict.fromkeys(rows))
+    extracted = {}
+    for i in range(0, len(distinct), args.batch_size):
+        batch = distinct[i:i + args.batch_size]
+        extracted.update(zip(batch, extract_locations(client, batch)))
+    batched = [extracted[row] for row in rows]
+    batched_s = time.perf_counter() - start
+    session.close()
+    server.shutdown()
+
+    print(f"{args.rows} rows, {len(distinct)} distinct, load {args.load}s/process, {args.rate:g} tokens/s\n")
+    print(f"subprocess/row  {args.rows / legacy_s:7.1f} rows/s  ({legacy_s:.2f}s, {len(rows)} processes, "
+          f"{sum(1 for r in legacy if r)} parsed)")
+    print(f"batched HTTP    {args.rows / batched_s:7.1f} rows/s  ({batched_s:.2f}s, {client.stats['calls']} "
+          f"requests, {sum(1 for r in batched if r)} parsed)")
+    print(f"\n{legacy_s / batched_s:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Resume matching latency over a synthetic jobs.db
+
+Builds (or reuses, with --db) a synthetic jobs.db with --rows jobs,
+vectorizes every job into a copy (job_vectors), loads the matrix
+(job_matcher.JobMatcher) and times top-k matches for --resumes synthetic
+resumes made of other jobs' text. Then edits --updates jobs, re-vectorizes
+only those and times the matcher's refresh. The target is a top-50 match
+under 50 ms at 500k jobs.
+
+Usage: python benchmarks/bench_match.py [--rows N] [--resumes N] [--k N] [--updates N] [--db PATH]
+"""
+import argparse
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import synthetic_db
+from job_matcher import JobMatcher
+from job_vectors import ensure_job_vectors, update_job_vectors
+
+
+def resumes(conn, count, seed=1):
+    """Resume-sized texts stitched from random jobs' titles, skills and descriptions"""
+    rng = random.Random(seed)
+    rows = conn.execute("""
+        SELECT title, summary, description, mandatory_skills FROM jobs
+        WHERE description != '' ORDER BY random() LIMIT ?
+    """, (count * 4,)).fetchall()
+    texts = []
+    for i in range(count):
+        parts = []
+        for title, summary, description, skills in rows[i * 4:(i + 1) * 4]:
+            start = rng.randrange(max(1, len(description) - 800))
+            parts += [title, summary or '', skills or '', description[start:start + 800]]
+        texts.append('\n'.join(parts))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--resumes', type=int, default=50)
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--updates', type=int, default=1000)
+    parser.add_argument('--desc-median', type=int, default=1000)
+    parser.add_argument('--db', help='reuse (or create) the synthetic DB here; vectors are added to a copy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.db or os.path.join(tmp, 'source.db')
+        if not os.path.exists(source):
+            seconds = synthetic_db.build(source, args.rows, desc_median=args.desc_median)
+            print(f"Built {args.rows:,} rows in {seconds:.0f}s")
+        path = os.path.join(tmp, 'vectors.db')
+        shutil.copy(source, path)
+
+        conn = sqlite3.connect(path)
+        before = os.path.getsize(path)
+        ensure_job_vectors(conn)
+        start = time.perf_counter()
+        count = update_job_vectors(conn)
+        vectorized = time.perf_counter() - start
+        conn.execute('PRAGMA wal_checkpoint')
+        terms = conn.execute('SELECT COUNT(*) FROM match_terms').fetchone()[0]
+        print(f"Vectorized {count:,} jobs ({terms:,} terms) in {vectorized:.0f}s, "
+              f"+{(os.path.getsize(path) - before) / 1e6:.0f} MB")
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        matcher = JobMatcher(conn)
+        loaded = time.perf_counter() - start
+        grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024
+        print(f"Loaded {matcher.main.shape[0]:,} x {matcher.main.shape[1]:,} matrix "
+              f"({matcher.main.nnz:,} non-zeros) in {loaded:.1f}s, peak RSS +{grown:.0f} MB")
+
+        texts = resumes(conn, args.resumes)
+        matcher.match(texts[0], args.k)
+        times = []
+        for text in texts:
+            start = time.perf_counter()
+            matcher.match(text, args.k)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        p99 = times[min(len(times) - 1, int(0.99 * len(times)))]
+        print(f"\nTop-{args.k} match over {len(matcher.job_ids):,} jobs: p50 {statistics.median(times):.1f} ms, "
+              f"p99 {p99:.1f} ms, max {times[-1]:.1f} ms ({len(times)} resumes)")
+
+        ids = [row[0] for row in conn.execute('SELECT job_id FROM job_vectors LIMIT ?', (args.updates,))]
+        with conn:
+            conn.executemany("UPDATE jobs SET summary = 'Platform engineer: Terraform, Kubernetes, Go' WHERE id = ?",
+                             [(job_id,) for job_id in ids])
+        start = time.perf_counter()
+        update_job_vectors(conn)
+        revectorized = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        matcher.refresh()
+        refreshed = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        matcher.match(texts[0], args.k)
+        after = (time.perf_counter() - start) * 1000
+        print(f"Edited {len(ids)} jobs: re-vectorized in {revectorized:.0f} ms, refresh {refreshed:.0f} ms, "
+              f"next match {after:.1f} ms")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Peak RSS: fetchall() vs keyset-paged scans, whole-body vs capped HTTP reads
+
+Builds a synthetic jobs.db with --rows rows (descriptions included), then
+scans growing prefixes of it in fresh child processes, once with
+cursor.fetchall() and once with db_iter.iter_rows, and reports each
+child's peak RSS. A second pair of children downloads a --body-mb page
+from a local server with response.content vs http_client.read_capped.
+
+Usage: python benchmarks/bench_memory.py [--rows N] [--body-mb MB] [--db PATH]
+"""
+import argparse
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_utils import JOBS_SCHEMA
+
+DESCRIPTION = "Business analyst role gathering requirements for retail banking platforms. " * 3
+SELECT = "SELECT id, location, description FROM jobs WHERE location IS NOT NULL AND location != ''"
+
+
+def build_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(JOBS_SCHEMA)
+    conn.execute('PRAGMA journal_mode=OFF')
+    with conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, title, company, url, location, description) VALUES (?, 'Analyst', 'bank', ?, ?, ?)",
+            ((str(uuid.uuid4()), f'https://example.com/{i}', f'City {i % 500}, ON', DESCRIPTION)
+             for i in range(rows)),
+        )
+    conn.close()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child_scan(mode, limit, db_path):
+    from db_iter import iter_rows
+
+    conn = sqlite3.connect(db_path)
+    seen = 0
+    if mode == 'fetchall':
+        for _ in conn.execute(f"{SELECT} LIMIT ?", (limit,)).fetchall():
+            seen += 1
+    else:
+        for _ in iter_rows(conn, ['location', 'description'], where="location IS NOT NULL AND location != ''"):
+            seen += 1
+            if seen >= limit:
+                break
+    return seen
+
+
+def child_http(mode, url):
+    import requests
+    from http_client import read_capped
+
+    with requests.get(url, stream=(mode == 'capped'), timeout=60) as response:
+        if mode == 'content':
+            return len(response.content)
+        content, _ = read_capped(response)
+        return len(content)
+
+
+class BigPage(BaseHTTPRequestHandler):
+    size = 0
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(self.size))
+        self.end_headers()
+        block = b'<p>' + b'x' * 65530 + b'</p>'
+        try:
+            for start in range(0, self.size, len(block)):
+                self.wfile.write(block[:self.size - start])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def run_child(*args):
+    out = subprocess.run([sys.executable, __file__, '--child', *map(str, args)],
+                         capture_output=True, text=True, check=True)
+    count, rss = out.stdout.split()
+    return int(count), float(rss)
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        kind, mode, arg = sys.argv[2:5]
+        if kind == 'scan':
+            count = child_scan(mode, int(arg), sys.argv[5])
+        else:
+            count = child_http(mode, arg)
+        print(count, f"{peak_rss_mb():.1f}")
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--body-mb', type=int, default=100)
+    parser.add_argument('--db', help='reuse (or create) the synthetic DB here')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'jobs.db')
+        if not os.path.exists(db_path):
+            start = time.perf_counter()
+            build_db(db_path, args.rows)
+            print(f"Built {args.rows:,} rows in {time.perf_counter() - start:.0f}s "
+                  f"({os.path.getsize(db_path) / 1e6:.0f} MB)\n")
+
+        print(f"{'rows':>10}  {'fetchall':>12}  {'keyset':>12}")
+        for limit in sorted({args.rows // 10, args.rows // 3, args.rows}):
+            _, full = run_child('scan', 'fetchall', limit, db_path)
+            _, paged = run_child('scan', 'keyset', limit, db_path)
+            print(f"{limit:>10,}  {full:>9.0f} MB  {paged:>9.0f} MB")
+
+    BigPage.size = args.body_mb * 1024 * 1024
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BigPage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/'
+    print(f"\n{args.body_mb} MB page")
+    for mode in ('content', 'capped'):
+        size, rss = run_child('http', mode, url)
+        print(f"  {mode:8} read {size / 1e6:6.1f} MB, peak RSS {rss:.0f} MB")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Latency and output tokens per job: free-form vs schema-bounded Ollama calls
+
+The built-in stand-in generates at a fixed token rate. Like a small model
+without a format it wraps the JSON in a preamble and a trailing
+explanation; with a format it emits the object only, and it honours
+num_predict. Pass --url to run against a real Ollama instead.
+
+Usage: python benchmarks/bench_ollama.py [--jobs N] [--rate TOKENS_PER_S] [--url URL]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from bench_utils import ROOT  # noqa: F401  (sets up sys.path)
+from job_enricher import ANALYSIS_PROMPT, MODEL
+from ollama_client import ANALYSIS_SCHEMA, OllamaClient, extract_json_object, validate
+
+ANSWER = json.dumps({
+    'is_real_job': True,
+    'requires_citizenship': False,
+    'no_visa_sponsorship': True,
+    'location': 'Toronto, ON, Canada',
+    'summary': 'Business analyst gathering requirements for retail banking platforms, hybrid',
+})
+PREAMBLE = "Here is the analysis of the job posting in the requested JSON format:\n\n```json\n"
+TRAILER = ("\n```\n\nExplanation:\n- The posting describes a concrete role at a named employer, "
+           "so it is a real job.\n- It says applicants must be authorized to work and that visa "
+           "sponsorship is not offered.\n- The location is given as Toronto with a hybrid schedule.\n"
+           "Let me know if you would like any other details extracted from this posting!")
+
+DESCRIPTION = (
+    "As a Business Analyst you will partner with product owners to gather requirements. "
+    "Applicants must be authorized to work in Canada; we do not offer visa sponsorship. "
+    "This role is hybrid in Toronto, ON, Canada."
+) * 6
+
+
+def tokens(text):
+    # ~4 characters per token is close enough for pacing
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def make_handler(rate):
+    class FakeOllama(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def handle(self):
+            # The bounded client hangs up mid-stream on purpose
+            try:
+                super().handle()
+            except ConnectionResetError:
+                pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            text = ANSWER if body.get('format') else PREAMBLE + ANSWER + TRAILER
+            out = tokens(text)
+            limit = (body.get('options') or {}).get('num_predict')
+            if limit and limit > 0:
+                out = out[:limit]
+            prompt_tokens = len(body['prompt']) // 4
+
+            if not body.get('stream', True):
+                time.sleep(len(out) / rate)
+                self._send(json.dumps({'response': ''.join(out), 'done': True,
+                                       'eval_count': len(out), 'prompt_eval_count': prompt_tokens}).encode())
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for token in out:
+                    time.sleep(1 / rate)
+                    self._chunk(json.dumps({'response': token, 'done': False}).encode() + b'\n')
+                self._chunk(json.dumps({'response': '', 'done': True, 'eval_count': len(out),
+                                        'prompt_eval_count': prompt_tokens}).encode() + b'\n')
+                self._chunk(b'')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _send(self, payload):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _chunk(self, payload):
+            self.wfile.write(f'{len(payload):x}\r\n'.encode() + payload + b'\r\n')
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return FakeOllama
+
+
+def legacy_call(session, url, prompt):
+    """What analyze_with_ollama did before: one non-streamed, unbounded call"""
+    start = time.perf_counter()
+    response = session.post(url, json={'model': MODEL, 'prompt': prompt, 'stream': False,
+                                       'temperature': 0.1}, timeout=300)
+    data = response.json()
+    text = data.get('response', '')
+    block = extract_json_object(text)
+    parsed = json.loads(block) if block else None
+    return time.perf_counter() - start, data.get('eval_count', len(tokens(text))), parsed
+
+
+def bounded_call(client, prompt):
+    start = time.perf_counter()
+    before = client.stats['output_tokens']
+    text = client.generate_json(prompt, ANALYSIS_SCHEMA)
+    parsed = validate(json.loads(text), ANALYSIS_SCHEMA) if text else None
+    return time.perf_counter() - start, client.stats['output_tokens'] - before, parsed
+
+
+def report(label, results):
+    n = len(results)
+    latency = sum(r[0] for r in results) / n
+    out = sum(r[1] for r in results) / n
+    ok = sum(1 for r in results if r[2])
+    print(f"{label:8} {latency:6.2f} s/job  {out:6.0f} output tokens/job  {ok}/{n} parsed")
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=5)
+    parser.add_argument('--rate', type=float, default=150, help='stand-in tokens per second')
+    parser.add_argument('--url', help='real Ollama /api/generate URL')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.rate))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/api/generate'
+        print(f"Fake Ollama at {args.rate:g} tokens/s\n")
+
+    prompt = ANALYSIS_PROMPT.format(title='Business Analyst', company='td', description=DESCRIPTION)
+    session = requests.Session()
+    client = OllamaClient(MODEL, url, session=session, timeout=300)
+
+    before = report('legacy', [legacy_call(session, url, prompt) for _ in range(args.jobs)])
+    after = report('bounded', [bounded_call(client, prompt) for _ in range(args.jobs)])
+    print(f"\n{before / after:.1f}x faster per job; {client.summary()}")
+
+    session.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
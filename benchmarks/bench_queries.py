@@ -0,0 +1,166 @@
+"""The project's real queries against synthetic jobs.db files of growing size
+
+Builds (or reuses, with --dir) a synthetic DB per scale with
+synthetic_db.py, then times each query: the enricher's lease claim
+(job_store), the geocoders' distinct-location selects (geocoding), the
+location scan of update_ollama_locationiq_to_db (db_iter), and
+getAllJobs / getJobsByStatus / getJobsByFilters from backend/db.js with
+the same SQL db.js builds. Statements are captured with a trace callback
+while the real code runs, then shown with EXPLAIN QUERY PLAN. Writes
+(the claim) run inside a transaction that is rolled back, so every
+repetition sees the same data.
+
+Usage: python benchmarks/bench_queries.py [--scales 10000,100000,1000000] [--repeat N]
+       [--desc-median CHARS] [--dir DIR] [--json PATH]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import synthetic_db
+from db_iter import iter_chunks
+from geocoding import distinct_locations
+from job_store import CLAIM_SQL, RECLAIM_SQL
+
+
+def jobs_by_filters(conn, filters):
+    """db.js getJobsByFilters, clause for clause"""
+    query = 'SELECT * FROM jobs WHERE 1=1'
+    params = []
+    if filters.get('location'):
+        query += ' AND location LIKE ?'
+        params.append(f"%{filters['location']}%")
+    if filters.get('experience_level'):
+        query += ' AND experience_level = ?'
+        params.append(filters['experience_level'])
+    if filters.get('job_type'):
+        query += ' AND job_type = ?'
+        params.append(filters['job_type'])
+    if filters.get('salary_min'):
+        query += ' AND (salary_min IS NULL OR salary_min >= ?)'
+        params.append(filters['salary_min'])
+    if filters.get('salary_max'):
+        query += ' AND (salary_max IS NULL OR salary_max <= ?)'
+        params.append(filters['salary_max'])
+    if filters.get('source'):
+        query += ' AND source = ?'
+        params.append(filters['source'])
+    query += ' ORDER BY created_at DESC'
+    return conn.execute(query, params).fetchall()
+
+
+def claim_jobs(conn, limit=10):
+    """JobStore.claim_jobs' statements, rolled back afterwards"""
+    now = time.time()
+    conn.execute('BEGIN')
+    try:
+        conn.execute(RECLAIM_SQL, (now,))
+        return conn.execute(CLAIM_SQL, ('bench', now + 600, limit)).fetchall()
+    finally:
+        conn.rollback()
+
+
+def location_scan_page(conn):
+    """First keyset page of the Ollama location script's scan"""
+    return next(iter_chunks(conn, ['location'], where="location IS NOT NULL AND location != ''"), [])
+
+
+QUERIES = {
+    'claim_jobs (get_pending_jobs)': claim_jobs,
+    'geocode distinct_locations': lambda conn: distinct_locations(conn),
+    'geocode distinct_locations missing': lambda conn: distinct_locations(conn, only_missing=True),
+    'location scan page (db_iter)': location_scan_page,
+    'getAllJobs': lambda conn: conn.execute('SELECT * FROM jobs ORDER BY created_at DESC').fetchall(),
+    "getJobsByStatus('new')": lambda conn: conn.execute('SELECT * FROM jobs WHERE status = ?',
+                                                       ('new',)).fetchall(),
+    "filters location='Toronto'": lambda conn: jobs_by_filters(conn, {'location': 'Toronto'}),
+    'filters location+job_type+level': lambda conn: jobs_by_filters(
+        conn, {'location': 'Mexico', 'job_type': 'full-time', 'experience_level': 'senior'}),
+    'filters salary range': lambda conn: jobs_by_filters(conn, {'salary_min': 80000, 'salary_max': 150000}),
+}
+
+
+def capture(conn, query):
+    """Run query once and return the SELECT/UPDATE statements it issued (params inlined)"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        query(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(('SELECT', 'UPDATE', 'WITH'))]
+
+
+def query_plan(conn, statement):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}')]
+
+
+def time_query(conn, query, repeat):
+    times = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = query(conn)
+        times.append(time.perf_counter() - start)
+        rows = len(result)
+    return statistics.median(times) * 1000, rows
+
+
+def cell(ms, rows):
+    count = f"{rows // 1000}k" if rows >= 100000 else str(rows)
+    return f"{ms:>9.1f} ms {count:>5}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--desc-median', type=int, default=1000,
+                        help='median description length (smaller keeps 10M-row DBs on disk)')
+    parser.add_argument('--dir', help='keep generated DBs here and reuse them on later runs')
+    parser.add_argument('--json', help='also write the timings here')
+    args = parser.parse_args()
+    scales = [int(s) for s in args.scales.split(',')]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        plans = {}
+        for rows in scales:
+            path = os.path.join(directory, f'synthetic-{rows}-{args.desc_median}.db')
+            if not os.path.exists(path):
+                seconds = synthetic_db.build(path, rows, desc_median=args.desc_median)
+                print(f"Built {rows:,} rows in {seconds:.0f}s ({os.path.getsize(path) / 1e6:.0f} MB)")
+            conn = sqlite3.connect(path, isolation_level=None)
+            results[rows] = {}
+            for name, query in QUERIES.items():
+                plans[name] = [(s, query_plan(conn, s)) for s in capture(conn, query)]
+                results[rows][name] = time_query(conn, query, args.repeat)
+            conn.close()
+
+    width = max(map(len, QUERIES))
+    print(f"\n{'query':{width}}" + ''.join(f"{rows:>18,}" for rows in scales))
+    for name in QUERIES:
+        print(f"{name:{width}}" + ''.join(cell(*results[rows][name]) for rows in scales))
+
+    print(f"\nEXPLAIN QUERY PLAN at {scales[-1]:,} rows")
+    for name, statements in plans.items():
+        print(f"\n{name}")
+        for statement, plan in statements:
+            print(f"  {' '.join(statement.split())[:110]}")
+            for step in plan:
+                print(f"    {step}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({str(rows): {name: {'ms': round(ms, 3), 'rows': count} for name, (ms, count) in by_query.items()}
+                       for rows, by_query in results.items()}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
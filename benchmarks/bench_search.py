@@ -0,0 +1,111 @@
+"""Search latency: LIKE scans and the browser filter vs the jobs_fts index
+
+Builds (or reuses, with --db) a synthetic jobs.db with --rows jobs, times
+building jobs_fts over it, then runs each search --repeat times:
+db.js getJobsByFilters' location LIKE (as written, and with LIMIT 50),
+the frontend's lowercase-and-concat filter over every job (in Python,
+after the rows are loaded), and search_index.search. Finally times
+inserting --inserts new jobs with and without the index triggers.
+
+Usage: python benchmarks/bench_search.py [--rows N] [--repeat N] [--inserts N] [--db PATH]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import synthetic_db
+from search_index import ensure_search_index, optimize, search
+
+QUERIES = ['toronto', 'business analyst', 'senior analyst toronto', 'location:mexico', 'sql spanish', 'ana']
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(0.99 * len(times)))], len(result)
+
+
+def browser_filter(jobs, text):
+    """frontend/fix_search.py applyFilters: every term in title/company/location/summary"""
+    terms = text.lower().split()
+    return [job for job in jobs
+            if all(term in ' '.join([job[0] or '', job[1] or '', job[2] or '', job[3] or '']).lower()
+                   for term in terms)]
+
+
+def insert_jobs(path, n, start):
+    conn = sqlite3.connect(path)
+    began = time.perf_counter()
+    with conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, title, company, url, location, description) VALUES (?, ?, 'bank', ?, ?, ?)",
+            ((f'new-{start + i}', f'Analyst {i}', f'https://example.com/new/{start + i}', 'Toronto, ON',
+              'Business analyst role. ' * 40) for i in range(n)),
+        )
+    conn.close()
+    return (time.perf_counter() - began) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--inserts', type=int, default=1000)
+    parser.add_argument('--desc-median', type=int, default=1000)
+    parser.add_argument('--db', help='reuse (or create) the synthetic DB here; the index is added to a copy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.db or os.path.join(tmp, 'source.db')
+        if not os.path.exists(source):
+            seconds = synthetic_db.build(source, args.rows, desc_median=args.desc_median)
+            print(f"Built {args.rows:,} rows in {seconds:.0f}s")
+        plain = os.path.join(tmp, 'plain.db')
+        indexed = os.path.join(tmp, 'indexed.db')
+        shutil.copy(source, plain)
+        shutil.copy(source, indexed)
+
+        conn = sqlite3.connect(indexed)
+        before = os.path.getsize(indexed)
+        start = time.perf_counter()
+        ensure_search_index(conn)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        optimize(conn)
+        merged = time.perf_counter() - start
+        conn.execute('PRAGMA wal_checkpoint')
+        print(f"jobs_fts built in {built:.1f}s, optimized in {merged:.1f}s, "
+              f"+{(os.path.getsize(indexed) - before) / 1e6:.0f} MB on {before / 1e6:.0f} MB\n")
+
+        jobs = conn.execute('SELECT title, company, location, summary FROM jobs').fetchall()
+        print(f"{'query':24} {'LIKE (db.js)':>22} {'LIKE LIMIT 50':>22} {'browser filter':>22} {'FTS5 top 50':>22}")
+        for text in QUERIES:
+            word = text.split(':')[-1].split()[0]
+            like = 'SELECT * FROM jobs WHERE 1=1 AND location LIKE ? ORDER BY created_at DESC'
+            cells = [
+                timed(lambda: conn.execute(like, (f'%{word}%',)).fetchall(), max(1, args.repeat // 10)),
+                timed(lambda: conn.execute(like + ' LIMIT 50', (f'%{word}%',)).fetchall(), args.repeat),
+                timed(lambda: browser_filter(jobs, text.split(':')[-1]), max(1, args.repeat // 10)),
+                timed(lambda: search(conn, text), args.repeat),
+            ]
+            print(f"{text:24} " + ' '.join(f"{p50:7.1f}/{p99:7.1f} ms {n:>6}" for p50, p99, n in cells))
+        print("(p50/p99 ms, rows returned; LIKE only sees the location word, as db.js does)")
+        conn.close()
+
+        plain_ms = insert_jobs(plain, args.inserts, 0)
+        indexed_ms = insert_jobs(indexed, args.inserts, 0)
+        print(f"\nInsert {args.inserts} jobs: {plain_ms:.0f} ms without the index, "
+              f"{indexed_ms:.0f} ms with its triggers")
+
+
+if __name__ == '__main__':
+    main()
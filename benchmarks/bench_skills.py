@@ -0,0 +1,122 @@
+"""Skill queries: JSON scans vs the skills_index posting lists
+
+Builds (or reuses, with --db) a synthetic jobs.db with --rows jobs, times
+building the skills index over a copy, then runs each AND/OR query
+--repeat times three ways: JSON.parse of every row's skills in Python
+(what a client-side filter does), SQLite json_each over every row, and
+skills_index.find_jobs. The scans compare lowercased strings, so they miss
+"JS" for javascript or "Python 3" for python; the row counts show how
+much. Finally re-indexes --updates jobs whose skills were edited.
+
+Usage: python benchmarks/bench_skills.py [--rows N] [--repeat N] [--updates N] [--db PATH]
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import synthetic_db
+from skills_index import ensure_skills_index, find_jobs, index_skills
+
+# (all of, any of)
+QUERIES = [
+    (['python', 'sql'], []),
+    (['excel', 'tableau', 'agile'], []),
+    (['kubernetes', 'go'], []),
+    (['cobol', 'kafka'], []),
+    ([], ['react', 'typescript', 'node.js']),
+    (['aws'], ['python', 'java']),
+]
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), len(result)
+
+
+def python_scan(conn, all_of, any_of):
+    """Parse every row's skills JSON and compare lowercased strings"""
+    found = []
+    for job_id, mandatory, preferred in conn.execute(
+            'SELECT id, mandatory_skills, preferred_skills FROM jobs WHERE mandatory_skills IS NOT NULL'):
+        skills = {s.lower() for s in json.loads(mandatory or '[]') + json.loads(preferred or '[]')}
+        if all(s in skills for s in all_of) and (not any_of or any(s in skills for s in any_of)):
+            found.append(job_id)
+    return found
+
+
+def json_each_scan(conn, all_of, any_of):
+    """The same test in SQL with json_each (still reads every row)"""
+    has = ('EXISTS (SELECT 1 FROM json_each(mandatory_skills) WHERE lower(value) {0} '
+           'UNION ALL SELECT 1 FROM json_each(preferred_skills) WHERE lower(value) {0})')
+    clauses = [has.format('= ?') for _ in all_of]
+    params = [s for skill in all_of for s in (skill, skill)]
+    if any_of:
+        clauses.append(has.format(f"IN ({', '.join('?' * len(any_of))})"))
+        params += any_of * 2
+    sql = f"SELECT id FROM jobs WHERE mandatory_skills IS NOT NULL AND {' AND '.join(clauses)}"
+    return conn.execute(sql, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--updates', type=int, default=1000)
+    parser.add_argument('--desc-median', type=int, default=1000)
+    parser.add_argument('--db', help='reuse (or create) the synthetic DB here; the index is added to a copy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.db or os.path.join(tmp, 'source.db')
+        if not os.path.exists(source):
+            seconds = synthetic_db.build(source, args.rows, desc_median=args.desc_median)
+            print(f"Built {args.rows:,} rows in {seconds:.0f}s")
+        path = os.path.join(tmp, 'indexed.db')
+        shutil.copy(source, path)
+
+        conn = sqlite3.connect(path)
+        before = os.path.getsize(path)
+        start = time.perf_counter()
+        ensure_skills_index(conn)
+        jobs, postings = index_skills(conn)
+        built = time.perf_counter() - start
+        conn.execute('PRAGMA wal_checkpoint')
+        skills = conn.execute('SELECT COUNT(*) FROM skills').fetchone()[0]
+        print(f"Indexed {jobs:,} jobs ({postings:,} postings, {skills} skills) in {built:.1f}s, "
+              f"+{(os.path.getsize(path) - before) / 1e6:.0f} MB on {before / 1e6:.0f} MB\n")
+
+        print(f"{'query':40} {'JSON.parse scan':>20} {'json_each scan':>20} {'skills index':>20}")
+        for all_of, any_of in QUERIES:
+            label = ' AND '.join(all_of) + (' AND ' if all_of and any_of else '') + \
+                (f"({' OR '.join(any_of)})" if any_of else '')
+            cells = [
+                timed(lambda: python_scan(conn, all_of, any_of), max(1, args.repeat // 10)),
+                timed(lambda: json_each_scan(conn, all_of, any_of), max(1, args.repeat // 10)),
+                timed(lambda: find_jobs(conn, all_of, any_of), args.repeat),
+            ]
+            print(f"{label:40} " + ' '.join(f"{ms:8.1f} ms {n:>8}" for ms, n in cells))
+        print("(median ms, jobs matched; the scans miss aliased and versioned spellings)")
+
+        ids = [row[0] for row in conn.execute(
+            'SELECT id FROM jobs WHERE mandatory_skills IS NOT NULL LIMIT ?', (args.updates,))]
+        with conn:
+            conn.executemany('UPDATE jobs SET mandatory_skills = ? WHERE id = ?',
+                             [(json.dumps(['Golang', 'k8s', 'Terraform']), job_id) for job_id in ids])
+        start = time.perf_counter()
+        jobs, _ = index_skills(conn)
+        print(f"\nRe-indexed {jobs} edited jobs in {(time.perf_counter() - start) * 1000:.0f} ms")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+
+# Benchmarks import backend modules the same way the scripts do when run
+# from backend/ (enrichers import their siblings directly).
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, 'enrichers')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Shared with the tests; re-exported for the benchmark scripts
+from jobs_schema import JOBS_SCHEMA, make_jobs_db  # noqa: E402,F401
@@ -0,0 +1,142 @@
+"""Prompt tokens and extraction accuracy: first-3000-chars vs relevance windows
+
+Builds long synthetic postings (company blurb, duties, requirements,
+benefits, EEO boilerplate) with an eligibility clause, a location and
+sometimes a salary placed at random positions, then compares what each
+strategy would send to the LLM. Accuracy is measured with the keyword
+classifier as a stand-in extractor; pass --url to also run both prompts
+through a real Ollama and score its flags.
+
+Usage: python benchmarks/bench_windowing.py [--jobs N] [--budget TOKENS] [--url URL]
+"""
+import argparse
+import json
+import random
+
+from bench_utils import ROOT  # noqa: F401  (sets up sys.path)
+from job_enricher import ANALYSIS_PROMPT, MODEL
+from keyword_classifier import classify
+from ollama_client import ANALYSIS_SCHEMA, OllamaClient, validate
+from windowing import TOKEN_BUDGET, estimate_tokens, select_windows
+
+OLD_CHARS = 3000
+FLAGS = ('requires_citizenship', 'no_visa_sponsorship')
+
+CITIES = ['Toronto, ON, Canada', 'Austin, TX, USA', 'Monterrey, NL, Mexico', 'Glasgow, Scotland, UK',
+          'Pune, Maharashtra, India', 'Charlotte, NC, USA']
+BLURB = [
+    "Our company has a long history of putting people first and giving back to the communities we serve.",
+    "We believe diverse teams build better products and we invest in every employee's growth.",
+    "For over 150 years we have helped customers achieve their financial goals.",
+    "Our culture is built on trust, curiosity and a relentless focus on the customer.",
+    "We are proud to be recognized as a top employer for the tenth year running.",
+]
+DUTIES = [
+    "Partner with product owners to gather and document business requirements.",
+    "Facilitate workshops with stakeholders across operations, finance and technology.",
+    "Translate business needs into user stories with clear acceptance criteria.",
+    "Support user acceptance testing and production readiness activities.",
+    "Analyze current-state processes and recommend improvements.",
+]
+REQUIREMENTS = [
+    "3+ years of experience as a business analyst in financial services.",
+    "Proficiency with SQL and Excel; experience with Jira and Confluence.",
+    "Strong knowledge of agile delivery practices.",
+    "Bachelor's degree in business, computer science or a related field.",
+]
+BENEFITS = [
+    "We offer a comprehensive benefits package including health, dental and vision coverage.",
+    "Employees enjoy generous paid time off, parental leave and wellness programs.",
+    "Our retirement savings plan includes a company match.",
+    "Take advantage of tuition reimbursement and professional development budgets.",
+]
+EEO = ("We are an equal opportunity employer and value diversity. All qualified applicants will "
+       "receive consideration without regard to race, color, religion, sex, national origin, "
+       "disability or veteran status. Accommodations are available on request.")
+CLAUSES = [
+    ("Applicants must be U.S. citizens due to federal contract requirements.", True, False),
+    ("We are unable to sponsor work visas for this position.", False, True),
+    ("Must be a US Citizen or Green Card holder; no visa sponsorship is available.", True, True),
+    ("Visa sponsorship is available for the right candidate.", False, False),
+    (None, False, False),
+]
+
+
+def make_posting(rng):
+    city = rng.choice(CITIES)
+    clause, citizenship, no_visa = rng.choice(CLAUSES)
+    parts = [f"We are hiring a Business Analyst to join our Payments team in {city}."]
+    parts += rng.sample(BLURB, 3) * rng.randint(3, 6)
+    parts += DUTIES + REQUIREMENTS
+    if rng.random() < 0.5:
+        parts.append(f"The base salary range for this role is ${rng.randint(70, 90)},000 - "
+                     f"${rng.randint(95, 130)},000 per year.")
+    parts += rng.sample(BENEFITS, 3) * rng.randint(3, 6)
+    if clause:
+        # Eligibility usually sits with the requirements or at the very end
+        at = rng.choice([len(parts) - rng.randint(0, 3), len(parts)])
+        parts.insert(at, clause)
+    parts.append(EEO)
+    return {
+        'text': ' '.join(parts),
+        'clause': clause,
+        'city': city.split(',')[0],
+        'requires_citizenship': citizenship,
+        'no_visa_sponsorship': no_visa,
+    }
+
+
+def flags_correct(result, posting):
+    return sum(result.get(flag) == posting[flag] for flag in FLAGS)
+
+
+def ollama_flags(client, text):
+    prompt = ANALYSIS_PROMPT.format(title='Business Analyst', company='bank', description=text)
+    raw = client.generate_json(prompt, ANALYSIS_SCHEMA)
+    try:
+        return validate(json.loads(raw), ANALYSIS_SCHEMA) if raw else {}
+    except ValueError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--budget', type=int, default=TOKEN_BUDGET)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--url', help='real Ollama /api/generate URL to score actual extraction')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    postings = [make_posting(rng) for _ in range(args.jobs)]
+    strategies = {
+        f'first {OLD_CHARS} chars': lambda text: text[:OLD_CHARS],
+        f'windows ({args.budget} tok)': lambda text: select_windows(text, args.budget),
+    }
+    client = OllamaClient(MODEL, args.url, timeout=300) if args.url else None
+
+    full = sum(estimate_tokens(p['text']) for p in postings) / len(postings)
+    print(f"{len(postings)} postings, {full:.0f} description tokens on average\n")
+    baseline = None
+    for label, strategy in strategies.items():
+        tokens = clause_kept = city_kept = correct = llm_correct = 0
+        for posting in postings:
+            text = strategy(posting['text'])
+            tokens += estimate_tokens(text)
+            clause_kept += posting['clause'] is None or posting['clause'] in text
+            city_kept += posting['city'] in text
+            correct += flags_correct(classify(text), posting)
+            if client:
+                llm_correct += flags_correct(ollama_flags(client, text), posting)
+        n = len(postings)
+        avg = tokens / n
+        baseline = baseline or avg
+        print(f"{label:22} {avg:6.0f} prompt tokens/job ({avg / baseline - 1:+.0%} vs old)  "
+              f"clause kept {clause_kept / n:.0%}  location kept {city_kept / n:.0%}  "
+              f"flag accuracy {correct / (2 * n):.1%}")
+        if client:
+            print(f"{'':22} Ollama flag accuracy {llm_correct / (2 * n):.1%}")
+
+
+if __name__ == '__main__':
+    main()
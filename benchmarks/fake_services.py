@@ -0,0 +1,289 @@
+"""Local stand-ins for the services the enricher and geocoders talk to
+
+- Ollama /api/generate: answers whatever JSON schema it is sent (format),
+  streamed token by token after a configurable time-to-first-token
+- LocationIQ (/v1/search), Nominatim (/search) and Photon (/api/) in one
+  server, each in its own response format, with configurable latency
+- A job site serving pages saved by playwright_fetch_job.js under
+  webarchives/ (synthetic postings when that folder is empty) at /job/<n>
+
+Each start_* function returns a Service with .url and .stop(); request
+counts are kept on the service for sanity checks.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench_utils import ROOT
+
+WEBARCHIVE_DIR = os.path.join(ROOT, 'webarchives')
+
+SAMPLE_STRINGS = {
+    'location': 'Toronto, ON, Canada',
+    'summary': 'Business analyst gathering requirements for retail banking platforms',
+    'currency': 'CAD',
+    'work_type': 'hybrid',
+    'job_type': 'full-time',
+    'experience_level': 'mid',
+    'posted_date': '2025-01-15',
+    'city': 'Toronto',
+    'state': 'Ontario',
+    'country': 'Canada',
+}
+SKILLS = ['SQL', 'Python', 'Excel', 'Stakeholder management', 'Agile']
+
+# query keyword -> (city, state, country, country code) for the geocoder mock
+PLACES = [
+    ('toronto', ('Toronto', 'Ontario', 'Canada', 'ca')),
+    ('vancouver', ('Vancouver', 'British Columbia', 'Canada', 'ca')),
+    ('mexico', ('Ciudad de México', 'Ciudad de México', 'México', 'mx')),
+    ('veracruz', ('Veracruz', 'Veracruz', 'México', 'mx')),
+    ('madrid', ('Madrid', 'Comunidad de Madrid', 'España', 'es')),
+    ('london', ('London', 'England', 'United Kingdom', 'gb')),
+    ('new york', ('New York', 'New York', 'United States', 'us')),
+]
+FALLBACK_PLACES = [place for _, place in PLACES]
+
+JOB_PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title>
+<script>window.__analytics = {{"page": "job", "id": {n}}};</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body>
+<nav><a href="/">Home</a> <a href="/jobs">Search jobs</a> <a href="/login">Sign in</a></nav>
+<main><h1>{title}</h1>
+<div data-automation-id="jobPostingDescription">
+<p>{company} is hiring a {title} in {city}. You will partner with product owners and
+engineering teams to gather requirements, write user stories and validate delivery.</p>
+<h2>Responsibilities</h2><ul>{duties}</ul>
+<h2>Requirements</h2><ul>{requirements}</ul>
+<p>Applicants must be authorized to work in Canada. We do not offer visa sponsorship
+for this position. This role is hybrid, three days a week in our {city} office.</p>
+</div></main>
+<footer>{footer}</footer>
+</body></html>
+"""
+
+
+def sample_value(key, spec, index=0):
+    """A plausible value for one JSON schema property"""
+    types = spec.get('type')
+    types = types if isinstance(types, list) else [types]
+    if 'object' in types:
+        return {k: sample_value(k, v, index) for k, v in spec.get('properties', {}).items()}
+    if 'array' in types:
+        items = spec.get('items', {})
+        count = max(spec.get('minItems', 0), min(spec.get('maxItems', 3), 3))
+        if items.get('type') == 'string':
+            return SKILLS[:count]
+        return [sample_value(key, items, i) for i in range(count)]
+    if 'boolean' in types:
+        return key == 'is_real_job' or key == 'no_visa_sponsorship'
+    if 'integer' in types:
+        return index
+    if 'number' in types:
+        return 85000 if 'salary' in key else 1
+    if 'string' in types:
+        if spec.get('enum'):
+            return SAMPLE_STRINGS.get(key) if SAMPLE_STRINGS.get(key) in spec['enum'] else spec['enum'][0]
+        return SAMPLE_STRINGS.get(key, key)[:spec.get('maxLength', 80)]
+    return None
+
+
+def tokens(text):
+    # ~4 characters per token is close enough for pacing
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+class Service:
+    """A ThreadingHTTPServer on a free local port, served from a daemon thread"""
+
+    def __init__(self, handler, path=''):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}{path}'
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler.service = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients see Nagle + delayed-ACK stalls of ~40 ms per response
+    disable_nagle_algorithm = True
+    service = None
+
+    def handle(self):
+        # Bounded clients hang up mid-stream on purpose
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_body(self, payload, content_type='application/json', status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_ollama(latency=0.2, rate=200.0):
+    """Ollama stand-in: latency seconds to the first token, then rate tokens/s"""
+
+    class FakeOllama(QuietHandler):
+        def do_POST(self):
+            self.service.count()
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            schema = body.get('format')
+            if isinstance(schema, dict):
+                answer = json.dumps(sample_value('', schema))
+            else:
+                answer = json.dumps(sample_value('', {'type': 'object', 'properties': {
+                    k: {'type': 'string'} for k in ('location', 'summary')}}))
+            out = tokens(answer)
+            limit = (body.get('options') or {}).get('num_predict')
+            if limit and limit > 0:
+                out = out[:limit]
+            prompt_tokens = len(body.get('prompt', '')) // 4
+            time.sleep(latency)
+
+            if not body.get('stream', True):
+                time.sleep(len(out) / rate)
+                self.send_body(json.dumps({'response': ''.join(out), 'done': True, 'eval_count': len(out),
+                                           'prompt_eval_count': prompt_tokens}).encode())
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for token in out:
+                    time.sleep(1 / rate)
+                    self._chunk(json.dumps({'response': token, 'done': False}).encode() + b'\n')
+                self._chunk(json.dumps({'response': '', 'done': True, 'eval_count': len(out),
+                                        'prompt_eval_count': prompt_tokens}).encode() + b'\n')
+                self._chunk(b'')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _chunk(self, payload):
+            self.wfile.write(f'{len(payload):x}\r\n'.encode() + payload + b'\r\n')
+            self.wfile.flush()
+
+    return Service(FakeOllama, '/api/generate')
+
+
+def lookup_place(query, miss_rate=0.0):
+    """Deterministic answer for a query: a known city, a stable pick, or None"""
+    folded = query.lower()
+    for keyword, place in PLACES:
+        if keyword in folded:
+            return place
+    digest = int(hashlib.md5(folded.encode()).hexdigest(), 16)
+    if (digest % 1000) / 1000 < miss_rate:
+        return None
+    return FALLBACK_PLACES[digest % len(FALLBACK_PLACES)]
+
+
+def start_geocoder(latency=0.05, miss_rate=0.0):
+    """LocationIQ/Nominatim (/v1/search, /search) and Photon (/api/) in one server"""
+
+    class FakeGeocoder(QuietHandler):
+        def do_GET(self):
+            self.service.count()
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query).get('q', [''])[0]
+            place = lookup_place(query, miss_rate)
+            time.sleep(latency)
+
+            if parts.path.rstrip('/') == '/api':
+                features = []
+                if place:
+                    city, state, country, code = place
+                    features.append({'type': 'Feature', 'properties': {
+                        'name': city, 'city': city, 'state': state, 'country': country,
+                        'countrycode': code.upper()}})
+                self.send_body(json.dumps({'type': 'FeatureCollection', 'features': features}).encode())
+            elif parts.path in ('/search', '/v1/search'):
+                if not place:
+                    self.send_body(b'[]')
+                    return
+                city, state, country, code = place
+                self.send_body(json.dumps([{
+                    'display_name': f'{city}, {state}, {country}',
+                    'address': {'city': city, 'state': state, 'country': country, 'country_code': code},
+                }]).encode())
+            else:
+                self.send_body(b'{"error": "not found"}', status=404)
+
+    return Service(FakeGeocoder)
+
+
+def synthetic_page(n):
+    city = FALLBACK_PLACES[n % len(FALLBACK_PLACES)][0]
+    duties = ''.join(f'<li>Own backlog item {i} end to end with the delivery team.</li>' for i in range(8))
+    requirements = ''.join(f'<li>{skill}: {3 + i % 4} years of hands-on experience.</li>'
+                           for i, skill in enumerate(SKILLS))
+    footer = ' '.join(f'<a href="/legal/{i}">Legal notice {i}</a>' for i in range(40))
+    return JOB_PAGE.format(n=n, title=f'Business Analyst {n}', company='Example Bank', city=city,
+                           duties=duties, requirements=requirements, footer=footer)
+
+
+def load_pages(directory=WEBARCHIVE_DIR, count=20):
+    """Saved job pages (HTML) from directory, or count synthetic ones"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.htm*'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages or [synthetic_page(n).encode() for n in range(count)]
+
+
+def start_job_site(pages=None, latency=0.02):
+    """Serves /job/<n> as pages[n % len(pages)], with ETags (304 on a match)"""
+    pages = pages or load_pages()
+    etags = [f'"{hashlib.md5(page).hexdigest()}"' for page in pages]
+
+    class FakeJobSite(QuietHandler):
+        def do_GET(self):
+            self.service.count()
+            path = urlsplit(self.path).path
+            if not path.startswith('/job/') or not path[5:].isdigit():
+                self.send_body(b'<html><body>Not found</body></html>', 'text/html', status=404)
+                return
+            time.sleep(latency)
+            n = int(path[5:]) % len(pages)
+            if self.headers.get('If-None-Match') == etags[n]:
+                self.send_response(304)
+                self.send_header('ETag', etags[n])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(pages[n])))
+            self.send_header('ETag', etags[n])
+            self.end_headers()
+            self.wfile.write(pages[n])
+
+    service = Service(FakeJobSite)
+    service.pages = len(pages)
+    return service
@@ -0,0 +1,284 @@
+"""End-to-end benchmark suite against local stand-in services
+
+Runs job_enricher's pipeline and the geocoders against fake_services
+(Ollama with configurable latency, LocationIQ/Nominatim/Photon, a job site
+fed from webarchives/), each scenario in a fresh child process so peak
+RSS is its own. Reports throughput, p50/p99 latency per stage and peak
+memory, and writes them as JSON to benchmarks/results/<commit>.json.
+
+--compare BASE.json checks this run (or NEW.json, without running) against
+an earlier one and exits non-zero when a metric got worse by more than
+--threshold percent.
+
+Outbound pacing (http_client token buckets) is switched off for the
+stand-ins unless --paced is given, so the numbers measure our code.
+
+Usage: python benchmarks/run_suite.py [--jobs N] [--locations N] [--ollama-latency S]
+       [--geocode-latency S] [--only enricher,geocode-photon] [--out PATH]
+       [--compare BASE.json [NEW.json]] [--threshold PCT]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from bench_utils import JOBS_SCHEMA, ROOT, make_jobs_db
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+SCENARIOS = ('enricher', 'geocode-locationiq', 'geocode-nominatim', 'geocode-photon')
+# metric -> True when higher is better
+METRICS = {'per_second': True, 'p50_ms': False, 'p99_ms': False, 'peak_rss_mb': False}
+# Latency changes smaller than this are noise whatever the percentage
+MIN_DELTA_MS = 2.0
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of seconds, in ms"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+
+class StageTimer:
+    """Per-stage call durations, safe to record from worker threads"""
+
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return timed
+
+    def report(self):
+        return {stage: {'count': len(values), 'p50_ms': percentile(values, 0.5), 'p99_ms': percentile(values, 0.99)}
+                for stage, values in self.samples.items()}
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_enricher(settings, tmp):
+    import fake_services
+    import job_enricher
+    from pipeline import EnrichmentPipeline
+
+    site = fake_services.start_job_site(latency=settings['page_latency'])
+    ollama = fake_services.start_ollama(settings['ollama_latency'], settings['ollama_rate'])
+    db_path = os.path.join(tmp, 'jobs.db')
+    make_jobs_db(db_path, settings['jobs'])
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE jobs SET url = replace(url, 'https://example.com', ?)", (site.url,))
+    conn.close()
+
+    job_enricher.DB_PATH = db_path
+    job_enricher.OLLAMA_URL = ollama.url
+    timer = StageTimer()
+    store = job_enricher.get_store()
+    store.flush = timer.wrap('flush', store.flush)
+    pipeline = EnrichmentPipeline(
+        timer.wrap('fetch', job_enricher.fetch_stage),
+        timer.wrap('analyze', job_enricher.analyze_stage),
+        timer.wrap('write', job_enricher.write_stage),
+        fetch_concurrency=settings['fetch_concurrency'],
+        llm_workers=settings['llm_workers'],
+        queue_size=job_enricher.QUEUE_SIZE,
+    )
+    start = time.perf_counter()
+    stats = pipeline.run(job_enricher.get_pending_jobs, once=True)
+    job_enricher.close_store()
+    elapsed = time.perf_counter() - start
+    site.stop()
+    ollama.stop()
+
+    failed = stats['fetch_failed'] + stats['analysis_failed']
+    return {'unit': 'jobs', 'count': stats['written'], 'failed': failed, 'seconds': round(elapsed, 3),
+            'per_second': round(stats['written'] / elapsed, 2), 'stages': timer.report(),
+            'requests': {'pages': site.requests, 'ollama': ollama.requests}}
+
+
+def run_geocoder(name, settings, tmp):
+    import fake_services
+    import geocode_runner
+    from geocoding import PROVIDERS, GeocodeResolver
+
+    server = fake_services.start_geocoder(settings['geocode_latency'], settings['miss_rate'])
+    conn = sqlite3.connect(os.path.join(tmp, 'jobs.db'))
+    conn.execute(JOBS_SCHEMA)
+    distinct = settings['locations']
+    with conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, title, company, url, location) VALUES (?, 'Analyst', 'bank', ?, ?)",
+            ((f'job-{i}', f'https://example.com/{i}', f'Office {i % distinct}, Toronto, ON')
+             for i in range(settings['jobs'])),
+        )
+
+    timer = StageTimer()
+    provider = PROVIDERS[name]()
+    provider.url = server.url + urlsplit(provider.url).path
+    provider.geocode = timer.wrap('request', provider.geocode)
+    geocode_runner.write_geocoded = timer.wrap('write', geocode_runner.write_geocoded)
+    resolver = GeocodeResolver(conn, [provider], simplify=False)
+
+    start = time.perf_counter()
+    queries, updated, _ = geocode_runner.run_geocoding(conn, resolver, run='bench', workers=settings['workers'])
+    elapsed = time.perf_counter() - start
+    server.stop()
+    conn.close()
+    return {'unit': 'locations', 'count': queries, 'jobs_updated': updated, 'seconds': round(elapsed, 3),
+            'per_second': round(queries / elapsed, 2), 'stages': timer.report(),
+            'requests': {'geocoder': server.requests}, 'errors': resolver.stats['errors']}
+
+
+def child(scenario, settings):
+    """Run one scenario with its output swallowed; print the result as JSON"""
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        if scenario == 'enricher':
+            result = run_enricher(settings, tmp)
+        else:
+            result = run_geocoder(scenario.split('-', 1)[1], settings, tmp)
+    result['peak_rss_mb'] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def run_scenario(scenario, settings, paced):
+    env = dict(os.environ, ENRICH_HTTP_CACHE='0', ENRICH_LLM_CACHE='0', ENRICH_NEAR_DUPES='0')
+    if not paced:
+        env.update({f'HTTP_RATE_{name}': '0' for name in ('DEFAULT', 'LOCATIONIQ', 'NOMINATIM', 'PHOTON')})
+    out = subprocess.run([sys.executable, __file__, '--child', scenario, json.dumps(settings)],
+                         capture_output=True, text=True, env=env)
+    if out.returncode:
+        raise RuntimeError(f"{scenario} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    return commit, bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+def print_results(results):
+    for name, result in results['scenarios'].items():
+        print(f"{name:20} {result['per_second']:9.2f} {result['unit']}/s  {result['count']:6} in "
+              f"{result['seconds']:.2f}s  peak RSS {result['peak_rss_mb']:.0f} MB")
+        for stage, lat in result['stages'].items():
+            print(f"    {stage:10} p50 {lat['p50_ms']:8.2f} ms  p99 {lat['p99_ms']:8.2f} ms  ({lat['count']} calls)")
+
+
+def flatten(results):
+    """{(scenario, stage or '', metric): value} for the compared metrics"""
+    flat = {}
+    for name, result in results['scenarios'].items():
+        for metric in ('per_second', 'peak_rss_mb'):
+            flat[(name, '', metric)] = result[metric]
+        for stage, lat in result['stages'].items():
+            for metric in ('p50_ms', 'p99_ms'):
+                flat[(name, stage, metric)] = lat[metric]
+    return flat
+
+
+def compare(base, new, threshold):
+    """Print per-metric changes; returns the list of regressions"""
+    print(f"\nComparing {new.get('commit')} against {base.get('commit')} (threshold {threshold:.0f}%)")
+    old_flat, new_flat = flatten(base), flatten(new)
+    regressions = []
+    for key in sorted(old_flat.keys() & new_flat.keys()):
+        old, value = old_flat[key], new_flat[key]
+        if not old or value is None:
+            continue
+        change = (value - old) / old * 100
+        worse = -change if METRICS[key[2]] else change
+        if key[2].endswith('_ms') and abs(value - old) < MIN_DELTA_MS:
+            worse = 0
+        mark = '❌' if worse > threshold else '✅' if worse < -threshold else '  '
+        if worse > threshold:
+            regressions.append(key)
+        label = '/'.join(part for part in key if part)
+        print(f"{mark} {label:42} {old:10.2f} -> {value:10.2f}  ({change:+.1f}%)")
+    print(f"\n{len(regressions)} regressions")
+    return regressions
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2], json.loads(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--locations', type=int, default=100, help='distinct locations for the geocoders')
+    parser.add_argument('--ollama-latency', type=float, default=0.1, help='seconds to first token')
+    parser.add_argument('--ollama-rate', type=float, default=500.0, help='tokens per second after that')
+    parser.add_argument('--page-latency', type=float, default=0.02)
+    parser.add_argument('--geocode-latency', type=float, default=0.02)
+    parser.add_argument('--miss-rate', type=float, default=0.1, help='share of geocoder queries with no match')
+    parser.add_argument('--fetch-concurrency', type=int, default=8)
+    parser.add_argument('--llm-workers', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=8, help='geocode_runner workers')
+    parser.add_argument('--paced', action='store_true', help='keep the http_client rate limits')
+    parser.add_argument('--only', help='comma-separated scenarios (default: all)')
+    parser.add_argument('--out', help='results path (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs='+', metavar='JSON', help='BASE [NEW]: compare against BASE')
+    parser.add_argument('--threshold', type=float, default=15.0, help='percent change counted as a regression')
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 1:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            sys.exit(1 if compare(json.load(f), json.load(g), args.threshold) else 0)
+
+    settings = {key: getattr(args, key) for key in (
+        'jobs', 'locations', 'ollama_latency', 'ollama_rate', 'page_latency', 'geocode_latency',
+        'miss_rate', 'fetch_concurrency', 'llm_workers', 'workers')}
+    scenarios = args.only.split(',') if args.only else SCENARIOS
+    commit, dirty = git_commit()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'paced': args.paced,
+        'settings': settings,
+        'scenarios': {},
+    }
+    for scenario in scenarios:
+        print(f"▶️  {scenario}...", flush=True)
+        results['scenarios'][scenario] = run_scenario(scenario, settings, args.paced)
+    print()
+    print_results(results)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {out}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            sys.exit(1 if compare(json.load(f), results, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""Generate a realistic synthetic jobs.db of any size
+
+The tables come straight from the CREATE TABLE statements in
+backend/db.js, plus the columns later ALTERed into the live DB and
+(unless --bare) the Python-side migrations (lease and geocode columns
+and their indexes), so queries see the same schema and indexes as
+production.
+
+Rows follow the shapes of the live data: mostly enriched jobs with a
+backlog of 'new' ones, Zipf-distributed locations and companies (a few
+big banks and cities dominate, with a long tail), location strings in the
+scrapers' mixed formats, salaries on about a third of postings, and
+log-normal description lengths. Output is deterministic for a given
+--seed.
+
+Usage: python benchmarks/synthetic_db.py OUT.db [--rows N] [--seed S] [--desc-median CHARS] [--bare]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bench_utils import BACKEND_DIR
+
+DB_JS = os.path.join(BACKEND_DIR, 'db.js')
+
+# ALTER TABLE jobs ADD COLUMN ... found in the live jobs.db
+LIVE_COLUMNS = [
+    'requires_citizenship INTEGER DEFAULT 0',
+    'no_visa_sponsorship INTEGER DEFAULT 0',
+    'enriched_at TEXT',
+    'scraped_at DATETIME DEFAULT NULL',
+    'currency TEXT DEFAULT NULL',
+    'applied INTEGER DEFAULT 0',
+    "remote_option TEXT DEFAULT 'unknown'",
+    'country TEXT',
+]
+
+STATUSES = {'enriched': 0.78, 'new': 0.14, 'processing': 0.01, 'applied': 0.04, 'rejected': 0.03}
+SOURCES = {'Google Search': 0.45, 'discovery': 0.3, 'workday': 0.2, 'linkedin': 0.05}
+WORK_TYPES = {'onsite': 0.45, 'hybrid': 0.35, 'remote': 0.15, 'unknown': 0.05}
+JOB_TYPES = {'full-time': 0.8, 'contract': 0.12, 'part-time': 0.03, 'internship': 0.05}
+LEVELS = {'mid': 0.4, 'senior': 0.3, 'junior': 0.15, 'lead': 0.1, None: 0.05}
+
+# (city, region, country, code, currency); earlier entries are more common
+CITIES = [
+    ('Toronto', 'ON', 'Canada', 'CA', 'CAD'),
+    ('Mexico City', 'CDMX', 'Mexico', 'MX', 'MXN'),
+    ('New York', 'NY', 'United States', 'US', 'USD'),
+    ('Madrid', 'Madrid', 'Spain', 'ES', 'EUR'),
+    ('Vancouver', 'BC', 'Canada', 'CA', 'CAD'),
+    ('Monterrey', 'NL', 'Mexico', 'MX', 'MXN'),
+    ('London', 'England', 'United Kingdom', 'GB', 'GBP'),
+    ('Chicago', 'IL', 'United States', 'US', 'USD'),
+    ('Montreal', 'QC', 'Canada', 'CA', 'CAD'),
+    ('Guadalajara', 'Jalisco', 'Mexico', 'MX', 'MXN'),
+    ('Charlotte', 'NC', 'United States', 'US', 'USD'),
+    ('Bilbao', 'Basque Country', 'Spain', 'ES', 'EUR'),
+    ('Calgary', 'AB', 'Canada', 'CA', 'CAD'),
+    ('Dallas', 'TX', 'United States', 'US', 'USD'),
+    ('Veracruz', 'Veracruz', 'Mexico', 'MX', 'MXN'),
+    ('Ottawa', 'ON', 'Canada', 'CA', 'CAD'),
+]
+BANKS = ['bbva', 'td', 'rbc', 'scotiabank', 'bmo', 'cibc', 'santander', 'jpmorgan', 'citi',
+         'bank of america', 'hsbc', 'wells fargo', 'banorte', 'desjardins', 'national bank']
+TITLES = ['Business Analyst', 'Senior Business Analyst', 'Data Analyst', 'Product Owner',
+          'Software Engineer', 'Risk Analyst', 'Project Manager', 'Scrum Master',
+          'Financial Analyst', 'Data Engineer', 'QA Analyst', 'Banquero/a Patrimonial']
+# Most common first (picked Zipf-style); some are written several ways, as scraped postings do
+SKILLS = ['SQL', 'Python', 'Excel', 'Agile', 'Jira', 'Tableau', 'Power BI', 'Stakeholder management',
+          'Requirements gathering', 'Java', 'AWS', 'Risk management', 'Spanish', 'Confluence',
+          'JavaScript', 'Azure', 'Visio', 'SAP', 'Kubernetes', 'PostgreSQL', 'TypeScript', 'Node.js',
+          'Go', 'C#', 'React', 'Salesforce', 'Docker', 'Git', 'Looker', 'Alteryx', 'SAS', 'R',
+          'Snowflake', 'dbt', 'Airflow', 'Spark', 'Terraform', 'COBOL', 'Mainframe', 'Kafka']
+SKILL_SPELLINGS = {
+    'SQL': ['sql', 'SQL Server 2019'], 'Python': ['Python 3', 'python3', 'Python 3.11'],
+    'Excel': ['MS Excel', 'Microsoft Excel', 'Advanced Excel', 'Excel (2016)'], 'Agile': ['Scrum'],
+    'Power BI': ['PowerBI', 'Microsoft Power BI'], 'Java': ['Java 8+', 'Java 17'],
+    'AWS': ['Amazon Web Services'], 'Spanish': ['Español'], 'JavaScript': ['JS', 'ES6', 'javascript'],
+    'Kubernetes': ['k8s'], 'PostgreSQL': ['Postgres'], 'TypeScript': ['TS'], 'Node.js': ['NodeJS', 'node'],
+    'Go': ['Golang'], 'C#': ['csharp'], 'React': ['React.js', 'ReactJS'],
+}
+SENTENCES = [
+    "You will partner with product owners and engineering teams to gather requirements.",
+    "Applicants must be authorized to work in the country of the posting.",
+    "We do not offer visa sponsorship for this position.",
+    "This role is hybrid, three days a week in the office.",
+    "Experience with SQL and data visualization tools is required.",
+    "Knowledge of retail banking products is an asset.",
+    "You will write user stories and acceptance criteria and validate delivery.",
+    "We offer a competitive salary, pension plan and health benefits.",
+    "The successful candidate will report to the Director of Digital Channels.",
+    "Strong communication skills in English and Spanish are preferred.",
+    "Security clearance may be required for some client engagements.",
+    "Join a diverse team that values inclusion and continuous learning.",
+]
+
+SYLLABLES = ['ba', 'ce', 'di', 'fo', 'gu', 'ka', 'le', 'mi', 'no', 'pu', 'ra', 'se', 'ti', 'vo', 'za',
+             'tr', 'st', 'en', 'or', 'al', 'in', 'ex', 'pro', 'con']
+
+
+def jobs_schema(db_js=DB_JS):
+    """The CREATE TABLE statements in db.js, in file order"""
+    with open(db_js) as f:
+        source = f.read()
+    return [m.strip() for m in re.findall(r'db\.exec\(`\s*(CREATE TABLE.*?)`\)', source, re.S)]
+
+
+def create_schema(conn, bare=False):
+    for statement in jobs_schema():
+        conn.execute(statement)
+    for column in LIVE_COLUMNS:
+        conn.execute(f'ALTER TABLE jobs ADD COLUMN {column}')
+    if not bare:
+        from geocoding import ensure_geocode_columns
+        from job_store import ensure_lease_columns
+
+        ensure_lease_columns(conn)
+        ensure_geocode_columns(conn)
+
+
+def zipf_weights(n, s=1.1):
+    return [1 / (k ** s) for k in range(1, n + 1)]
+
+
+class Picker:
+    """Weighted choice with precomputed cumulative weights"""
+
+    def __init__(self, rng, values, weights):
+        self.rng = rng
+        self.values = list(values)
+        total = 0.0
+        self.cum = []
+        for w in weights:
+            total += w
+            self.cum.append(total)
+
+    def __call__(self):
+        return self.rng.choices(self.values, cum_weights=self.cum)[0]
+
+    @classmethod
+    def of(cls, rng, distribution):
+        return cls(rng, distribution.keys(), distribution.values())
+
+
+def location_strings(rng, count):
+    """count distinct location strings in the scrapers' mixed formats"""
+    formats = [
+        lambda c: f"{c[0]}, {c[1]}",
+        lambda c: f"{c[0]}, {c[1]}, {c[2]}",
+        lambda c: f"locations\n{c[0]}, {c[1]}",
+        lambda c: f"{c[0]}, {c[2]}",
+        lambda c: f"{c[0]} ({c[1]})",
+    ]
+    seen = {}
+    for city in CITIES:
+        seen[formats[0](city)] = city
+    seen['Remote'] = None
+    n = 0
+    while len(seen) < count:
+        city = CITIES[n % len(CITIES)]
+        form = formats[n % len(formats)](city)
+        # The long tail: branch and office specific strings
+        text = form if form not in seen else f"{['Branch', 'Office', 'Campus'][n % 3]} {n // 15}, {form}"
+        seen[text] = city
+        n += 1
+    return list(seen.items())[:count]
+
+
+def vocabulary(rng, size=20000):
+    """Made-up words standing in for the long tail of posting vocabulary"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def description_pool(rng, size=1000000):
+    """Boilerplate sentences mixed with Zipf-distributed words, so term frequencies look like real text"""
+    words = vocabulary(rng) + [skill.lower() for skill in SKILLS]
+    rng.shuffle(words)
+    pick_word = Picker(rng, words, zipf_weights(len(words), 1.0))
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.3:
+            part = rng.choice(SENTENCES) + ' '
+        else:
+            part = ' '.join(pick_word() for _ in range(rng.randint(5, 15))).capitalize() + '. '
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+
+def generate_rows(rows, seed=0, desc_median=3000, now=None):
+    """Yield jobs rows as dicts"""
+    rng = random.Random(seed)
+    now = now or datetime(2025, 6, 1)
+    pick_status = Picker.of(rng, STATUSES)
+    pick_source = Picker.of(rng, SOURCES)
+    pick_work = Picker.of(rng, WORK_TYPES)
+    pick_type = Picker.of(rng, JOB_TYPES)
+    pick_level = Picker.of(rng, LEVELS)
+    locations = location_strings(rng, max(50, min(20000, rows // 20)))
+    pick_location = Picker(rng, locations, zipf_weights(len(locations)))
+    companies = BANKS + [f'company {k}' for k in range(max(0, min(50000, rows // 50)))]
+    pick_company = Picker(rng, companies, zipf_weights(len(companies)))
+    pick_skill = Picker(rng, SKILLS, zipf_weights(len(SKILLS), 0.9))
+    pool = description_pool(rng)
+    mu = math.log(desc_median)
+
+    for i in range(rows):
+        status = pick_status()
+        location, city = pick_location() if rng.random() > 0.08 else (None, None)
+        created = now - timedelta(days=rng.expovariate(1 / 60), seconds=rng.randrange(86400))
+        company = pick_company()
+        title = rng.choice(TITLES)
+        row = {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'title': title,
+            'company': company,
+            'url': f"https://{company.replace(' ', '')}.example.com/jobs/{i}",
+            'source': pick_source(),
+            'status': status,
+            'location': location,
+            'created_at': created.strftime('%Y-%m-%d %H:%M:%S'),
+            'experience_level': pick_level(),
+            'job_type': pick_type(),
+        }
+
+        scraped = status != 'new' or rng.random() < 0.3
+        if scraped:
+            length = int(min(30000, max(200, rng.lognormvariate(mu, 0.6))))
+            start = rng.randrange(len(pool) - length)
+            row['description'] = pool[start:start + length]
+        else:
+            row['description'] = ''
+
+        if rng.random() < 0.35:
+            base = rng.lognormvariate(math.log(75000), 0.4)
+            row['salary_min'] = int(round(base, -3))
+            row['salary_max'] = int(round(base * rng.uniform(1.1, 1.5), -3))
+            row['currency'] = city[4] if city else 'USD'
+            row['salary'] = f"${row['salary_min']:,} - ${row['salary_max']:,}"
+
+        if status in ('enriched', 'applied', 'rejected'):
+            skills = []
+            for _ in range(rng.randint(3, 8)):
+                skill = pick_skill()
+                if skill not in skills:
+                    skills.append(skill)
+            skills = [rng.choice(SKILL_SPELLINGS[s]) if s in SKILL_SPELLINGS and rng.random() < 0.3 else s
+                      for s in skills]
+            row.update(
+                summary=f"{title} at {company}: {rng.choice(SENTENCES)}"[:160],
+                work_type=pick_work(),
+                mandatory_skills=json.dumps(skills[:4]),
+                preferred_skills=json.dumps(skills[4:]),
+                requires_citizenship=int(rng.random() < 0.07),
+                no_visa_sponsorship=int(rng.random() < 0.25),
+                enriched_at=(created + timedelta(hours=rng.uniform(0.1, 48))).isoformat(),
+                posted_date=(created - timedelta(days=rng.randrange(10))).strftime('%Y-%m-%d'),
+                applied=int(status == 'applied'),
+            )
+            if city and rng.random() < 0.7:
+                row['country'] = city[3]
+        yield row
+
+
+COLUMNS = ['id', 'title', 'company', 'url', 'description', 'source', 'status', 'location', 'work_type',
+           'salary', 'salary_min', 'salary_max', 'experience_level', 'job_type', 'summary',
+           'mandatory_skills', 'preferred_skills', 'posted_date', 'created_at', 'requires_citizenship',
+           'no_visa_sponsorship', 'enriched_at', 'currency', 'applied', 'country']
+
+
+def build(path, rows, seed=0, desc_median=3000, bare=False, batch=10000):
+    """Write a synthetic jobs.db at path (replacing it); returns seconds taken"""
+    started = time.perf_counter()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    create_schema(conn, bare)
+    sql = f"INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+    pending = []
+    with conn:
+        for row in generate_rows(rows, seed, desc_median):
+            pending.append(tuple(row.get(c) for c in COLUMNS))
+            if len(pending) >= batch:
+                conn.executemany(sql, pending)
+                pending = []
+        conn.executemany(sql, pending)
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.close()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic jobs.db')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--desc-median', type=int, default=3000, help='median description length in chars')
+    parser.add_argument('--bare', action='store_true', help="db.js schema only, without the Python migrations")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.path) == os.path.join(BACKEND_DIR, 'jobs.db'):
+        sys.exit("Refusing to overwrite the live backend/jobs.db")
+    seconds = build(args.path, args.rows, args.seed, args.desc_median, args.bare)
+    print(f"✅ {args.rows:,} jobs written to {args.path} in {seconds:.1f}s "
+          f"({os.path.getsize(args.path) / 1e6:.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend scripts are run from backend/ (and enrichers import their
+# siblings directly), so mirror that layout on sys.path for the tests.
+# Scratch jobs.db files come from backend/jobs_schema.py.
+for path in (os.path.join(ROOT, 'backend'),
+             os.path.join(ROOT, 'backend', 'enrichers')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Keep the enricher's caches out of backend/cache during tests
+os.environ.setdefault('ENRICH_HTTP_CACHE', '0')
+os.environ.setdefault('ENRICH_LLM_CACHE', '0')
+os.environ.setdefault('ENRICH_NEAR_DUPES', '0')
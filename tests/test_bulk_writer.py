@@ -0,0 +1,32 @@
+from bulk_writer import BulkWriter
+from jobs_schema import make_jobs_conn
+
+
+def make_db(n):
+    return make_jobs_conn(('id', 'title', 'company', 'url', 'location'),
+                          ((f'{i:04d}', 'a', 'b', f'u{i}', f'City {i % 3}') for i in range(n)))
+
+
+def test_applies_rows_in_chunks_and_skips_unchanged():
+    conn = make_db(25)
+    with BulkWriter(conn, ['country'], chunk_size=10) as writer:
+        writer.add_many((f'{i:04d}', 'CA' if i < 20 else None) for i in range(25))
+        assert writer.stats['chunks'] == 2
+    s = writer.stats
+    assert (s['rows'], s['changed'], s['chunks']) == (25, 20, 3)
+    assert conn.execute("SELECT COUNT(*) FROM jobs WHERE country = 'CA'").fetchone() == (20,)
+    assert not conn.in_transaction
+
+    # Same values again: nothing to write
+    with BulkWriter(conn, ['country']) as writer:
+        writer.add_many((f'{i:04d}', 'CA') for i in range(20))
+    assert writer.stats['changed'] == 0
+
+
+def test_matches_on_another_key_column():
+    conn = make_db(9)
+    with BulkWriter(conn, ['country', 'location'], key='location') as writer:
+        writer.add('City 1', 'GB', 'Glasgow, Scotland, United Kingdom')
+    rows = conn.execute("SELECT DISTINCT country, location FROM jobs WHERE country IS NOT NULL").fetchall()
+    assert rows == [('GB', 'Glasgow, Scotland, United Kingdom')]
+    assert writer.stats['changed'] == 3
@@ -0,0 +1,24 @@
+import sqlite3
+
+from db_iter import count_rows, iter_chunks, iter_rows
+from jobs_schema import make_jobs_conn, make_jobs_db
+
+
+def test_pages_through_every_row_once_in_key_order(tmp_path):
+    ids = make_jobs_db(str(tmp_path / 'jobs.db'), 2500)
+    conn = sqlite3.connect(str(tmp_path / 'jobs.db'))
+    chunks = list(iter_chunks(conn, ['title'], chunk_size=1000))
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    assert [row[0] for c in chunks for row in c] == sorted(ids)
+    assert count_rows(conn) == 2500
+
+
+def test_filters_and_tolerates_updates_between_pages():
+    conn = make_jobs_conn(('id', 'title', 'company', 'url', 'location'),
+                          ((f'{i:04d}', 'a', 'b', f'u{i}', 'Toronto' if i % 2 else '') for i in range(10)))
+    seen = []
+    for job_id, location in iter_rows(conn, ['location'], where="location != ?", params=('',), chunk_size=2):
+        # Writing to the rows already returned does not disturb the scan
+        conn.execute("UPDATE jobs SET location = '' WHERE id = ?", (job_id,))
+        seen.append(job_id)
+    assert seen == ['0001', '0003', '0005', '0007', '0009']
@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import sys
+
+# The stand-in job site and Ollama are shared with the benchmark suite
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import fake_services  # noqa: E402
+import job_enricher  # noqa: E402
+from jobs_schema import make_jobs_db  # noqa: E402
+
+
+def test_pipeline_enriches_jobs_against_stand_ins(tmp_path, monkeypatch):
+    site = fake_services.start_job_site(latency=0)
+    ollama = fake_services.start_ollama(latency=0, rate=10000)
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 3)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("UPDATE jobs SET url = replace(url, 'https://example.com', ?)", (site.url,))
+
+    monkeypatch.setattr(job_enricher, 'DB_PATH', path)
+    monkeypatch.setattr(job_enricher, 'OLLAMA_URL', ollama.url)
+    monkeypatch.setattr(job_enricher, '_store', None)
+    monkeypatch.setattr(job_enricher, '_ollama', None)
+    try:
+        job_enricher.run_pipeline(fetch_concurrency=2, llm_workers=2, queue_size=4, once=True)
+    finally:
+        job_enricher.close_store()
+        site.stop()
+        ollama.stop()
+
+    rows = conn.execute('SELECT status, description, summary FROM jobs').fetchall()
+    assert [row[0] for row in rows] == ['enriched'] * 3
+    assert all(description and summary for _, description, summary in rows)
+    assert site.requests == 3 and 1 <= ollama.requests <= 3
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from pipeline import EnrichmentPipeline
+
+
+def make_jobs(n):
+    return [(f'job-{i:04d}', f'Title {i}', 'bank', f'https://example.com/{i}', 'test') for i in range(n)]
+
+
+def claimer(pending):
+    """get_jobs that hands each job out once, like JobStore.claim_jobs"""
+    claimed = set()
+
+    def get_jobs(limit):
+        jobs = [job for job in pending.values() if job[0] not in claimed][:limit]
+        claimed.update(job[0] for job in jobs)
+        return jobs
+    return get_jobs
+
+
+def test_pipeline_processes_every_job_once():
+    jobs = make_jobs(25)
+    pending = {job[0]: job for job in jobs}
+    written = []
+
+    def write(job_id, analysis, description):
+        written.append((job_id, analysis, description))
+        pending.pop(job_id)
+
+    pipeline = EnrichmentPipeline(
+        fetch=lambda job: None if job[0].endswith('7') else f'desc {job[0]}',
+        analyze=lambda job, desc: {'summary': desc},
+        write=write,
+        fetch_concurrency=4, llm_workers=2, queue_size=2, batch_size=5,
+    )
+    stats = pipeline.run(claimer(pending), once=True)
+
+    assert sorted(w[0] for w in written) == [job[0] for job in jobs]
+    assert stats['written'] == 25
+    assert stats['fetch_failed'] == 2
+    failed = [w for w in written if w[0].endswith('7')]
+    assert all(w[1] is None and w[2] is None for w in failed)
+
+
+def test_stage_concurrency_is_bounded():
+    pending = {job[0]: job for job in make_jobs(12)}
+    lock = threading.Lock()
+    active = {'fetch': 0, 'llm': 0}
+    peak = {'fetch': 0, 'llm': 0}
+
+    def track(stage, delay):
+        with lock:
+            active[stage] += 1
+            peak[stage] = max(peak[stage], active[stage])
+        time.sleep(delay)
+        with lock:
+            active[stage] -= 1
+
+    def fetch(job):
+        track('fetch', 0.02)
+        return 'text'
+
+    def analyze(job, description):
+        track('llm', 0.02)
+        return {}
+
+    pipeline = EnrichmentPipeline(
+        fetch, analyze, lambda job_id, a, d: pending.pop(job_id),
+        fetch_concurrency=3, llm_workers=2, queue_size=1,
+    )
+    pipeline.run(claimer(pending), once=True)
+
+    assert not pending
+    assert peak['fetch'] <= 3
+    assert peak['llm'] <= 2
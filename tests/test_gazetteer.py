@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from gazetteer import SOURCE_DIR, Gazetteer, build_index, fold
+from geocoding import GazetteerProvider, GeocodeResolver
+from test_geocoding import FakeProvider, make_db
+
+
+@pytest.fixture(scope='module')
+def gazetteer(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('gazetteer') / 'gazetteer.idx')
+    build_index(SOURCE_DIR, path)
+    g = Gazetteer(path)
+    yield g
+    g.close()
+
+
+def code(gazetteer, text):
+    place = gazetteer.resolve(text)
+    return place and place['country_code']
+
+
+def test_fold_strips_accents_and_punctuation():
+    assert fold('  Montréal, QC ') == 'montreal qc'
+    assert fold('U.S.A.') == 'u s a'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Toronto, ON', 'CA'),
+    ('locations\nPune, India', 'IN'),
+    ('US-TX-Austin', 'US'),
+    ('IND-Pune', 'IN'),
+    ('San Francisco, CA', 'US'),
+    ('Toronto, CA', 'CA'),
+    ('London', 'GB'),
+    ('London, ON', 'CA'),
+    ('Cambridge, MA', 'US'),
+    ('Remote - USA', 'US'),
+    ('Ciudad de México', 'MX'),
+    ('Banquero Patrimonial - Veracruz', 'MX'),
+])
+def test_resolves_common_ats_formats(gazetteer, text, expected):
+    assert code(gazetteer, text) == expected
+
+
+def test_place_has_normalized_names(gazetteer):
+    assert gazetteer.resolve('Toronto, ON') == {
+        'city': 'Toronto', 'state': 'Ontario', 'country': 'Canada', 'country_code': 'CA'}
+
+
+def test_multi_location_strings(gazetteer):
+    text = 'locations\nNew York, NY\nLondon, UK; Pune, India\n3 Locations'
+    assert gazetteer.country_codes(text) == ['US', 'GB', 'IN']
+
+
+def test_lowercase_words_are_not_codes(gazetteer):
+    # "in" / "ca" inside prose must not become India / Canada
+    assert gazetteer.resolve('remote in ca') is None
+    assert gazetteer.resolve('Remote') is None
+
+
+def test_gazetteer_answers_before_network_providers(monkeypatch, gazetteer):
+    monkeypatch.setattr('geocoding.get_gazetteer', lambda: gazetteer)
+    network = FakeProvider('network', {'Atlantis': ('Atlantis', None, 'Bahamas', 'bs')})
+    resolver = GeocodeResolver(make_db([]), [GazetteerProvider(), network], simplify=False)
+    assert resolver.resolve('Glasgow')['provider'] == 'gazetteer'
+    assert resolver.resolve('Atlantis')['country_code'] == 'BS'
+    assert network.queries == ['Atlantis']
+
+
+def test_index_is_rebuilt_from_a_custom_source(tmp_path):
+    (tmp_path / 'countryInfo.txt').write_text('#ISO\nNZ\tNZL\t554\tNZ\tNew Zealand\n')
+    (tmp_path / 'admin1CodesASCII.txt').write_text('NZ.E7\tAuckland\tAuckland\t\n')
+    row = ['1', 'Auckland', 'Auckland', '', '', '', 'P', 'PPL', 'NZ', '', 'E7', '', '', '', '417910']
+    (tmp_path / 'cities15000.txt').write_text('\t'.join(row + [''] * 4) + '\n')
+    path = str(tmp_path / 'out.idx')
+    build_index(str(tmp_path), path)
+    assert os.path.getsize(path) < 4096
+    g = Gazetteer(path)
+    assert g.resolve('Auckland')['country'] == 'New Zealand'
+    assert g.resolve('Toronto') is None
+    g.close()
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from geocode_runner import AsyncGeocoder, Checkpoint, Watermark, geocode_locations
+from geocoding import GeocodeResolver
+from test_geocoding import FakeProvider, make_db
+
+CITIES = {f'City {i:02d}': (f'City {i:02d}', None, 'Canada', 'ca') for i in range(12)}
+
+
+class SlowProvider(FakeProvider):
+    """Takes a while per call and records how many calls overlap"""
+
+    def __init__(self, name, places, delay=0.05):
+        super().__init__(name, places)
+        self.delay = delay
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def geocode(self, query):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return super().geocode(query)
+
+
+def test_requests_overlap_up_to_the_provider_limit():
+    conn = make_db(list(CITIES) * 3)
+    provider = SlowProvider('fake', CITIES)
+    geocoder = AsyncGeocoder(GeocodeResolver(conn, [provider], simplify=False), in_flight={'fake': 4})
+
+    queries, updated = asyncio.run(geocode_locations(conn, geocoder, list(CITIES), workers=8))
+    assert (queries, updated) == (12, 36)
+    assert provider.peak == 4
+    assert sorted(provider.queries) == sorted(CITIES)
+    assert geocoder.counters['fake']['calls'] == 12
+
+
+def test_killed_run_resumes_after_the_checkpoint():
+    conn = make_db(list(CITIES))
+    provider = SlowProvider('fake', CITIES, delay=0.01)
+    resolver = GeocodeResolver(conn, [provider], simplify=False)
+
+    seen = []
+
+    def crash_after_five(query, place):
+        seen.append(query)
+        if len(seen) == 5:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(geocode_locations(conn, AsyncGeocoder(resolver), list(CITIES),
+                                      Checkpoint(conn, 'test'), workers=1, on_result=crash_after_five))
+    last_key, counters = Checkpoint(conn, 'test').load()
+    assert last_key == 'City 04' and counters['fake']['calls'] == 5
+
+    queries, updated = asyncio.run(geocode_locations(conn, AsyncGeocoder(resolver), list(CITIES),
+                                                     Checkpoint(conn, 'test'), workers=4))
+    assert queries == 7
+    assert len(provider.queries) == 12
+    assert conn.execute("SELECT COUNT(*) FROM jobs WHERE country = 'CA'").fetchone()[0] == 12
+    # Counters carry over; a finished run starts from the top next time
+    last_key, counters = Checkpoint(conn, 'test').load()
+    assert last_key is None and counters['fake']['calls'] == 12
+
+
+def test_daily_quota_moves_on_to_the_next_provider():
+    conn = make_db([])
+    capped = FakeProvider('capped', CITIES)
+    backup = FakeProvider('backup', CITIES)
+    resolver = GeocodeResolver(conn, [capped, backup], simplify=False)
+    geocoder = AsyncGeocoder(resolver, quotas={'capped': 2})
+
+    async def resolve_all():
+        return [await geocoder.resolve(q) for q in list(CITIES)[:4]]
+
+    places = asyncio.run(resolve_all())
+    assert [p['provider'] for p in places] == ['capped', 'capped', 'backup', 'backup']
+
+
+def test_same_query_in_flight_twice_is_fetched_once():
+    conn = make_db([])
+    provider = SlowProvider('fake', CITIES)
+    geocoder = AsyncGeocoder(GeocodeResolver(conn, [provider], simplify=False))
+
+    async def twice():
+        return await asyncio.gather(geocoder.resolve('City 01'), geocoder.resolve('City 01'))
+
+    first, second = asyncio.run(twice())
+    assert first == second and provider.queries == ['City 01']
+
+
+def test_watermark_only_advances_over_a_finished_prefix():
+    mark = Watermark(['a', 'b', 'c'])
+    assert mark.finish(1) is None
+    assert mark.finish(0) == 'b'
+    assert mark.finish(2) == 'c'
@@ -0,0 +1,134 @@
+import uuid
+
+import geocoding
+import http_client
+from geocoding import GeocodeResolver, clean_location, make_providers, update_countries
+from jobs_schema import make_jobs_conn
+
+PLACES = {
+    'Toronto, ON': ('Toronto', 'Ontario', 'Canada', 'ca'),
+    'Glasgow': ('Glasgow', 'Scotland', 'United Kingdom', 'gb'),
+}
+
+
+class FakeProvider:
+    def __init__(self, name, places, fail=False):
+        self.name = name
+        self.places = places
+        self.fail = fail
+        self.queries = []
+
+    def geocode(self, query):
+        self.queries.append(query)
+        if self.fail:
+            raise ConnectionError('offline')
+        if query not in self.places:
+            return None
+        city, state, country, code = self.places[query]
+        return {'city': city, 'state': state, 'country': country, 'country_code': code.upper()}
+
+
+def make_db(locations):
+    return make_jobs_conn(('id', 'title', 'company', 'url', 'location'),
+                          ((str(uuid.uuid4()), 'Analyst', 'bank', f'https://example.com/{i}', loc)
+                           for i, loc in enumerate(locations)))
+
+
+def test_clean_location_drops_prefix_and_extra_whitespace():
+    assert clean_location('locations\nToronto,  ON ') == 'Toronto, ON'
+    assert clean_location('locations\nToronto\n\n  Montreal ') == 'Toronto\nMontreal'
+    assert clean_location(None) == ''
+
+
+def test_each_distinct_location_is_geocoded_once():
+    # 300 jobs, 3 raw strings, 2 of which clean to the same query
+    conn = make_db(['Toronto, ON', 'locations\nToronto, ON', 'Glasgow'] * 100 + [''])
+    provider = FakeProvider('fake', PLACES)
+    resolver = GeocodeResolver(conn, [provider], simplify=False)
+
+    distinct, updated = update_countries(conn, resolver)
+    assert (distinct, updated) == (3, 300)
+    assert sorted(provider.queries) == ['Glasgow', 'Toronto, ON']
+    counts = dict(conn.execute('SELECT country, COUNT(*) FROM jobs GROUP BY country'))
+    assert counts == {None: 1, 'CA': 200, 'GB': 100}
+
+    # A second pass is served from geocode_cache and changes nothing
+    distinct, updated = update_countries(conn, resolver)
+    assert updated == 0 and len(provider.queries) == 2
+    row = conn.execute("SELECT city, state, country_code, provider FROM geocode_cache WHERE query = 'Glasgow'")
+    assert row.fetchone() == ('Glasgow', 'Scotland', 'GB', 'fake')
+
+
+def test_providers_fall_back_in_order_and_errors_are_not_cached():
+    conn = make_db([])
+    broken = FakeProvider('broken', {}, fail=True)
+    backup = FakeProvider('backup', PLACES)
+    resolver = GeocodeResolver(conn, [broken, backup], simplify=False)
+    assert resolver.resolve('Glasgow')['country_code'] == 'GB'
+    assert resolver.resolve('Atlantis') is None
+    # The miss had an error along the way, so it is retried next time
+    assert resolver.resolve('Atlantis') is None
+    assert backup.queries == ['Glasgow', 'Atlantis', 'Atlantis']
+
+    # A clean miss is remembered
+    resolver = GeocodeResolver(conn, [backup], simplify=False)
+    resolver.resolve('Atlantis')
+    resolver.resolve('Atlantis')
+    assert backup.queries.count('Atlantis') == 3
+
+
+def test_only_new_or_changed_locations_are_geocoded_again():
+    conn = make_db(['Toronto, ON'] * 5 + ['Glasgow'] * 5)
+    provider = FakeProvider('fake', dict(PLACES, Berlin=('Berlin', 'Berlin', 'Germany', 'de')))
+    update_countries(conn, GeocodeResolver(conn, [provider], simplify=False))
+    assert conn.execute('SELECT COUNT(*) FROM jobs WHERE geocode_version = 2 AND location_hash IS NOT NULL'
+                        ).fetchone() == (10,)
+
+    # The trigger re-queues a row whose location changes, whoever writes it
+    job_id = conn.execute("SELECT id FROM jobs WHERE location = 'Glasgow'").fetchone()[0]
+    conn.execute("UPDATE jobs SET location = 'Berlin' WHERE id = ?", (job_id,))
+    conn.execute("UPDATE jobs SET location = location")
+    provider.queries.clear()
+    assert update_countries(conn, GeocodeResolver(conn, [provider], simplify=False)) == (1, 1)
+    assert provider.queries == ['Berlin']
+
+    # A newer resolver version redoes everything once
+    provider.queries.clear()
+    update_countries(conn, GeocodeResolver(conn, [provider], simplify=False, version=3))
+    assert sorted(provider.queries) == ['Berlin', 'Glasgow', 'Toronto, ON']
+
+
+def test_rows_with_transient_errors_stay_pending():
+    conn = make_db(['Glasgow'])
+    broken = FakeProvider('broken', {}, fail=True)
+    update_countries(conn, GeocodeResolver(conn, [broken], simplify=False))
+    assert conn.execute('SELECT geocode_version FROM jobs').fetchone() == (None,)
+    backup = FakeProvider('backup', PLACES)
+    assert update_countries(conn, GeocodeResolver(conn, [backup], simplify=False)) == (1, 1)
+
+
+def test_misses_stay_pending_until_their_ttl_and_empty_locations_are_done():
+    conn = make_db(['Glasgow', 'Atlantis', 'locations'])
+    provider = FakeProvider('fake', PLACES)
+    update_countries(conn, GeocodeResolver(conn, [provider], simplify=False))
+    pending = conn.execute('SELECT location FROM jobs WHERE geocode_version IS NULL').fetchall()
+    assert pending == [('Atlantis',)]
+
+    # Still pending, but answered from the cached miss
+    assert update_countries(conn, GeocodeResolver(conn, [provider], simplify=False)) == (1, 0)
+    assert provider.queries == ['Atlantis', 'Glasgow']
+
+    # Once the miss expires the providers are asked again
+    update_countries(conn, GeocodeResolver(conn, [provider], simplify=False, miss_ttl=-1))
+    assert provider.queries == ['Atlantis', 'Glasgow', 'Atlantis']
+
+
+def test_providers_are_left_out_without_their_key_or_contact(monkeypatch):
+    monkeypatch.setattr(http_client, 'HTTP_CONTACT', 'ops@bank.test')
+    monkeypatch.setattr(geocoding, 'LOCATIONIQ_KEY', None)
+    assert [p.name for p in make_providers()] == ['gazetteer', 'nominatim', 'photon']
+    monkeypatch.setattr(geocoding, 'LOCATIONIQ_KEY', 'pk.test')
+    assert [p.name for p in make_providers()][:2] == ['gazetteer', 'locationiq']
+    # Nominatim's usage policy needs a real contact in the User-Agent
+    monkeypatch.setattr(http_client, 'HTTP_CONTACT', None)
+    assert [p.name for p in make_providers()] == ['gazetteer', 'locationiq', 'photon']
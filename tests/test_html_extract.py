@@ -0,0 +1,64 @@
+import json
+
+from html_extract import JobTextExtractor, extract_text
+
+BODY = 'Responsible for requirements gathering and stakeholder workshops. ' * 5
+
+
+def test_prefers_workday_container_over_boilerplate():
+    html = f"""<html><head><script>var nav = "<div>menu</div>";</script>
+    <style>p {{ color: red }}</style></head><body>
+    <div id="cookie-banner"><p>We use cookies</p></div>
+    <nav><a>Careers home</a></nav>
+    <p>Sign in to apply</p>
+    <div data-automation-id="jobPostingDescription"><div><p>{BODY}</p></div><p>Pay &amp; benefits</p></div>
+    <footer>Privacy policy</footer></body></html>"""
+    text = extract_text(html)
+    assert text.startswith('Responsible for requirements')
+    assert text.endswith('Pay & benefits')
+    for noise in ('menu', 'cookies', 'Careers home', 'Sign in', 'Privacy', 'color'):
+        assert noise not in text
+
+
+def test_stops_streaming_once_container_is_complete():
+    extractor = JobTextExtractor()
+    extractor.feed(f'<body><div class="job-description">{BODY}</div>')
+    assert extractor.done
+    extractor.feed('<p>never parsed</p>')
+    assert 'never parsed' not in extractor.result()
+
+
+def test_uses_json_ld_job_posting():
+    posting = {'@context': 'https://schema.org', '@type': 'JobPosting',
+               'description': f'<p>{BODY}</p>'}
+    html = f'<head><script type="application/ld+json">{json.dumps(posting)}</script></head><body>Loading...</body>'
+    assert extract_text(html).startswith('Responsible for requirements')
+
+
+def test_falls_back_to_body_text_and_caps_length():
+    html = '<body>' + '<p>word</p>' * 2000 + '</body>'
+    text = extract_text(html, max_chars=500)
+    assert len(text) == 500
+    assert text.startswith('word word')
+
+
+def test_void_tags_and_skipped_children_do_not_swallow_the_description():
+    html = f'<img src=x aria-hidden="true"><input class="cookie-consent"><p>{BODY}</p>'
+    assert extract_text(html).startswith('Responsible for requirements')
+
+    extractor = JobTextExtractor()
+    extractor.feed(f'<div class="job-description"><div class="cookie-banner">Accept cookies</div>'
+                   f'<p>{BODY}</p></div>')
+    assert extractor.done
+    assert 'cookies' not in extractor.result() and extractor.result().startswith('Responsible')
+
+
+def test_form_wrapped_page_keeps_its_body():
+    html = (f'<body><header role="banner">Bank careers</header><form id="aspnetForm">'
+            f'<input type="hidden" name="__VIEWSTATE"><header><h1>Business Analyst</h1></header>'
+            f'<div class="content"><p>{BODY}</p></div>'
+            f'<select name="lang"><option>English</option></select><button>Apply</button></form></body>')
+    text = extract_text(html)
+    assert text.startswith('Business Analyst Responsible for requirements')
+    for noise in ('Bank careers', 'English', 'Apply'):
+        assert noise not in text
@@ -0,0 +1,92 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_cache import HttpCache, canonical_url
+
+PAGE = ('<html><body><div class="job-description">' + 'Analyst role. ' * 50 + '</div></body></html>').encode()
+
+
+class ETagServer(BaseHTTPRequestHandler):
+    full_responses = 0
+
+    def do_GET(self):
+        if self.path.startswith('/no-validator'):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        type(self).full_responses += 1
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def test_canonical_url_drops_tracking_and_fragment():
+    assert (canonical_url('HTTPS://Bank.Example.com/job/1?utm_source=x&b=2&a=1#apply')
+            == 'https://bank.example.com/job/1?a=1&b=2')
+
+
+def test_revalidates_with_etag_and_reuses_body(tmp_path, base_url):
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    ETagServer.full_responses = 0
+
+    first = cache.get(base_url + '/job/1')
+    second = cache.get(base_url + '/job/1?utm_campaign=mail')
+    assert first.content == second.content == PAGE
+    assert not first.from_cache and second.from_cache
+    assert ETagServer.full_responses == 1
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+    assert cache.stats['bytes_saved'] == len(PAGE)
+
+    # A fresh process (e.g. the Playwright test script) can read it offline
+    assert HttpCache(str(tmp_path / 'cache.db')).lookup(base_url + '/job/1').content == PAGE
+
+
+def test_responses_without_validators_are_not_stored(tmp_path, base_url):
+    cache = HttpCache(str(tmp_path / 'cache.db'))
+    assert cache.get(base_url + '/no-validator').status_code == 200
+    assert cache.lookup(base_url + '/no-validator') is None
+
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache.db'), max_bytes=2000)
+    for i in range(2):
+        cache.store(f'https://example.com/{i}', os.urandom(900), {'ETag': str(i)})
+    cache.lookup('https://example.com/0')
+    cache.store('https://example.com/2', os.urandom(900), {'ETag': '2'})
+
+    # /1 was least recently used
+    assert cache.lookup('https://example.com/1') is None
+    assert cache.lookup('https://example.com/0') is not None
+    assert cache.size()[1] <= 2000
+    assert cache.stats['evicted'] == 1
+
+
+def test_oversized_bodies_are_capped_and_not_stored(tmp_path, base_url):
+    cache = HttpCache(str(tmp_path / 'cache.db'), max_body_bytes=100)
+    response = cache.get(base_url + '/job/big')
+    assert response.content == PAGE[:100]
+    assert cache.stats['truncated'] == 1
+    assert cache.lookup(base_url + '/job/big') is None
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from http_client import HttpClient, TokenBucket
+
+
+def test_bucket_spaces_concurrent_callers_exactly():
+    bucket = TokenBucket(rate=50)
+    stamps = []
+
+    def call():
+        bucket.acquire()
+        stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # First token is free, the other five are paced at 20 ms
+    assert 0.09 <= time.monotonic() - start < 0.3
+    stamps.sort()
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert min(gaps) > 0.012
+
+
+def test_buckets_are_per_provider_and_per_host():
+    client = HttpClient()
+    liq_us = client.bucket_for('https://us1.locationiq.com/v1/search')
+    liq_eu = client.bucket_for('https://eu1.locationiq.com/v1/search')
+    assert liq_us is liq_eu
+    assert liq_us.rate == 2.0
+
+    bbva = client.bucket_for('https://bbva.wd3.myworkdayjobs.com/BBVA/job/x')
+    td = client.bucket_for('https://td.wd3.myworkdayjobs.com/TD/job/y')
+    assert bbva is not td
+    assert bbva.rate == td.rate == 2.0
+
+    assert client.bucket_for('http://localhost:11434/api/generate') is None
+    assert client.bucket_for('https://careers.example.com/').rate == 4.0
+
+
+def test_env_overrides_rates(monkeypatch):
+    monkeypatch.setenv('HTTP_RATE_NOMINATIM', '0.5')
+    monkeypatch.setenv('HTTP_RATE_DEFAULT', '0')
+    client = HttpClient()
+    assert client.bucket_for('https://nominatim.openstreetmap.org/search').rate == 0.5
+    assert client.bucket_for('https://careers.example.com/') is None
+
+
+def test_one_pooled_session_per_host():
+    client = HttpClient()
+    a = client.session_for('https://bbva.wd3.myworkdayjobs.com/a')
+    assert a is client.session_for('https://bbva.wd3.myworkdayjobs.com/b')
+    assert a is not client.session_for('https://td.wd3.myworkdayjobs.com/a')
+    client.close()
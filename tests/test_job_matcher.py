@@ -0,0 +1,76 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+from job_matcher import JobMatcher  # noqa: E402
+from job_vectors import ensure_job_vectors, update_job_vectors  # noqa: E402
+from jobs_schema import make_jobs_conn  # noqa: E402
+
+JOBS = [
+    ('a', 'Data Analyst', 'SQL dashboards in Power BI for retail banking', '["SQL", "Power BI"]'),
+    ('b', 'Backend Developer', 'Node.js services on Kubernetes and AWS', '["JavaScript", "Kubernetes"]'),
+    ('c', 'Business Analyst', 'Requirements and user stories for payments', '["Agile", "Jira"]'),
+    ('d', 'Credit Risk Analyst', 'Risk models in Python and SAS', '["Python", "SAS"]'),
+]
+
+RESUME = "Developer with five years of JS, Node and k8s on AWS. Some SQL."
+
+
+def make_db():
+    conn = make_jobs_conn(('id', 'title', 'company', 'url', 'summary', 'mandatory_skills'),
+                          ((j[0], j[1], 'bank', f'u-{j[0]}', j[2], j[3]) for j in JOBS))
+    ensure_job_vectors(conn)
+    update_job_vectors(conn)
+    return conn
+
+
+def brute_force(conn, text, matcher):
+    """Dense cosine similarity with the same weights, for comparison"""
+    terms, weights = matcher.query_vector(text)
+    query = dict(zip(terms.tolist(), weights.tolist()))
+    scores = {}
+    for job_id, blob_terms, blob_weights in conn.execute('SELECT job_id, terms, weights FROM job_vectors'):
+        ids = np.frombuffer(blob_terms, dtype=np.int32)
+        doc = np.frombuffer(blob_weights, dtype=np.float32) * matcher.idf[ids]
+        if len(ids):
+            doc = doc / np.linalg.norm(doc)
+            scores[job_id] = sum(query.get(t, 0) * w for t, w in zip(ids.tolist(), doc.tolist()))
+    return scores
+
+
+def test_top_k_matches_a_dense_cosine():
+    conn = make_db()
+    matcher = JobMatcher(conn)
+    results = matcher.match(RESUME, k=3)
+    assert results[0][0] == 'b'
+    expected = brute_force(conn, RESUME, matcher)
+    for job_id, score in results:
+        assert score == pytest.approx(expected[job_id], rel=1e-5)
+    assert [job_id for job_id, _ in results] == sorted(expected, key=expected.get, reverse=True)[:len(results)]
+    assert matcher.match('nothing in common here') == []
+
+
+def test_refresh_picks_up_new_changed_and_deleted_jobs():
+    conn = make_db()
+    matcher = JobMatcher(conn)
+    with conn:
+        conn.execute("INSERT INTO jobs (id, title, company, url, summary) "
+                     "VALUES ('e', 'Platform Engineer', 'bank', 'u-e', 'Terraform and Kubernetes on GCP')")
+        conn.execute("UPDATE jobs SET summary = 'Python ETL pipelines', mandatory_skills = NULL WHERE id = 'b'")
+        conn.execute("DELETE FROM jobs WHERE id = 'd'")
+    update_job_vectors(conn)
+    assert matcher.refresh() == 3
+    assert matcher.refresh() == 0
+
+    found = dict(matcher.match('terraform kubernetes python sas'))
+    assert set(found) == {'b', 'e'}
+    assert matcher.match('terraform')[0][0] == 'e'
+
+    # Changing the same job again masks its first delta row too
+    with conn:
+        conn.execute("UPDATE jobs SET summary = 'Mainframe COBOL' WHERE id = 'b'")
+    update_job_vectors(conn)
+    matcher.refresh()
+    assert 'b' not in dict(matcher.match('python etl'))
+    assert matcher.match('cobol')[0][0] == 'b'
@@ -0,0 +1,79 @@
+import sqlite3
+import time
+
+from job_store import JobStore
+from jobs_schema import make_jobs_db
+
+
+def statuses(path):
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute('SELECT id, status FROM jobs').fetchall())
+    conn.close()
+    return rows
+
+
+def test_results_are_buffered_until_batch_is_full(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 5)
+    store = JobStore(path, flush_every=3, flush_interval=3600)
+    ids = [row[0] for row in store.claim_jobs(3)]
+
+    store.update_job(ids[0], {'location': 'Toronto', 'summary': 's'}, 'desc')
+    store.update_job(ids[1], None)
+    assert 'enriched' not in statuses(path).values()
+
+    store.update_job(ids[2], None)
+    enriched = [job_id for job_id, status in statuses(path).items() if status == 'enriched']
+    assert sorted(enriched) == sorted(ids)
+    store.close()
+
+
+def test_two_workers_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 10)
+    a = JobStore(path, worker_id='a')
+    b = JobStore(path, worker_id='b')
+
+    claimed_a = {row[0] for row in a.claim_jobs(6)}
+    claimed_b = {row[0] for row in b.claim_jobs(6)}
+    assert len(claimed_a) == 6
+    assert len(claimed_b) == 4
+    assert not claimed_a & claimed_b
+    assert b.claim_jobs(6) == []
+    a.close()
+    b.close()
+
+
+def test_expired_leases_are_reclaimed(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 2)
+    crashed = JobStore(path, worker_id='crashed', lease_seconds=-1)
+    crashed.claim_jobs(2)
+
+    other = JobStore(path, worker_id='other')
+    assert len(other.claim_jobs(10)) == 2
+    assert other.reclaimed == 2
+
+    # A late write from the worker that lost its lease is ignored
+    crashed.update_job(next(iter(statuses(path))), None)
+    assert crashed.flush() == 1 and crashed.lost == 1
+    assert set(statuses(path).values()) == {'processing'}
+    other.close()
+
+
+def test_heartbeat_extends_lease_and_close_releases(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 3)
+    store = JobStore(path, worker_id='w', lease_seconds=60)
+    store.claim_jobs(3)
+
+    conn = sqlite3.connect(path)
+    before = conn.execute('SELECT MIN(lease_expires_at) FROM jobs').fetchone()[0]
+    time.sleep(0.01)
+    assert store.heartbeat() == 3
+    after = conn.execute('SELECT MIN(lease_expires_at) FROM jobs').fetchone()[0]
+    assert after > before
+
+    store.close()
+    assert set(statuses(path).values()) == {'new'}
+    conn.close()
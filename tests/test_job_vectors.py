@@ -0,0 +1,105 @@
+import json
+from array import array
+
+import job_vectors
+from job_vectors import ensure_job_vectors, job_terms, reset_job_vectors, tokenize, update_job_vectors
+from jobs_schema import make_jobs_conn
+
+
+def make_db():
+    conn = make_jobs_conn(('id', 'title', 'company', 'url', 'summary', 'mandatory_skills'), [
+        ('a', 'Data Analyst', 'bank', 'u-a', 'SQL reporting for retail banking', '["SQL", "Power BI"]'),
+        ('b', 'Backend Developer', 'bank', 'u-b', 'Node services on Kubernetes', '["JS", "k8s"]'),
+    ])
+    ensure_job_vectors(conn)
+    return conn
+
+
+def vector(conn, job_id):
+    terms = dict(conn.execute('SELECT id, term FROM match_terms'))
+    seq, blob = conn.execute('SELECT seq, terms FROM job_vectors WHERE job_id = ?', (job_id,)).fetchone()
+    return seq, {terms[t] for t in array('i', blob)}
+
+
+def df(conn):
+    return dict(conn.execute('SELECT term, df FROM match_terms WHERE df > 0'))
+
+
+def test_tokenize_folds_accents_stop_words_and_aliases():
+    assert tokenize('Analista de Datos en México, JS and K8s (5 years)') == \
+        ['analista', 'datos', 'mexico', 'javascript', 'kubernetes']
+    assert tokenize('C++ and C#') == ['c++', 'c#']
+    counts = job_terms('Analyst', None, 'sql sql', json.dumps(['SQL']), None)
+    assert counts == {'analyst': 1, 'sql': 2 + job_vectors.SKILL_BOOST}
+
+
+def test_only_new_or_changed_jobs_are_vectorized():
+    conn = make_db()
+    assert update_job_vectors(conn) == 2
+    assert update_job_vectors(conn) == 0
+    seq, terms = vector(conn, 'b')
+    assert {'javascript', 'kubernetes', 'backend', 'node'} <= terms
+    assert df(conn)['banking'] == 1
+
+    with conn:
+        conn.execute("UPDATE jobs SET status = 'enriched'")
+        conn.execute("UPDATE jobs SET summary = 'Credit risk models' WHERE id = 'a'")
+    assert update_job_vectors(conn) == 1
+    assert 'risk' in vector(conn, 'a')[1] and 'banking' not in vector(conn, 'a')[1]
+    assert 'banking' not in df(conn) and vector(conn, 'a')[0] > seq
+
+    with conn:
+        conn.execute("DELETE FROM jobs WHERE id = 'b'")
+    assert vector(conn, 'b')[1] == set()
+    # The deleted job's terms stop counting once the next update runs
+    assert df(conn)['kubernetes'] == 1
+    assert update_job_vectors(conn) == 0
+    assert 'kubernetes' not in df(conn) and df(conn)['risk'] == 1
+
+    reset_job_vectors(conn)
+    assert update_job_vectors(conn) == 1
+
+
+def test_long_vectors_keep_their_rarest_terms(monkeypatch):
+    conn = make_db()
+    update_job_vectors(conn)
+    monkeypatch.setattr(job_vectors, 'MAX_DOC_TERMS', 3)
+    with conn:
+        conn.execute("UPDATE jobs SET description = 'sql sql sql banking banking retail zebra' WHERE id = 'b'")
+    update_job_vectors(conn)
+    # banking/retail/sql also occur in job a, zebra only here
+    _, terms = vector(conn, 'b')
+    assert len(terms) == 3 and 'zebra' in terms
+
+
+def test_batches_hold_the_write_lock_and_stale_term_caches_are_safe(monkeypatch):
+    conn = make_db()
+    stale = job_vectors.Vectorizer(conn)
+    locked = []
+    vectorize_batch = job_vectors.Vectorizer.vectorize_batch
+    monkeypatch.setattr(job_vectors.Vectorizer, 'vectorize_batch',
+                        lambda self, rows: locked.append(self.conn.in_transaction) or vectorize_batch(self, rows))
+    update_job_vectors(conn)
+    # seq and the old vectors are read inside the write transaction
+    assert locked == [True]
+    # A worker whose cache predates another worker's new terms reuses their ids
+    entry = stale.term('banking')
+    assert entry == [conn.execute("SELECT id FROM match_terms WHERE term = 'banking'").fetchone()[0], 1]
+
+
+def test_databases_from_before_the_delete_queue_get_their_df_recounted():
+    conn = make_db()
+    update_job_vectors(conn)
+    with conn:
+        conn.execute('DROP TABLE match_deleted')
+        conn.execute('DROP TRIGGER jobs_match_deleted')
+        conn.execute("CREATE TRIGGER jobs_match_deleted AFTER DELETE ON jobs BEGIN "
+                     "UPDATE job_vectors SET terms = x'', weights = x'' WHERE job_id = OLD.id; END")
+        conn.execute("DELETE FROM jobs WHERE id = 'b'")
+    assert df(conn)['kubernetes'] == 1
+    ensure_job_vectors(conn)
+    assert 'kubernetes' not in df(conn) and df(conn)['banking'] == 1
+    with conn:
+        conn.execute("DELETE FROM jobs WHERE id = 'a'")
+    update_job_vectors(conn)
+    assert df(conn) == {}
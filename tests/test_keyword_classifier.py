@@ -0,0 +1,70 @@
+import pytest
+
+import job_enricher
+from keyword_classifier import AhoCorasick, classify, find_matches, lead_summary
+
+
+def test_automaton_reports_overlapping_patterns():
+    matcher = AhoCorasick([('he', 'a'), ('she', 'b'), ('his', 'c'), ('hers', 'd')])
+    hits = sorted(matcher.search('ushers'))
+    assert hits == [(1, 4, 'b'), (2, 4, 'a'), (2, 6, 'd')]
+
+
+@pytest.mark.parametrize('text, citizenship, visa', [
+    ('Must be a U.S. Citizen or Green-Card holder.', True, False),
+    ('Active TS/SCI clearance required.', True, False),
+    ('We are unable to sponsor work visas for this role.', False, True),
+    ('Candidates must be authorized to work in the US without sponsorship now or in the future.', None, True),
+    ('No sponsorship available.', False, True),
+    ('Visa sponsorship is available for the right candidate.', False, False),
+    ('Join our analytics team in Toronto and build dashboards.', False, False),
+    # Bare cues are left for the LLM
+    ('Canadian citizens only.', None, False),
+    ('Please mention whether you need a visa.', False, None),
+    # Conflicting phrases are left for the LLM too
+    ('We will sponsor TN visas but cannot sponsor H-1B.', False, None),
+    # A negation elsewhere in the sentence leaves the flag to the LLM
+    ('US citizenship is not required.', None, False),
+    ('No security clearance required.', None, False),
+    ('This position does not require a security clearance.', None, False),
+    ('You do not need a green card; we will sponsor.', None, None),
+    ('Must be a US citizen. No relocation package.', True, False),
+])
+def test_classify(text, citizenship, visa):
+    result = classify(text)
+    assert (result['requires_citizenship'], result['no_visa_sponsorship']) == (citizenship, visa)
+
+
+def test_cues_inside_a_phrase_are_not_counted_twice():
+    assert find_matches('Must be a US citizen') == [('citizenship', 'us citizen')]
+    # Whole words only
+    assert find_matches('Focus on advisory, discussion and visual design') == []
+
+
+def test_lead_summary_caps_words():
+    text = ' '.join(f'w{i}' for i in range(30)) + '. Second sentence.'
+    assert lead_summary(text).split()[-1] == 'w19...'
+    assert lead_summary('Short one. Another.') == 'Short one.'
+
+
+def test_flags_decided_by_keywords_trim_or_skip_the_llm(monkeypatch):
+    monkeypatch.setattr(job_enricher, 'get_llm_cache', lambda: None)
+    prompts = []
+
+    def fake_ollama(title, company, description, fields=None):
+        prompts.append(fields)
+        return '{"is_real_job": true, "location": "Toronto, ON", "summary": "Analyst role"}'
+
+    monkeypatch.setattr(job_enricher, 'analyze_with_ollama', fake_ollama)
+    description = 'Business Analyst in Toronto. We do not offer visa sponsorship.'
+
+    analysis, _ = job_enricher.analyze_job('Analyst', 'td', description, {'source': 'html'})
+    assert prompts == [['is_real_job', 'location', 'summary']]
+    assert analysis['no_visa_sponsorship'] is True and analysis['requires_citizenship'] is False
+    assert analysis['location'] == 'Toronto, ON'
+
+    details = {'source': 'workday-api', 'location': 'Toronto, Ontario, Canada'}
+    analysis, _ = job_enricher.analyze_job('Analyst', 'td', description, details)
+    assert len(prompts) == 1
+    assert analysis == {'requires_citizenship': False, 'no_visa_sponsorship': True, 'is_real_job': True,
+                        'location': 'Toronto, Ontario, Canada', 'summary': 'Business Analyst in Toronto.'}
@@ -0,0 +1,56 @@
+import json
+
+import job_enricher
+from llm_cache import LLMCache, content_key, prompt_version
+
+
+def test_key_ignores_whitespace_and_case_but_not_model_or_version():
+    key = content_key('llama3.2', 'v1', 'Senior  Analyst\n\nToronto')
+    assert key == content_key('llama3.2', 'v1', 'senior analyst toronto')
+    assert key != content_key('llama3.1', 'v1', 'senior analyst toronto')
+    assert key != content_key('llama3.2', 'v2', 'senior analyst toronto')
+
+
+def test_hits_report_saved_inference_and_stale_entries_are_purged(tmp_path):
+    path = str(tmp_path / 'llm.db')
+    cache = LLMCache('llama3.2', 'v1', path)
+    assert cache.get('Job text') is None
+    cache.put('Job text', {'summary': 'x'}, inference_seconds=4.5)
+    assert cache.get('job   TEXT') == {'summary': 'x'}
+    assert cache.stats == {'hits': 1, 'misses': 1, 'seconds_saved': 4.5}
+    cache.close()
+
+    assert LLMCache('llama3.2', 'v1', path).purged == 0
+    changed = LLMCache('llama3.2', 'v2', path)
+    assert changed.purged == 1
+    assert changed.get('Job text') is None
+
+
+def test_analyze_job_skips_ollama_for_repeated_text(tmp_path, monkeypatch):
+    cache = LLMCache(job_enricher.MODEL, job_enricher.PROMPT_VERSION, str(tmp_path / 'llm.db'))
+    monkeypatch.setattr(job_enricher, 'get_llm_cache', lambda: cache)
+    calls = []
+    answer = {'is_real_job': True, 'requires_citizenship': False, 'no_visa_sponsorship': False,
+              'location': 'Toronto', 'summary': 'ok'}
+    monkeypatch.setattr(job_enricher, 'analyze_with_ollama',
+                        lambda *args: calls.append(args) or json.dumps(answer))
+
+    first, hit1 = job_enricher.analyze_job('Analyst', 'bmo', 'Same posting text')
+    second, hit2 = job_enricher.analyze_job('Analyst (Montreal)', 'bmo', 'Same  posting text')
+    assert first == answer
+    # Same text, another city: everything but the location is reused
+    assert second == {k: v for k, v in answer.items() if k != 'location'}
+    assert (hit1, hit2) == (False, True)
+    assert len(calls) == 1
+
+    job = ('j2', 'Analyst (Montreal)', 'bmo', 'https://bmo/2', 'bmo')
+    details = {'description': 'Same posting text', 'location': 'Montreal, QC'}
+    assert job_enricher.analyze_stage(job, details)['location'] == 'Montreal, QC'
+    assert job_enricher.analyze_stage(job, {'description': 'Same posting text'})['location'] is None
+    assert len(calls) == 1
+
+
+def test_prompt_window_budget_is_part_of_the_cache_version():
+    assert job_enricher.PROMPT_VERSION == job_enricher.analysis_version(job_enricher.PROMPT_TOKENS)
+    assert job_enricher.analysis_version(700) != job_enricher.analysis_version(400)
+    assert job_enricher.analysis_version(700) != prompt_version(job_enricher.ANALYSIS_PROMPT)
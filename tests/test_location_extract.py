@@ -0,0 +1,48 @@
+import json
+import re
+
+from update_ollama_locationiq_to_db import BATCH_PROMPT, extract_locations, parse_batch
+
+
+class FakeClient:
+    """Answers batches from a table; can drop entries to mimic a sloppy model"""
+
+    def __init__(self, places, drop=()):
+        self.places = places
+        self.drop = set(drop)
+        self.prompts = []
+
+    def generate_json(self, prompt, schema, num_predict=None):
+        self.prompts.append(prompt)
+        lines = re.findall(r'^(\d+)\. (.*)$', prompt, re.MULTILINE)
+        items = [{'index': int(i), 'city': self.places[loc], 'state': '', 'country': 'Canada'}
+                 for i, loc in lines if not (len(lines) > 1 and loc in self.drop)]
+        # Order is not guaranteed; results are matched back by index
+        return json.dumps({'locations': items[::-1]})
+
+
+def test_one_prompt_per_batch_matched_by_index():
+    client = FakeClient({'Toronto, ON': 'Toronto', 'Montreal, QC': 'Montreal', 'Ottawa': 'Ottawa'})
+    results = extract_locations(client, ['Toronto, ON', 'Montreal, QC', 'Ottawa'])
+    assert [r['city'] for r in results] == ['Toronto', 'Montreal', 'Ottawa']
+    assert len(client.prompts) == 1
+    assert '1. Montreal, QC' in client.prompts[0]
+    assert BATCH_PROMPT.splitlines()[0] in client.prompts[0]
+
+
+def test_skipped_entries_are_asked_again_alone():
+    client = FakeClient({'Toronto, ON': 'Toronto', 'Montreal, QC': 'Montreal'}, drop={'Montreal, QC'})
+    results = extract_locations(client, ['Toronto, ON', 'Montreal, QC'])
+    assert [r['city'] for r in results] == ['Toronto', 'Montreal']
+    assert len(client.prompts) == 2 and '0. Montreal, QC' in client.prompts[1]
+
+
+def test_parse_batch_ignores_bad_items():
+    text = json.dumps({'locations': [
+        {'index': '1', 'city': ' Pune ', 'state': 'Maharashtra', 'country': 'India'},
+        {'index': 7, 'city': 'Nowhere', 'state': '', 'country': ''},
+        {'index': 0, 'city': 'Austin'},
+    ]})
+    assert parse_batch(text, 2) == {1: {'city': 'Pune', 'state': 'Maharashtra', 'country': 'India'}}
+    assert parse_batch('not json {', 2) == {}
+    assert parse_batch(None, 2) == {}
@@ -0,0 +1,118 @@
+import json
+
+import job_enricher
+from job_store import JobStore
+from jobs_schema import make_jobs_db
+from near_dupes import NearDupIndex, minhash, shingles, similarity
+
+POSTING = """Join our Global Markets technology team as a Senior Data Engineer. You will build
+and operate batch and streaming pipelines in Python and Spark, model trade and risk data in
+Snowflake, and partner with quants and traders to deliver reliable datasets. Requirements:
+five years of data engineering experience, strong SQL, experience with Airflow and Kafka,
+and a degree in computer science or a related field. Requisition {req}. Location: {city}."""
+
+OTHER = """We are hiring a Branch Manager to lead a retail banking team, coach advisors,
+grow deposits and lending, and deliver an excellent client experience across the branch.
+You have five years of leadership experience in retail financial services and a passion for
+community banking. Requisition {req}. Location: {city}."""
+
+ANSWER = {'is_real_job': True, 'requires_citizenship': False, 'no_visa_sponsorship': True,
+          'location': 'Toronto, ON', 'summary': 'Data pipelines for Global Markets'}
+
+
+def test_reposts_estimate_close_to_their_jaccard_similarity():
+    a = shingles('Senior Data Engineer', POSTING.format(req='R-1001', city='Toronto, ON'))
+    b = shingles('Senior Data Engineer', POSTING.format(req='R-2417', city='Montreal, QC'))
+    jaccard = len(a & b) / len(a | b)
+    assert abs(similarity(minhash(a), minhash(b)) - jaccard) < 0.15
+    other = shingles('Branch Manager', OTHER.format(req='R-1001', city='Toronto, ON'))
+    assert similarity(minhash(a), minhash(other)) < 0.2
+
+
+def test_repost_reuses_analysis_only_within_the_same_company(tmp_path):
+    index = NearDupIndex('llama3.2', 'v1', str(tmp_path / 'dupes.db'))
+    first = POSTING.format(req='R-1001', city='Toronto, ON')
+    assert index.match('j1', 'RBC', 'Senior Data Engineer', first) is None
+    assert index.add('j1', 'RBC', 'Senior Data Engineer', first, ANSWER, inference_seconds=6.0)
+
+    repost = POSTING.format(req='R-2417', city='Montreal, QC')
+    canonical, shared, score = index.match('j2', 'rbc ', 'Senior Data Engineer', repost)
+    assert canonical == 'j1' and score >= 0.8
+    assert 'location' not in shared and shared['summary'] == ANSWER['summary']
+    # A repost of the repost joins the same group
+    third = POSTING.format(req='R-3300', city='Calgary, AB')
+    assert index.match('j3', 'RBC', 'Senior Data Engineer', third)[0] == 'j1'
+
+    assert index.match('j4', 'TD', 'Senior Data Engineer', repost) is None
+    assert index.match('j5', 'RBC', 'Branch Manager', OTHER.format(req='R-9', city='Toronto, ON')) is None
+    assert index.match('j6', 'RBC', 'Analyst', 'Too short to compare') is None
+
+    assert index.totals() == (3, 2, 12.0)
+    assert index.summary() == ('Near-duplicates: 2 of 5 postings (40%) reused an analysis, '
+                               '12s of inference saved')
+    index.close()
+
+    assert NearDupIndex('llama3.2', 'v1', str(tmp_path / 'dupes.db')).purged == 0
+    changed = NearDupIndex('llama3.2', 'v2', str(tmp_path / 'dupes.db'))
+    assert changed.purged == 3
+    assert changed.match('j2', 'RBC', 'Senior Data Engineer', repost) is None
+
+
+def test_enricher_copies_the_representatives_analysis(tmp_path, monkeypatch):
+    index = NearDupIndex(job_enricher.MODEL, job_enricher.PROMPT_VERSION, str(tmp_path / 'dupes.db'))
+    monkeypatch.setattr(job_enricher, 'get_near_dupes', lambda: index)
+    monkeypatch.setattr(job_enricher, 'KEYWORD_PRECLASSIFY', False)
+    calls = []
+    monkeypatch.setattr(job_enricher, 'analyze_with_ollama',
+                        lambda *args: calls.append(args) or json.dumps(ANSWER))
+
+    job = ('j1', 'Senior Data Engineer', 'RBC', 'https://rbc/1', 'rbc')
+    details = {'description': POSTING.format(req='R-1001', city='Toronto, ON')}
+    analysis = job_enricher.analyze_stage(job, details)
+    assert analysis == ANSWER and details['duplicate_of'] is None
+
+    repost = ('j2', 'Senior Data Engineer', 'RBC', 'https://rbc/2', 'rbc')
+    details = {'description': POSTING.format(req='R-2417', city='Montreal, QC')}
+    analysis = job_enricher.analyze_stage(repost, details)
+    assert details['duplicate_of'] == 'j1' and len(calls) == 1
+    assert analysis['summary'] == ANSWER['summary'] and analysis['location'] is None
+
+    # A structured (Workday) location still fills in the repost's own location
+    workday = ('j3', 'Senior Data Engineer', 'RBC', 'https://rbc/3', 'rbc')
+    details = {'description': POSTING.format(req='R-3300', city='Calgary, AB'), 'location': 'Calgary, AB'}
+    assert job_enricher.analyze_stage(workday, details)['location'] == 'Calgary, AB'
+    assert len(calls) == 1
+
+
+def test_store_keeps_a_duplicates_own_location(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 2)
+    store = JobStore(path, flush_every=2, flush_interval=3600)
+    first, second = [row[0] for row in store.claim_jobs(2)]
+    with store.conn:
+        store.conn.execute("UPDATE jobs SET location = 'Montreal, QC' WHERE id = ?", (second,))
+    store.update_job(first, dict(ANSWER), 'desc')
+    store.update_job(second, dict(ANSWER, location=None), 'desc', duplicate_of=first)
+    rows = dict((job_id, row) for job_id, *row in store.conn.execute(
+        'SELECT id, location, duplicate_of, summary FROM jobs'))
+    assert rows[first] == ['Toronto, ON', None, ANSWER['summary']]
+    assert rows[second] == ['Montreal, QC', first, ANSWER['summary']]
+    store.close()
+
+
+def test_representatives_processed_again_keep_their_analysis(tmp_path):
+    index = NearDupIndex('llama3.2', 'v1', str(tmp_path / 'dupes.db'))
+    first = POSTING.format(req='R-1001', city='Toronto, ON')
+    index.add('c', 'RBC', 'Senior Data Engineer', first, ANSWER, inference_seconds=6.0)
+    assert index.match('m', 'RBC', 'Senior Data Engineer', POSTING.format(req='R-2', city='Montreal, QC'))[0] == 'c'
+
+    # The representative comes round again (expired lease): no self-match, no overwrite
+    assert index.match('c', 'RBC', 'Senior Data Engineer', first) is None
+    assert index.conn.execute("SELECT canonical_id, analysis IS NOT NULL FROM postings "
+                              "WHERE job_id = 'c'").fetchone() == ('c', 1)
+    assert index.match('n', 'RBC', 'Senior Data Engineer', POSTING.format(req='R-3', city='Calgary, AB'))[0] == 'c'
+
+    # A group whose representative lost its analysis is a miss, not a crash
+    with index.conn:
+        index.conn.execute("UPDATE postings SET analysis = NULL WHERE job_id = 'c'")
+    assert index.match('o', 'RBC', 'Senior Data Engineer', POSTING.format(req='R-4', city='Ottawa, ON')) is None
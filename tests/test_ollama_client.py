@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import job_enricher
+from ollama_client import (ANALYSIS_SCHEMA, EXTENDED_ANALYSIS_SCHEMA, OllamaClient,
+                           extract_json_object, token_budget, validate)
+from windowing import estimate_tokens
+
+ANSWER = ('{"is_real_job": true, "requires_citizenship": false, "no_visa_sponsorship": "true", '
+          '"location": "Toronto, ON {HQ}", "summary": "Analyst \\"II\\" role"}')
+TRAILER = ' Let me know if you need anything else! {"note": "extra"}'
+
+
+class OllamaStandIn(BaseHTTPRequestHandler):
+    """Streams ANSWER a few characters per token, then chatty trailing text"""
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.requests_seen.append(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        text = ANSWER + TRAILER
+        try:
+            for i in range(0, len(text), 4):
+                self.wfile.write(json.dumps({'response': text[i:i + 4], 'done': False}).encode() + b'\n')
+                self.wfile.flush()
+                time.sleep(0.002 if i < len(ANSWER) else 0.05)
+            self.wfile.write(json.dumps({'response': '', 'done': True, 'eval_count': len(text) // 4,
+                                         'prompt_eval_count': 50}).encode() + b'\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def ollama_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OllamaStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/api/generate'
+    server.shutdown()
+
+
+def test_extract_handles_nesting_and_braces_in_strings():
+    text = 'Sure! {"a": {"b": [1, {"c": "}"}]}, "d": "\\"{"} trailing {"x": 1}'
+    assert json.loads(extract_json_object(text)) == {'a': {'b': [1, {'c': '}'}]}, 'd': '"{'}
+    assert extract_json_object('no json here') is None
+    assert extract_json_object('{"unterminated": [1, 2') is None
+
+
+def test_validate_coerces_small_model_slips():
+    data = json.loads(extract_json_object(ANSWER))
+    data['extra'] = 'dropped'
+    result = validate(data, ANALYSIS_SCHEMA)
+    assert result['no_visa_sponsorship'] is True
+    assert 'extra' not in result
+
+    extended = dict(result, salary_min='85,000', salary_max='null', work_type='remote',
+                    mandatory_skills='SQL, Python', preferred_skills=[])
+    result = validate(extended, EXTENDED_ANALYSIS_SCHEMA)
+    assert (result['salary_min'], result['salary_max']) == (85000.0, None)
+    assert result['mandatory_skills'] == ['SQL', 'Python']
+
+    with pytest.raises(ValueError):
+        validate(dict(extended, work_type='sometimes'), EXTENDED_ANALYSIS_SCHEMA)
+    with pytest.raises(ValueError):
+        validate({'summary': 'ok'}, ANALYSIS_SCHEMA)
+
+
+def test_token_budget_scales_with_schema():
+    small = token_budget(ANALYSIS_SCHEMA)
+    assert 60 < small < 200
+    assert token_budget(EXTENDED_ANALYSIS_SCHEMA) > small
+
+
+def test_stream_stops_at_end_of_object(ollama_url):
+    client = OllamaClient('llama3.2', ollama_url)
+    started = time.monotonic()
+    text = client.generate_json('prompt', ANALYSIS_SCHEMA)
+    # The trailer alone takes ~0.7s to stream; we never wait for it
+    assert time.monotonic() - started < 0.5
+    assert text == ANSWER
+
+    sent = OllamaStandIn.requests_seen[-1]
+    assert sent['format'] == ANALYSIS_SCHEMA
+    assert sent['options']['num_predict'] == token_budget(ANALYSIS_SCHEMA)
+    assert client.stats['early_stops'] == 1 and client.stats['failures'] == 0
+    # The final chunk with prompt_eval_count is never read; the prompt is still counted
+    assert client.stats['prompt_tokens'] == estimate_tokens('prompt') > 0
+
+
+def test_enricher_analysis_goes_through_schema(ollama_url, monkeypatch):
+    monkeypatch.setattr(job_enricher, '_ollama', OllamaClient('llama3.2', ollama_url))
+    text = job_enricher.analyze_with_ollama('Analyst', 'td', 'Description')
+    analysis = job_enricher.parse_analysis(text)
+    assert analysis['location'] == 'Toronto, ON {HQ}'
+    assert analysis['no_visa_sponsorship'] is True
@@ -28,7 +28,7 @@ Answer these questions in JSON format:
 12. Preferred skills: list of 3-10 nice-to-have skills/technologies/competencies (array of strings).
 
 Respond ONLY with valid JSON:
-{
+{{
   "is_real_job": true/false,
   "requires_citizenship": true/false,
   "no_visa_sponsorship": true/false,
@@ -43,7 +43,7 @@ Respond ONLY with valid JSON:
   "posted_date": "YYYY-MM-DD" or null,
   "mandatory_skills": [ "skill1", "skill2", "..." ],
   "preferred_skills": [ "skill1", "skill2", "..." ]
-}
+}}
 """.format(title=title, company=company, description=description)
 
 
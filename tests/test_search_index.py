@@ -0,0 +1,69 @@
+from jobs_schema import make_jobs_conn
+from search_index import check, ensure_search_index, fts_query, optimize, rebuild, search
+
+JOBS = [
+    ('a', 'Business Analyst', 'bbva', 'Ciudad de México, México', 'Requirements for retail banking', 'Agile, SQL'),
+    ('b', 'Data Engineer', 'td', 'Toronto, ON', 'Pipelines', 'Works with business analysts'),
+    ('c', 'Senior Business Analyst', 'rbc', 'Toronto, ON', None, None),
+]
+
+
+def make_db():
+    return make_jobs_conn(('id', 'title', 'company', 'url', 'location', 'summary', 'description'),
+                          ((j[0], j[1], j[2], f'u-{j[0]}', *j[3:]) for j in JOBS))
+
+
+def ids(rows):
+    return [row[0] for row in rows]
+
+
+def test_ranked_prefix_search_over_existing_jobs():
+    conn = make_db()
+    assert ensure_search_index(conn) == 3
+    assert ensure_search_index(conn) == 0
+
+    # Title matches outrank a mention in the description
+    found = ids(search(conn, 'business analy'))
+    assert sorted(found[:2]) == ['a', 'c'] and found[2] == 'b'
+    assert ids(search(conn, 'mexico')) == ['a']
+    assert sorted(ids(search(conn, 'location:toronto'))) == ['b', 'c']
+    assert ids(search(conn, 'location:toronto senior')) == ['c']
+    assert ids(search(conn, '"data engineer"')) == ['b']
+    assert search(conn, '  ') == []
+
+
+def test_user_input_never_breaks_the_match_syntax():
+    assert fts_query('c++ (a OR b) NOT') == '"c"* AND "a"* AND "or"* AND "b"* AND "not"*'
+    assert fts_query('title:"data engineer" http://x') == 'title : ("data engineer") AND "http"* AND "x"*'
+    conn = make_db()
+    ensure_search_index(conn)
+    for text in ['"unbalanced', 'AND', 'x:y:z', '*', 'NEAR(a b)']:
+        search(conn, text)
+
+
+def test_triggers_keep_the_index_current():
+    conn = make_db()
+    ensure_search_index(conn)
+    with conn:
+        conn.execute("INSERT INTO jobs (id, title, company, url, location) VALUES ('d', 'QA Analyst', 'bmo', 'u-d', 'Madrid')")
+        conn.execute("UPDATE jobs SET location = 'Calgary, AB' WHERE id = 'c'")
+        conn.execute("UPDATE jobs SET status = 'enriched'")
+        conn.execute("DELETE FROM jobs WHERE id = 'b'")
+
+    assert ids(search(conn, 'madrid')) == ['d']
+    assert ids(search(conn, 'toronto')) == []
+    assert ids(search(conn, 'calgary')) == ['c']
+    assert check(conn)
+
+
+def test_rebuild_repairs_a_drifted_index():
+    conn = make_db()
+    ensure_search_index(conn)
+    with conn:
+        conn.execute("INSERT INTO jobs_fts (rowid, title, company, location, summary, description) "
+                     "VALUES (99, 'ghost', 'x', 'y', 'z', 'w')")
+    assert not check(conn)
+    rebuild(conn)
+    optimize(conn)
+    assert check(conn)
+    assert search(conn, 'ghost') == []
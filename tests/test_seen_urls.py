@@ -0,0 +1,124 @@
+import sqlite3
+
+import job_enricher
+from jobs_schema import make_jobs_conn, make_jobs_db
+from seen_urls import SeenUrls, canonical_key, clean_url, ensure_url_keys, merge_duplicates, update_url_keys
+
+WORKDAY = 'https://bbva.wd3.myworkdayjobs.com/en-US/BBVA/job/Madrid/Data-Analyst_R-12345'
+
+
+def test_ats_url_variants_share_one_key():
+    variants = [
+        [WORKDAY,
+         'https://bbva.wd3.myworkdayjobs.com/fr-CA/BBVA/job/Mexico-City/Data-Analyst_R-12345?source=LinkedIn',
+         'https://wd3.myworkdaysite.com/recruiting/bbva/BBVA/job/Madrid/Data-Analyst_R-12345',
+         'https://bbva.wd3.myworkdayjobs.com/BBVA/details/Data-Analyst_R-12345'],
+        ['https://td.wd3.myworkdayjobs.com/TD/job/Toronto/Analyst_R_1',
+         'https://td.wd3.myworkdayjobs.com/en-US/TD/job/Toronto/Analyst_R_1'],
+        ['https://eeho.fa.us2.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1/job/98765/?utm_source=x',
+         'https://eeho.fa.us2.oraclecloud.com/hcmUI/CandidateExperience/fr/sites/CX_1/requisitions/preview/98765',
+         'https://eeho.fa.us2.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1/job?requisitionId=98765'],
+        ['https://careers-bank.icims.com/jobs/4321/data-analyst/job?hub=7&in_iframe=1',
+         'https://careers-bank.icims.com/jobs/4321/login'],
+        ['https://bank.eightfold.ai/careers?pid=5636&domain=bank.com',
+         'https://bank.eightfold.ai/careers/job/5636'],
+        ['https://recruiting2.ultipro.com/BAN1000/JobBoard/aa-bb/OpportunityDetail?opportunityId=ABC-123',
+         'https://recruiting.ultipro.com/ban1000/JobBoard/aa-bb/OpportunityDetail?opportunityId=abc-123'],
+        ['https://bank.avature.net/en_US/careers/JobDetail/Data-Analyst/777',
+         'https://bank.avature.net/careers/JobDetail?jobId=777'],
+        ['https://www.example.com/jobs/123/?utm_campaign=a&b=2&a=1#apply',
+         'http://example.com/jobs/123?a=1&b=2'],
+    ]
+    keys = [{canonical_key(url) for url in group} for group in variants]
+    assert all(len(group) == 1 for group in keys)
+    assert len(set.union(*keys)) == len(variants)
+    # Different requisitions, and generic country paths, stay apart
+    assert canonical_key(WORKDAY) != canonical_key(WORKDAY.replace('R-12345', 'R-12346'))
+    assert canonical_key('https://bank.com/us/jobs/1') != canonical_key('https://bank.com/ca/jobs/1')
+    assert clean_url('https://bank.com/jobs?id=7&utm_medium=x#top') == 'https://bank.com/jobs?id=7'
+
+
+def test_seen_filter_persists_and_picks_up_scraper_rows(tmp_path):
+    path, bloom = str(tmp_path / 'jobs.db'), str(tmp_path / 'seen.bloom')
+    ids = make_jobs_db(path, 3)
+    conn = sqlite3.connect(path)
+    seen = SeenUrls(conn, bloom)
+    assert seen.seen('https://www.example.com/job/1/?utm_source=x') == ids[1]
+    assert seen.seen('https://example.com/job/99') is None
+
+    job_id = seen.add('Data Analyst', 'bbva', WORKDAY, 'bbva')
+    assert job_id and seen.add('Data Analyst', 'bbva', WORKDAY.replace('en-US', 'es'), 'bbva') is None
+    assert seen.ingest([{'title': 'Analyst', 'company': 'bbva', 'url': WORKDAY},
+                        {'title': 'Teller', 'company': 'bbva', 'url': 'https://example.com/job/7'}], 'bbva') == (1, 1)
+    assert seen.stats['found'] == 3 and seen.stats['added'] == 2
+    seen.close()
+
+    # The Node scraper inserts without a key; reopening the saved filter keys it
+    with conn:
+        conn.execute("INSERT INTO jobs (id, title, company, url) VALUES ('n1', 'Teller', 'bank', "
+                     "'https://bank.avature.net/careers/JobDetail/Teller/42')")
+    reopened = SeenUrls(conn, bloom)
+    assert reopened.bloom.count == seen.bloom.count + 1
+    assert reopened.seen('https://bank.avature.net/careers/JobDetail?jobId=42') == 'n1'
+    assert reopened.seen(WORKDAY) == job_id
+    reopened.close()
+
+    # A smaller (replaced) database than the filter has seen is rebuilt from scratch
+    other = make_jobs_conn(path=str(tmp_path / 'other.db'))
+    fresh = SeenUrls(other, bloom)
+    assert fresh.bloom.count == 0 and fresh.seen(WORKDAY) is None
+
+
+def test_merge_keeps_the_enriched_row_and_fills_its_gaps():
+    conn = make_jobs_conn()
+    conn.execute('ALTER TABLE jobs ADD COLUMN duplicate_of TEXT')
+    conn.execute('ALTER TABLE jobs ADD COLUMN match_version INTEGER')
+    conn.executemany('INSERT INTO jobs (id, title, company, url, status, summary, posted_date, duplicate_of, '
+                     'match_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+                         ('a', 'Analyst', 'bbva', WORKDAY, 'new', None, '2024-06-01', None, 1),
+                         ('b', 'Analyst', 'bbva', WORKDAY.replace('en-US', 'es'), 'enriched', 'ok', None, None, None),
+                         ('c', 'Analyst', 'bbva', WORKDAY.replace('en-US/', ''), 'new', None, None, 'x', 1),
+                         ('d', 'Teller', 'bbva', 'https://example.com/job/1', 'enriched', 'ok', None, 'a', 1),
+                     ])
+    ensure_url_keys(conn)
+    assert len(update_url_keys(conn)) == 4
+    assert merge_duplicates(conn, dry_run=True) == (1, 2, 0)
+    assert merge_duplicates(conn) == (1, 2, 0)
+    assert conn.execute('SELECT id, status, summary, posted_date FROM jobs ORDER BY id').fetchall() == [
+        ('b', 'enriched', 'ok', '2024-06-01'), ('d', 'enriched', 'ok', None)]
+    assert conn.execute("SELECT duplicate_of FROM jobs WHERE id = 'd'").fetchone() == ('b',)
+    # Bookkeeping columns are not inherited (b still needs re-vectorizing)
+    assert conn.execute("SELECT match_version, duplicate_of FROM jobs WHERE id = 'b'").fetchone() == (None, None)
+
+    # Changing a url drops its key until it is re-keyed
+    conn.execute("UPDATE jobs SET url = 'https://example.com/job/2' WHERE id = 'd'")
+    assert update_url_keys(conn) == ['example.com/job/2']
+    assert merge_duplicates(conn) == (0, 0, 0)
+
+
+def test_merge_keeps_the_users_triage_and_skips_claimed_postings():
+    conn = make_jobs_conn(('id', 'title', 'company', 'url', 'status', 'summary'), [
+        ('a', 'Analyst', 'bbva', WORKDAY, 'enriched', 'ok'),
+        ('b', 'Analyst', 'bbva', WORKDAY.replace('en-US', 'es'), 'rejected', None),
+        ('c', 'Teller', 'bbva', 'https://example.com/job/1', 'enriched', 'ok'),
+        ('d', 'Teller', 'bbva', 'https://example.com/job/1?utm_source=x', 'processing', None),
+    ])
+    ensure_url_keys(conn)
+    update_url_keys(conn)
+    assert merge_duplicates(conn) == (1, 1, 1)
+    assert conn.execute('SELECT id, status, summary FROM jobs ORDER BY id').fetchall() == [
+        ('b', 'rejected', 'ok'), ('c', 'enriched', 'ok'), ('d', 'processing', None)]
+
+
+def test_enricher_keys_urls_but_leaves_duplicates_to_the_cli(tmp_path, monkeypatch):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 0)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO jobs (id, title, company, url, status) VALUES (?, 'Analyst', 'bbva', ?, ?)",
+                         [('a', WORKDAY, 'rejected'), ('b', WORKDAY.replace('en-US', 'es'), 'new')])
+    monkeypatch.setattr(job_enricher, 'DB_PATH', path)
+    monkeypatch.setattr(job_enricher, '_store', None)
+    assert [row[0] for row in job_enricher.get_pending_jobs()] == ['b']
+    job_enricher.close_store()
+    assert conn.execute('SELECT COUNT(DISTINCT url_key), COUNT(*) FROM jobs').fetchone() == (1, 2)
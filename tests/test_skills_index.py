@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import time
+
+import job_enricher
+from jobs_schema import make_jobs_conn, make_jobs_db
+from skills_index import ensure_skills_index, find_jobs, index_skills, normalize_skill, parse_skills
+
+JOBS = [
+    ('a', ['JavaScript', 'SQL'], ['Python 3.11']),
+    ('b', ['JS', 'Node.js'], ['sql']),
+    ('c', ['python3', 'MS Excel'], []),
+    ('d', ['Excel (2016)'], ['AWS']),
+]
+
+
+def make_db():
+    conn = make_jobs_conn(('id', 'title', 'company', 'url', 'mandatory_skills', 'preferred_skills'),
+                          ((j, 'Analyst', 'bank', f'u-{j}', json.dumps(m), json.dumps(p)) for j, m, p in JOBS))
+    ensure_skills_index(conn)
+    return conn
+
+
+def counts(conn):
+    return dict(conn.execute('SELECT name, job_count FROM skills WHERE job_count > 0'))
+
+
+def test_normalization_folds_case_versions_and_aliases():
+    assert normalize_skill('JS') == ('javascript', 'javascript')
+    assert normalize_skill(' JavaScript. ') == ('javascript', 'JavaScript')
+    assert normalize_skill('Java 8+')[0] == 'java'
+    assert normalize_skill('Angular v12')[0] == 'angular'
+    assert normalize_skill('Microsoft Excel')[0] == 'excel'
+    for kept in ['S3', 'EC2', 'C++', 'C#', 'CI/CD']:
+        assert normalize_skill(kept) == (kept.lower(), kept)
+    assert normalize_skill('.NET') == ('.net', '.NET')
+    assert normalize_skill('Office 365')[0] == 'microsoft office'
+    assert normalize_skill('Windows 10') == ('windows 10', 'Windows 10')
+    assert normalize_skill('Web 2.0') == ('web 2.0', 'Web 2.0')
+    assert normalize_skill('SQL (PostgreSQL)') == ('sql (postgresql)', 'SQL (PostgreSQL)')
+    assert normalize_skill('Excel (Advanced)')[0] == 'excel'
+    assert normalize_skill('') is None and normalize_skill(None) is None
+    assert parse_skills('["SQL", 3, "Excel"]') == ['SQL', 'Excel']
+    assert parse_skills('SQL, Excel') == ['SQL', ' Excel']
+
+
+def test_and_or_queries_use_the_postings():
+    conn = make_db()
+    assert index_skills(conn) == (4, 10)
+    assert counts(conn) == {'javascript': 2, 'sql': 2, 'python': 2, 'node.js': 1, 'excel': 2, 'aws': 1}
+
+    assert sorted(find_jobs(conn, ['js', 'SQL'])) == ['a', 'b']
+    assert find_jobs(conn, ['javascript', 'sql'], required=True) == ['a']
+    assert sorted(find_jobs(conn, any_of=['aws', 'node'])) == ['b', 'd']
+    assert sorted(find_jobs(conn, ['excel'], any_of=['aws', 'python'])) == ['c', 'd']
+    assert find_jobs(conn, ['excel', 'cobol']) == []
+    assert find_jobs(conn) == []
+
+
+def test_only_changed_jobs_are_reindexed():
+    conn = make_db()
+    index_skills(conn)
+    assert index_skills(conn) == (0, 0)
+
+    with conn:
+        conn.execute("UPDATE jobs SET preferred_skills = ? WHERE id = 'a'", (json.dumps(['Golang']),))
+        conn.execute("UPDATE jobs SET status = 'enriched'")
+        conn.execute("INSERT INTO jobs (id, title, company, url, mandatory_skills) "
+                     "VALUES ('e', 'Dev', 'x', 'u-e', '[\"Go\"]')")
+        conn.execute("DELETE FROM jobs WHERE id = 'd'")
+    assert index_skills(conn) == (2, 4)
+
+    assert sorted(find_jobs(conn, ['go'])) == ['a', 'e']
+    assert find_jobs(conn, ['python']) == ['c']
+    assert find_jobs(conn, ['aws']) == []
+    assert counts(conn) == {'javascript': 2, 'sql': 2, 'python': 1, 'node.js': 1, 'excel': 1, 'go': 2}
+
+
+def test_enricher_indexes_after_flushes_not_on_every_claim(tmp_path, monkeypatch):
+    path = str(tmp_path / 'jobs.db')
+    make_jobs_db(path, 4)
+    monkeypatch.setattr(job_enricher, 'DB_PATH', path)
+    monkeypatch.setattr(job_enricher, '_store', None)
+    monkeypatch.setattr(job_enricher, '_last_indexed', time.monotonic())
+    monkeypatch.setattr(job_enricher, 'INDEX_INTERVAL', 3600)
+    jobs = job_enricher.get_pending_jobs(2)
+    store = job_enricher.get_store()
+    for job_id, *_ in jobs:
+        store.update_job(job_id, {'summary': 's'}, 'desc')
+    store.flush()
+    job_enricher.get_pending_jobs(2)
+    unindexed = 'SELECT COUNT(*) FROM jobs WHERE skills_version IS NULL'
+    assert store.conn.execute(unindexed).fetchone() == (4,)
+
+    conn = sqlite3.connect(path)
+    job_enricher.close_store()
+    assert conn.execute(unindexed).fetchone() == (0,)
+    assert conn.execute('SELECT COUNT(*) FROM jobs WHERE match_version IS NULL').fetchone() == (0,)
@@ -0,0 +1,28 @@
+from windowing import estimate_tokens, select_windows, split_sentences
+
+INTRO = 'We are hiring a Business Analyst to join our Payments team in Toronto, ON.'
+BLURB = 'Our company has a long history of putting people first and giving back to communities. '
+CLAUSE = 'Unfortunately we are unable to sponsor work visas for this position.'
+
+
+def test_short_text_is_untouched():
+    assert select_windows(INTRO, budget=100) == INTRO
+
+
+def test_long_runs_and_bullets_are_split():
+    text = 'Requirements: • SQL • Python ' + 'word ' * 200
+    parts = split_sentences(text)
+    assert parts[:2] == ['Requirements:', '• SQL']
+    assert parts[2].startswith('• Python word')
+    assert max(len(p) for p in parts) <= 400
+
+
+def test_eligibility_clause_at_the_end_survives():
+    text = ' '.join([INTRO, BLURB * 40, 'The salary range is $80,000 - $95,000 CAD.', BLURB * 20, CLAUSE])
+    window = select_windows(text, budget=120)
+    assert estimate_tokens(window) <= 120 + 10
+    assert window.startswith(INTRO)
+    assert '$80,000' in window and window.endswith(CLAUSE)
+    assert ' … ' in window
+    # The old first-3000-characters prompt would have lost the clause
+    assert CLAUSE not in text[:3000]
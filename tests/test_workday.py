@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import job_enricher
+from workday import fetch_workday_job, parse_posted_date, parse_workday_url, workday_api_url
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'workday')
+
+# cxs path -> recorded response
+ROUTES = {
+    '/wday/cxs/bbva/BBVA/job/PATRIMONIAL-VERACRUZ-6397/Banquero-a-Patrimonial--Divisin-SUR-_JR00056335':
+        'bbva_banquero_patrimonial.json',
+    '/wday/cxs/td/TDBankCareers/job/Toronto-Ontario/Business-Analyst-II_R_1234567':
+        'td_business_analyst_multi.json',
+}
+
+BBVA_URL = ('https://bbva.wd3.myworkdayjobs.com/en-US/BBVA/job/PATRIMONIAL-VERACRUZ-6397/'
+            'Banquero-a-Patrimonial--Divisin-SUR-_JR00056335')
+TD_URL = 'https://td.wd3.myworkdayjobs.com/TDBankCareers/job/Toronto-Ontario/Business-Analyst-II_R_1234567'
+
+
+class WorkdayStandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = ROUTES.get(self.path)
+        if not name:
+            self.send_response(404)
+            self.end_headers()
+            return
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def api_base():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), WorkdayStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def test_url_parsing():
+    assert workday_api_url(BBVA_URL) == (
+        'https://bbva.wd3.myworkdayjobs.com/wday/cxs/bbva/BBVA/job/PATRIMONIAL-VERACRUZ-6397/'
+        'Banquero-a-Patrimonial--Divisin-SUR-_JR00056335')
+    wf = parse_workday_url('https://wd1.myworkdaysite.com/en-US/recruiting/wf/WellsFargoJobs/job/Charlotte-NC/Analyst_R-1')
+    assert (wf['tenant'], wf['site']) == ('wf', 'WellsFargoJobs')
+    # Search/landing pages and other ATSs are not job detail URLs
+    assert parse_workday_url('https://bmo.wd3.myworkdayjobs.com/en-US/External') is None
+    assert parse_workday_url('https://careers-eastwestbank.icims.com/jobs/123/job') is None
+
+
+def test_posted_date_fallbacks():
+    today = date(2026, 1, 10)
+    assert parse_posted_date({'startDate': '2025-12-19'}, today) == '2025-12-19'
+    assert parse_posted_date({'postedOn': 'Posted Yesterday'}, today) == '2026-01-09'
+    assert parse_posted_date({'postedOn': 'Posted 30+ Days Ago'}, today) == '2025-12-11'
+    assert parse_posted_date({}, today) is None
+
+
+def test_fetch_from_stand_in(api_base):
+    job = fetch_workday_job(BBVA_URL, api_base=api_base)
+    assert job['source'] == 'workday-api'
+    assert job['description'].startswith('Propósito del puesto Atender y desarrollar')
+    assert '<' not in job['description']
+    assert job['location'] == 'PATRIMONIAL VERACRUZ, Mexico'
+    assert job['posted_date'] == '2025-12-19'
+    assert job['job_type'] == 'full-time'
+
+    multi = fetch_workday_job(TD_URL, api_base=api_base)
+    assert multi['location'] == 'Toronto, Ontario; Montreal, Quebec'
+    assert multi['job_type'] == 'part-time'
+
+
+def test_enricher_falls_back_to_html(api_base, monkeypatch):
+    monkeypatch.setattr(job_enricher, 'WORKDAY_API_BASE', api_base)
+    scraped = []
+    monkeypatch.setattr(job_enricher, 'scrape_job_description',
+                        lambda url: scraped.append(url) or 'html text')
+
+    assert job_enricher.fetch_job_details(BBVA_URL)['source'] == 'workday-api'
+    assert scraped == []
+
+    missing = TD_URL.replace('R_1234567', 'R_0000000')
+    assert job_enricher.fetch_job_details(missing) == {'description': 'html text', 'source': 'html'}
+    assert scraped == [missing]
+
+
+def test_structured_fields_fill_analysis():
+    details = json.loads(json.dumps({'description': 'x', 'location': 'Toronto, Ontario, Canada',
+                                     'posted_date': '2026-01-09', 'job_type': 'full-time'}))
+    merged = job_enricher.merge_details({'location': 'Unknown', 'summary': 's'}, details)
+    assert merged['location'] == 'Toronto, Ontario, Canada'
+    assert merged['posted_date'] == '2026-01-09'
+    assert job_enricher.merge_details(None, details)['job_type'] == 'full-time'
+    assert job_enricher.merge_details(None, {'description': 'x', 'source': 'html'}) is None